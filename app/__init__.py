@@ -1 +1,9 @@
-from .app import app
\ No newline at end of file
+def __getattr__(name):
+    # The Flask app is imported on first use rather than with the package, so
+    # PDF worker processes can import app.pdf_worker without creating it
+    if name == "app":
+        from .app import app as flask_app
+
+        globals()["app"] = flask_app
+        return flask_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,16 +1,46 @@
+from contextlib import nullcontext
 from datetime import datetime
+import uuid
 from anthropic import Anthropic
-from flask import Flask, json, request, jsonify
+from flask import Flask, Response, json, request, jsonify, stream_with_context
 from flask_cors import CORS
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
 import os
-import pdfplumber
+import shutil
+import zipfile
 from app.app_utils import *
-from app.privacy_filter import PrivacyFilter
+from app.backup import create_backup
+from app.export import EXPORT_FORMATS, parquet_available
+from app.extraction import extract_statement_data
+from app.http_cache import ResponseCache
+from app.ingest import ingest_statement
+from app.jobs import JobQueue
+from app.metrics import RequestMetrics
+from app.parsers import parse_statement
+from app.pdf_text import extract_pdf_pages, shutdown_pool
+from app.profiling import (
+    PROFILERS,
+    StageTimer,
+    capture_profile,
+    profile_path,
+    profiler_available,
+    render_profile,
+)
+from app.sqlite_profile import DEFAULT_PRAGMAS, apply_pragmas, read_only
 from dotenv import load_dotenv
 from models.account import Account
 from models.transaction import Transaction
 from models.balance import Balance
+from models.ingest_stage import IngestStage
+from models.job import Job
+from models.merchant_category import MerchantCategory, MerchantMatcher, normalize_merchant
+from models.monthly_rollup import MonthlyRollup
+from models.page_text import PageText
+from models.statement import Statement
 from models import db
+from models.migrations import upgrade_schema
+from models.session import READ_BIND
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
@@ -19,137 +49,343 @@ app = Flask(__name__)
 app.debug = True
 CORS(app)
 DATABASE_NAME = "bankBuddy.db"
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + DATABASE_NAME
+# Overridable so benchmarks can run against a database of their own
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
+    "BANKBUDDY_DATABASE_URI", "sqlite:///" + DATABASE_NAME
+)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Upper bound on the size of cached LLM extraction results
+app.config["EXTRACTION_CACHE_MAX_BYTES"] = 50 * 1024 * 1024
+# Worker threads processing uploaded statements; 0 processes them inline
+app.config["JOB_WORKERS"] = int(os.getenv("BANKBUDDY_JOB_WORKERS", "2"))
+# Processes extracting PDF pages in parallel
+app.config["PDF_WORKERS"] = int(os.getenv("BANKBUDDY_PDF_WORKERS", os.cpu_count() or 1))
+# Compressed database backups: folder, how many to keep, pages copied per step
+app.config["BACKUP_DIR"] = os.getenv("BANKBUDDY_BACKUP_DIR", "./backups")
+app.config["BACKUP_RETENTION"] = 14
+app.config["BACKUP_PAGES_PER_STEP"] = 1024
+# Where cProfile/pyinstrument captures of uploads sent with ?profile= go
+app.config["PROFILE_DIR"] = os.getenv("BANKBUDDY_PROFILE_DIR", "./profiles")
+# Estimated prompt tokens of statement text sent to the LLM per request
+app.config["LLM_CHUNK_TOKENS"] = 6000
+# Output token limit of each LLM request
+app.config["LLM_MAX_TOKENS"] = 4000
+# LLM requests in flight at once for one statement
+app.config["LLM_CONCURRENCY"] = 4
+# Serialized GET responses kept in memory, keyed by data version and query
+app.config["RESPONSE_CACHE_ENTRIES"] = 32
+# Requests slower than this are logged with their query plans; 0 turns it off
+app.config["SLOW_REQUEST_MS"] = float(os.getenv("BANKBUDDY_SLOW_REQUEST_MS", "1000"))
+# PRAGMAs run on every SQLite connection; see app/sqlite_profile.py
+app.config["SQLITE_PRAGMAS"] = dict(DEFAULT_PRAGMAS)
+# Read-only endpoints get their own connection pool so they are not queued
+# behind statement ingestion; 0 sends them through the main engine
+if os.getenv("BANKBUDDY_READ_POOL", "1") != "0":
+    app.config["SQLALCHEMY_BINDS"] = {READ_BIND: app.config["SQLALCHEMY_DATABASE_URI"]}
 db.init_app(app)
+request_metrics = RequestMetrics(app.config["SLOW_REQUEST_MS"])
+request_metrics.init_app(app)
+with app.app_context():
+    for bind_key, engine in db.engines.items():
+        apply_pragmas(engine, app.config["SQLITE_PRAGMAS"], read_only=bind_key == READ_BIND)
+        request_metrics.instrument_engine(engine)
+response_cache = ResponseCache(app.config["RESPONSE_CACHE_ENTRIES"])
 
 
-def extract_transactions_from_pdf(pdf_path, api_key):
+def extract_transactions_from_pdf(pdf_path, api_key, content_hash=None, institution=None, timer=None):
     """
     Extract credit card transactions from a PDF statement using Claude AI.
 
+    Statements with a registered local parser (see app/parsers) are read
+    without calling the API; the LLM is only used when no parser matches or
+    the parser's result fails its confidence check. With an API key, a parsed
+    statement whose merchants are mostly unknown also goes to the LLM, since
+    the parser can only give them placeholder categories.
+
+    Long statements are split into page-aligned chunks that are extracted
+    concurrently, and each chunk's result is cached, so re-processing the same
+    statement only calls the API for chunks that have not succeeded before.
+
     Args:
         pdf_path (str): Path to the PDF file
         api_key (str): Anthropic API key
+        content_hash (str): SHA-256 of the file, computed if not given
+        institution (str): Institution of the statement's account
+        timer (StageTimer): Records the time of each extraction stage
 
     Returns:
         list: List of transaction dictionaries
     """
-    # Initialize Anthropic client
-    client = Anthropic(api_key=api_key)
-    privacy_filter = PrivacyFilter()
+    timer = timer or StageTimer()
+    with timer.stage("local_parser") as details:
+        try:
+            data = parse_statement(
+                pdf_path, institution, matcher=MerchantMatcher.load(), require_categories=bool(api_key)
+            )
+        except Exception as e:
+            print(f"Local statement parser failed, falling back to LLM: {str(e)}")
+            data = None
+        details["matched"] = data is not None
+        if data is not None:
+            details["redaction_hits"] = data["redaction_hits"]
+    if data is not None:
+        return data
+
+    if not api_key:
+        raise ValueError("No Anthropic Key Found")
 
-    # Extract text from PDF
+    # Extract and redact text from PDF, one page per worker task
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join(page.extract_text() for page in pdf.pages)
-            text = privacy_filter.hash_sensitive_data(text)
+        content_hash = content_hash or file_sha256(pdf_path)
+        pages = extract_pdf_pages(
+            pdf_path, content_hash, app.config["PDF_WORKERS"], timer=timer
+        )
     except Exception as e:
         raise Exception(f"Error reading PDF: {str(e)}")
 
-    # Prepare prompt for Claude
-    prompt = f"""RESPOND WITH VALID JSON ONLY - NO OTHER TEXT
-
-    Extract transactions from this credit card statement as JSON:
-
-    {{
-        "statement_date": "YYYY-MM-DD or null",
-        "account_balance": "numeric value or null",
-        "transactions": [
-            {{
-                "transaction_date": "YYYY-MM-DD", 
-                "description": "string",
-                "amount": -123.45,  
-                "category": "string from allowed list"
-            }}
-        ]
-    }}
+    return extract_statement_data(
+        Anthropic(api_key=api_key),
+        pages,
+        chunk_tokens=app.config["LLM_CHUNK_TOKENS"],
+        max_tokens=app.config["LLM_MAX_TOKENS"],
+        concurrency=app.config["LLM_CONCURRENCY"],
+        cache_max_bytes=app.config["EXTRACTION_CACHE_MAX_BYTES"],
+        timer=timer,
+    )
 
-    IMPORTANT: 
-    - amount must be a NUMBER (not string)
-    - Use negative numbers for debits/charges
-    - Use positive numbers for credits/payments
-    - Do not include currency symbols or commas
 
-    Allowed categories: paycheck, other income, transfer, credit card payment, home, utilities, rent, auto, gas, parking, travel, restaurant, groceries, medical, amazon, walmart, shopping, subscriptions, donations, insurance, investments, other expenses
+def save_upload(stream, filename):
+    """
+    Copy an uploaded file into UPLOAD_FOLDER without reading it into memory.
 
-    Statement text:
-    {text}"""
-    # Get response from Claude
+    Returns:
+        str: Path of the saved file
+    """
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    # Prefix with a unique id so queued uploads with the same name do not clash
+    file_path = os.path.join(
+        UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{secure_filename(filename)}"
+    )
     try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=4000,
-            # system="You are a JSON API. You only respond with valid JSON objects. Never include explanatory text, markdown formatting, or anything other than pure JSON.",
-            messages=[{"role": "user", "content": prompt}],
-        )
-        response = message.content[0].text
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(stream, f)
+    except Exception:
+        os.remove(file_path)
+        raise
+    return file_path
 
-        # Parse JSON response
-        # Clean the response - remove markdown code blocks if present
-        response = response.strip()
 
-        # Remove opening code fence
-        if response.startswith("```json"):
-            response = response[7:]  # Remove ```json
-        elif response.startswith("```"):
-            response = response[3:]  # Remove ```
+def queue_statement(account_id, filename, file_path, batch_id=None, profiler=None, timer=None, force=False):
+    """
+    Queue a saved statement file for processing.
 
-        # Remove closing code fence
-        if response.endswith("```"):
-            response = response[:-3]  # Remove trailing ```
+    The upload's stage timings are recorded in the job's ingest history,
+    and the payload lists every stage recorded for the job so far: with
+    JOB_WORKERS set to 0 that includes the whole extraction and ingest.
 
-        # Strip again after removing fences
-        response = response.strip()
+    Args:
+        profiler (str): Capture a cProfile or pyinstrument profile of the job
+        timer (StageTimer): Stages of the upload timed so far
+        force (bool): Import the file even if it was imported into the
+            account before, e.g. after its transactions were deleted
 
-        # Parse JSON response
-        data = json.loads(response)
+    Returns:
+        tuple: (response payload, HTTP status code)
+    """
+    timer = timer or StageTimer()
+    with timer.stage("hash"):
+        content_hash = file_sha256(file_path)
+    # An identical file already imported into this account needs no extraction
+    with timer.stage("statement_lookup"):
+        already_imported = not force and Statement.get_by_hash(account_id, content_hash)
+    if already_imported:
+        os.remove(file_path)
+        return {
+            "message": "Statement already imported",
+            "already_imported": True,
+            "timings": timer.stages,
+        }, 200
+
+    job = Job.add_job(
+        account_id, filename, file_path, content_hash, batch_id=batch_id, profiler=profiler
+    )
+    IngestStage.add_stages(job.job_id, timer.stages)
+    job_queue.submit(job.job_id)
+    return {
+        "message": "Statement queued for processing",
+        "job_id": job.job_id,
+        "status_url": f"/api/jobs/{job.job_id}",
+        "timings": [stage.to_dict() for stage in IngestStage.get_for_job(job.job_id)],
+    }, 202
+
+
+def get_requested_profiler():
+    """
+    Read the optional profile=cprofile|pyinstrument upload parameter.
 
-        # Basic validation
-        if not isinstance(data["transactions"], list):
-            raise ValueError("Response is not a JSON array")
+    Returns:
+        tuple: (profiler or None, error message or None)
+    """
+    profiler = request.values.get("profile") or None
+    if profiler is None:
+        return None, None
+    if profiler not in PROFILERS:
+        return None, f"profile must be one of: {', '.join(PROFILERS)}"
+    if not profiler_available(profiler):
+        return None, f"{profiler} is not installed"
+    return profiler, None
 
-        return data
 
-    except Exception as e:
-        raise Exception(f"Error processing with Claude: {str(e)}")
+def get_requested_force():
+    """Read the optional force=1 upload parameter."""
+    return request.values.get("force", "").lower() in ("1", "true")
 
 
 def process_pdf_upload(account_id, file):
+    """
+    Validate and save an uploaded statement, then queue it for processing.
+
+    Returns 202 with the job id; progress is reported by /api/jobs/<job_id>.
+    """
     if not file or file.filename == "":
         return jsonify({"error": "No file selected"}), 400
     if not file.filename.endswith(".pdf"):
         return jsonify({"error": "Only PDF files are allowed"}), 400
+    profiler, error = get_requested_profiler()
+    if error:
+        return jsonify({"error": error}), 400
+
+    timer = StageTimer()
+    with timer.stage("save") as details:
+        file_path = save_upload(file.stream, file.filename)
+        details["bytes"] = os.path.getsize(file_path)
+    payload, status = queue_statement(
+        account_id, file.filename, file_path,
+        profiler=profiler, timer=timer, force=get_requested_force(),
+    )
+    return jsonify(payload), status
+
+
+def find_account(account_id=None, name=None, last_4_digits=None):
+    """
+    Look up an account by id, or by name and last 4 digits as in
+    /api/upload-statement-by-name.
+    """
+    if account_id is not None:
+        return db.session.get(Account, int(account_id))
+    if name and last_4_digits:
+        return Account.query.filter_by(name=name, last_4_digits=last_4_digits).first()
+    return None
 
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
 
-    API_KEY = os.getenv("ANTHROPIC_API_KEY")
-    if not API_KEY:
-        return jsonify({"error": "No Anthropic Key Found"}), 500
+def iter_batch_files(files):
+    """
+    Yield (filename, stream, error) for each PDF in a batch upload, expanding
+    zips. A zip or member that cannot be read is yielded once with no stream
+    and an error, so the rest of the batch still goes through.
+    """
+    for file in files:
+        if not file.filename.lower().endswith(".zip"):
+            yield file.filename, file.stream, None
+            continue
+        try:
+            archive = zipfile.ZipFile(file.stream)
+        except zipfile.BadZipFile as e:
+            yield file.filename, None, f"Invalid zip file: {str(e)}"
+            continue
+        with archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                # Skip folders and macOS resource forks
+                if member.is_dir() or name.startswith("._") or "__MACOSX" in member.filename:
+                    continue
+                try:
+                    stream = archive.open(member)
+                except zipfile.BadZipFile as e:
+                    yield name, None, f"Invalid zip file: {str(e)}"
+                    continue
+                with stream:
+                    yield name, stream, None
+
+
+def process_statement_job(job):
+    """
+    Extract and ingest the statement saved for a job, recording the time of
+    each stage in the ingest history whether or not it succeeds, and a
+    profile of the whole run if the upload asked for one.
 
-    data = extract_transactions_from_pdf(file_path, API_KEY)
+    Returns:
+        dict: Inserted transaction count and a summary message
+    """
+    timer = StageTimer()
+    if job.profiler:
+        path = profile_path(app.config["PROFILE_DIR"], job.job_id, job.profiler)
+        profiling = capture_profile(job.profiler, path)
+    else:
+        profiling = nullcontext()
+    try:
+        with profiling:
+            result = extract_and_ingest(job, timer)
+    except Exception:
+        db.session.rollback()
+        IngestStage.add_stages(job.job_id, timer.stages)
+        raise
+    # Committed together with the job's result
+    IngestStage.add_stages(job.job_id, timer.stages, commit=False)
+    return result
+
+
+def extract_and_ingest(job, timer):
+    API_KEY = os.getenv("ANTHROPIC_API_KEY")
+    account = db.session.get(Account, job.account_id)
+    data = extract_transactions_from_pdf(
+        job.file_path,
+        API_KEY,
+        job.content_hash,
+        institution=account.institution if account else None,
+        timer=timer,
+    )
     if (
         not isinstance(data, dict)
         or "transactions" not in data
         or "account_balance" not in data
         or "statement_date" not in data
     ):
-        os.remove(file_path)
-        return jsonify({"error": "Invalid data format from PDF extraction"}), 500
+        raise ValueError("Invalid data format from PDF extraction")
 
-    transaction_ids = add_trasactions_to_db(data["transactions"], account_id)
-    # balance = convert_to_float(data['account_balance'])
-    balance = data["account_balance"] if data["account_balance"] is not None else 0.0
-    _ = Balance.add_balance(account_id, balance, data["statement_date"])
-    Account.update_last_statement_date(account_id)
+    transaction_ids = ingest_statement(
+        job.account_id, data, content_hash=job.content_hash, timer=timer
+    )
+    # Page text is only kept around for retries of failed statements
+    if job.content_hash:
+        PageText.delete_pages(job.content_hash)
+    return {
+        "inserted_count": len(transaction_ids),
+        "message": f"Added {len(transaction_ids)} transactions to database",
+    }
+
+
+job_queue = JobQueue(app, process_statement_job)
 
-    os.remove(file_path)
-    return jsonify(
-        {"message": f"Added {len(transaction_ids)} transactions to database"}
-    ), 200
 
+# Largest page a client may request from /api/get-transactions
+MAX_PAGE_SIZE = 1000
+# Rows fetched from SQLite per round-trip when streaming
+STREAM_BATCH_SIZE = 500
+
+
+def stream_transactions_json(query):
+    """
+    Yield the {"transactions": [...]} document one row at a time.
+    """
+    yield '{"transactions": ['
+    # The rows are read after the view has returned, so route them here too
+    with read_only():
+        rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        for index, row in enumerate(rows):
+            prefix = "," if index else ""
+            yield prefix + json.dumps(transaction_row_to_dict(row))
+    yield "]}"
 
 # Directory to temporarily store uploaded files
 UPLOAD_FOLDER = "./uploads"
@@ -158,6 +394,8 @@ if not os.path.exists(UPLOAD_FOLDER):
 
 
 @app.route("/api/get-transactions", methods=["GET"])
+@read_only()
+@response_cache.cached
 def get_transactions():
     try:
         from_date_str = request.args.get("fromDate")
@@ -169,30 +407,44 @@ def get_transactions():
         if from_date > to_date:
             return jsonify({"error": "fromDate cannot be after toDate."}), 400
 
-        transactions = Transaction.get_transactions_in_date_range(from_date, to_date)
-        result = []
-        for transaction in transactions:
-            account = transaction.account  # Access the account using the relationship
-            result.append(
-                {
-                    "transaction_id": transaction.transaction_id,
-                    "transaction_date": transaction.transaction_date.strftime(
-                        "%Y-%m-%d"
-                    ),
-                    "description": transaction.description,
-                    "category": transaction.category,
-                    "amount": transaction.amount,
-                    "comment": transaction.comment,
-                    "account_name": account.name,
-                    "account_institution": account.institution,
-                    "last_4_digits": account.last_4_digits,
-                    "account_type": account.type,
-                    "account_id": account.account_id,
-                }
+        limit_str = request.args.get("limit")
+        cursor = request.args.get("cursor")
+        if limit_str is None and cursor is None:
+            # Unpaginated: stream the array so memory stays flat for wide ranges
+            query = Transaction.select_with_accounts(from_date, to_date)
+            return Response(
+                stream_with_context(stream_transactions_json(query)),
+                mimetype="application/json",
+            )
+
+        try:
+            limit = int(limit_str or MAX_PAGE_SIZE)
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as ve:
+            return jsonify({"error": f"Invalid pagination parameters. {ve}"}), 400
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            return jsonify(
+                {"error": f"limit must be between 1 and {MAX_PAGE_SIZE}."}
+            ), 400
+
+        # Fetch one extra row to find out whether another page exists
+        query = Transaction.select_with_accounts(
+            from_date, to_date, after=after, limit=limit + 1
+        )
+        rows = db.session.execute(query).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(
+                rows[-1].transaction_date, rows[-1].transaction_id
             )
 
-        # Return the result as JSON
-        return jsonify({"transactions": result})
+        return jsonify(
+            {
+                "transactions": [transaction_row_to_dict(row) for row in rows],
+                "next_cursor": next_cursor,
+            }
+        )
     except ValueError as ve:
         # Handle invalid date format
         return jsonify({"error": f"Invalid date format. {ve}"}), 400
@@ -202,7 +454,115 @@ def get_transactions():
         return jsonify({"error": "An error occurred.", "details": str(e)}), 500
 
 
+@app.route("/api/export-transactions", methods=["GET"])
+def export_transactions():
+    """
+    Download transactions as a CSV, NDJSON or Parquet file.
+
+    Query parameters: format (csv, ndjson or parquet; default csv) and
+    optional fromDate, toDate, account_id and category filters. Rows are
+    streamed from the database in batches as the file is written, so memory
+    stays flat however many there are.
+    """
+    export_format = request.args.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return jsonify(
+            {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}
+        ), 400
+    if export_format == "parquet" and not parquet_available():
+        return jsonify({"error": "Parquet export needs pyarrow installed"}), 400
+
+    try:
+        from_date_str = request.args.get("fromDate")
+        to_date_str = request.args.get("toDate")
+        from_date = datetime.strptime(from_date_str, "%Y-%m-%d").date() if from_date_str else None
+        to_date = datetime.strptime(to_date_str, "%Y-%m-%d").date() if to_date_str else None
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid date format. {ve}"}), 400
+    if from_date and to_date and from_date > to_date:
+        return jsonify({"error": "fromDate cannot be after toDate."}), 400
+    try:
+        account_id = int(request.args["account_id"]) if request.args.get("account_id") else None
+    except ValueError:
+        return jsonify({"error": "account_id must be an integer"}), 400
+
+    query = Transaction.select_with_accounts(
+        from_date,
+        to_date,
+        account_id=account_id,
+        category=request.args.get("category") or None,
+    )
+    writer, mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(writer(query)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=transactions.{extension}"},
+    )
+
+
+@app.route("/api/search-transactions", methods=["GET"])
+@read_only()
+@response_cache.cached
+def search_transactions():
+    """
+    Full-text search over transaction descriptions and comments.
+
+    Query parameters: q (required; every word is matched as a prefix),
+    optional fromDate, toDate, account_id and category filters, and limit
+    and offset for paging through the results, best match first.
+    """
+    try:
+        from_date_str = request.args.get("fromDate")
+        to_date_str = request.args.get("toDate")
+        from_date = datetime.strptime(from_date_str, "%Y-%m-%d").date() if from_date_str else None
+        to_date = datetime.strptime(to_date_str, "%Y-%m-%d").date() if to_date_str else None
+        try:
+            account_id = int(request.args["account_id"]) if request.args.get("account_id") else None
+        except ValueError:
+            return jsonify({"error": "account_id must be an integer"}), 400
+
+        try:
+            limit = int(request.args.get("limit", 50))
+            offset = int(request.args.get("offset", 0))
+        except ValueError as ve:
+            return jsonify({"error": f"Invalid pagination parameters. {ve}"}), 400
+        if not 0 < limit <= MAX_PAGE_SIZE or offset < 0:
+            return jsonify(
+                {"error": f"limit must be between 1 and {MAX_PAGE_SIZE} and offset not negative."}
+            ), 400
+
+        # Fetch one extra row to find out whether another page exists
+        query = Transaction.search(
+            request.args.get("q"),
+            from_date=from_date,
+            to_date=to_date,
+            account_id=account_id,
+            category=request.args.get("category"),
+            limit=limit + 1,
+            offset=offset,
+        )
+        rows = db.session.execute(query).all()
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+
+        return jsonify(
+            {
+                "transactions": [transaction_row_to_dict(row) for row in rows],
+                "next_offset": next_offset,
+            }
+        )
+
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid search. {ve}"}), 400
+    except Exception as e:
+        return jsonify({"error": "An error occurred.", "details": str(e)}), 500
+
+
 @app.route("/api/transactions-by-categories", methods=["GET"])
+@read_only()
+@response_cache.cached
 def get_transactions_by_categories():
     try:
         from_date_str = request.args.get("fromDate")
@@ -214,24 +574,7 @@ def get_transactions_by_categories():
         if from_date > to_date:
             return jsonify({"error": "fromDate cannot be after toDate."}), 400
 
-        # Get all transactions in date range
-        transactions = Transaction.get_transactions_in_date_range(from_date, to_date)
-
-        transaction_categories = {}
-
-        for transaction in transactions:
-            if (
-                transaction.category == "credit card payment"
-                and transaction.account.type != "checking/savings"
-            ):
-                continue
-            amount = transaction.amount
-            if transaction.account.type == "credit/debit":
-                amount = -amount
-            if transaction.category not in transaction_categories:
-                transaction_categories[transaction.category] = amount
-            else:
-                transaction_categories[transaction.category] += amount
+        transaction_categories = MonthlyRollup.get_category_totals(from_date, to_date)
 
         return jsonify({"transactions": transaction_categories})
 
@@ -242,6 +585,8 @@ def get_transactions_by_categories():
 
 
 @app.route("/api/financial-summary", methods=["GET"])
+@read_only()
+@response_cache.cached
 def get_financial_summary():
     try:
         from_date_str = request.args.get("fromDate")
@@ -253,36 +598,7 @@ def get_financial_summary():
         if from_date > to_date:
             return jsonify({"error": "fromDate cannot be after toDate."}), 400
 
-        # Get all transactions in date range
-        transactions = Transaction.get_transactions_in_date_range(from_date, to_date)
-
-        total_income = 0
-        total_expense = 0
-        refunds = 0
-        credit_card_expense = 0
-
-        for transaction in transactions:
-            account = transaction.account
-            amount = transaction.amount
-
-            if account.type.lower() == "checking/savings":
-                if amount > 0:
-                    total_income += amount
-                else:
-                    total_expense += abs(amount)
-            elif account.type.lower() == "credit/debit":
-                if amount > 0:
-                    credit_card_expense += amount
-                elif transaction.category != "credit card payment":
-                    refunds += abs(amount)
-
-        summary = {
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "refunds": refunds,
-            "credit_card_expense": credit_card_expense,
-            "net_position": total_income - total_expense,
-        }
+        summary = MonthlyRollup.get_financial_summary(from_date, to_date)
 
         return jsonify(summary)
 
@@ -293,6 +609,8 @@ def get_financial_summary():
 
 
 @app.route("/api/get-all-accounts", methods=["GET"])
+@read_only()
+@response_cache.cached
 def get_all_accounts():
     accounts = get_all_accounts_from_db()
     return jsonify(accounts), 200
@@ -363,32 +681,174 @@ def update_transaction():
             return jsonify({"error": "Transaction not found"}), 404
 
         # Update the appropriate field
-        if field == "transaction_date":
-            try:
-                transaction.transaction_date = datetime.strptime(
-                    value, "%Y-%m-%d"
-                ).date()
-            except ValueError:
-                return jsonify({"error": "Invalid date format"}), 400
-        elif field == "amount":
-            try:
-                transaction.amount = float(value)
-            except ValueError:
-                return jsonify({"error": "Invalid amount"}), 400
-        elif field == "description":
-            transaction.description = value
-        elif field == "category":
-            transaction.category = value
-        elif field == "comment":
-            transaction.comment = value
-        else:
-            return jsonify({"error": "Invalid field"}), 400
+        try:
+            setattr(transaction, field, parse_transaction_field(field, value))
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        # Remember the correction for this merchant's future statements
+        if field == "category":
+            MerchantCategory.learn(transaction.description, transaction.category)
 
         # Save the changes
         db.session.commit()
 
         return jsonify({"message": "Transaction updated successfully"}), 200
 
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(
+            {"error": "An identical transaction already exists in this account"}
+        ), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/update-transactions", methods=["PUT"])
+def update_transactions():
+    """
+    Edit many transactions in one request and one commit.
+
+    The body holds an "updates" list whose items are either
+    {transaction_id, field, value} or {transaction_id, changes: {field: value}}.
+    Every item is validated with the rules of /api/update-transaction before
+    anything is written; if any item is invalid nothing is changed.
+
+    :return: JSON response with a result per item.
+    """
+    try:
+        data = request.get_json()
+        updates = data.get("updates") if isinstance(data, dict) else None
+        if not isinstance(updates, list) or not updates:
+            return jsonify({"error": "'updates' should be a non-empty list."}), 400
+
+        parsed = []
+        for item in updates:
+            if not isinstance(item, dict):
+                parsed.append((None, None, "Missing required fields"))
+                continue
+            transaction_id = item.get("transaction_id")
+            if "changes" in item:
+                fields = item["changes"]
+            elif "field" in item:
+                fields = {item["field"]: item.get("value")}
+            else:
+                fields = None
+            if not transaction_id or not isinstance(fields, dict) or not fields:
+                parsed.append((transaction_id, None, "Missing required fields"))
+                continue
+            try:
+                transaction_id = parse_transaction_id(transaction_id)
+                changes = {}
+                for field, value in fields.items():
+                    if value is None:
+                        raise ValueError("Missing required fields")
+                    changes[field] = parse_transaction_field(field, value)
+                parsed.append((transaction_id, changes, None))
+            except ValueError as ve:
+                parsed.append((transaction_id, None, str(ve)))
+
+        existing_ids = Transaction.get_existing_ids(
+            [transaction_id for transaction_id, changes, error in parsed if error is None]
+        )
+        errors = []
+        changes_by_id = {}
+        for transaction_id, changes, error in parsed:
+            if error is None and transaction_id not in existing_ids:
+                error = "Transaction not found"
+            if error is None:
+                changes_by_id.setdefault(transaction_id, {}).update(changes)
+            errors.append(error)
+
+        if any(errors):
+            results = [
+                {"transaction_id": transaction_id, "status": "error", "error": error}
+                if error else {"transaction_id": transaction_id, "status": "skipped"}
+                for (transaction_id, changes, _), error in zip(parsed, errors)
+            ]
+            return jsonify({"error": "No transactions were updated", "results": results}), 400
+
+        Transaction.update_transactions(changes_by_id)
+        recategorized = [
+            transaction_id
+            for transaction_id, changes in changes_by_id.items()
+            if "category" in changes
+        ]
+        for transaction_id, description in Transaction.get_descriptions(recategorized):
+            MerchantCategory.learn(description, changes_by_id[transaction_id]["category"])
+        db.session.commit()
+
+        results = [
+            {"transaction_id": transaction_id, "status": "updated"}
+            for transaction_id, changes, error in parsed
+        ]
+        return jsonify(
+            {"message": f"Updated {len(changes_by_id)} transactions", "results": results}
+        ), 200
+
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(
+            {"error": "The changes would make two transactions identical"}
+        ), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/recategorize-merchant", methods=["POST"])
+def recategorize_merchant():
+    """
+    Set the category of a merchant for future statements and for every
+    existing transaction from it.
+
+    The body holds "category" and either "transaction_id" or "description"
+    naming the merchant.
+    """
+    try:
+        data = request.get_json()
+        category = data.get("category")
+        description = data.get("description")
+        if data.get("transaction_id") is not None:
+            transaction = db.session.get(Transaction, data["transaction_id"])
+            if not transaction:
+                return jsonify({"error": "Transaction not found"}), 404
+            description = transaction.description
+        if not category or not description:
+            return jsonify({"error": "Missing required fields"}), 400
+
+        merchant_key = MerchantCategory.learn(description, category)
+        if merchant_key is None:
+            return jsonify({"error": "No merchant name found in the description"}), 400
+
+        # Candidates share the merchant's first word, skipping "&" and the
+        # like that the full-text index does not hold; only those with
+        # exactly its key are this merchant rather than a related one
+        word = next(token for token in merchant_key.split() if any(char.isalnum() for char in token))
+        changes = {
+            transaction_id: {"category": category}
+            for transaction_id, transaction_description, transaction_category
+            in Transaction.get_by_word(word)
+            if transaction_category != category
+            and normalize_merchant(transaction_description) == merchant_key
+        }
+        Transaction.update_transactions(changes)
+        db.session.commit()
+
+        return jsonify(
+            {
+                "message": f"Recategorized {len(changes)} transactions",
+                "merchant_key": merchant_key,
+                "updated_count": len(changes),
+            }
+        ), 200
+
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(
+            {"error": "The changes would make two transactions identical"}
+        ), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -410,7 +870,7 @@ def upload_pdf_by_name():
     if not name or not last_4_digits:
         return jsonify({"error": "Missing name or last_4_digits"}), 400
 
-    account = Account.query.filter_by(name=name, last_4_digits=last_4_digits).first()
+    account = find_account(name=name, last_4_digits=last_4_digits)
     if not account:
         return jsonify({"error": "Account not found"}), 404
 
@@ -420,6 +880,163 @@ def upload_pdf_by_name():
     return process_pdf_upload(account.account_id, file)
 
 
+@app.route("/api/upload-statements", methods=["POST"])
+def upload_pdf_batch():
+    """
+    Upload several statements, or a zip of them, in one request.
+
+    Form fields:
+        files: One or more PDF or zip files
+        accounts: Optional JSON object mapping each PDF's filename to
+            {"account_id": ...} or {"name": ..., "last_4_digits": ...}
+        account_id / name, last_4_digits: Account for files not in `accounts`
+        profile: Optional cprofile or pyinstrument, to profile every job
+        force: Optional 1 to import files that were imported before
+
+    Each PDF is queued as its own job, so statements are extracted
+    concurrently and ingested independently; one bad file does not affect
+    the rest. Returns 202 with a result per file and a batch id for
+    /api/batches/<batch_id>.
+    """
+    files = [file for file in request.files.getlist("files") if file.filename]
+    if not files:
+        return jsonify({"error": "No files provided"}), 400
+    try:
+        mapping = json.loads(request.form.get("accounts") or "{}")
+    except ValueError:
+        return jsonify({"error": "accounts must be a JSON object"}), 400
+    if not isinstance(mapping, dict):
+        return jsonify({"error": "accounts must be a JSON object"}), 400
+    profiler, error = get_requested_profiler()
+    if error:
+        return jsonify({"error": error}), 400
+    default_account = {
+        "account_id": request.form.get("account_id"),
+        "name": request.form.get("name"),
+        "last_4_digits": request.form.get("last_4_digits"),
+    }
+
+    batch_id = uuid.uuid4().hex
+    results = []
+    for filename, stream, error in iter_batch_files(files):
+        result = {"filename": filename}
+        results.append(result)
+        if error:
+            result["error"] = error
+            continue
+        if not filename.lower().endswith(".pdf"):
+            result["error"] = "Only PDF files are allowed"
+            continue
+        spec = mapping.get(filename)
+        if spec is None:
+            spec = default_account
+        elif not isinstance(spec, dict):
+            result["error"] = "accounts entries must be JSON objects"
+            continue
+        try:
+            account = find_account(
+                spec.get("account_id"), spec.get("name"), spec.get("last_4_digits")
+            )
+        except (TypeError, ValueError):
+            account = None
+        if not account:
+            result["error"] = "Account not found"
+            continue
+        timer = StageTimer()
+        try:
+            with timer.stage("save") as details:
+                file_path = save_upload(stream, filename)
+                details["bytes"] = os.path.getsize(file_path)
+        except zipfile.BadZipFile as e:
+            # A corrupt member only shows up once it is read
+            result["error"] = f"Invalid zip file: {str(e)}"
+            continue
+        payload, _ = queue_statement(
+            account.account_id, filename, file_path,
+            batch_id=batch_id, profiler=profiler, timer=timer,
+            force=get_requested_force(),
+        )
+        result.update(payload)
+
+    return jsonify(
+        {
+            "batch_id": batch_id,
+            "status_url": f"/api/batches/{batch_id}",
+            "files": results,
+        }
+    ), 202
+
+
+@app.route("/api/batches/<batch_id>", methods=["GET"])
+@read_only()
+def get_batch(batch_id):
+    jobs = Job.query.filter_by(batch_id=batch_id).order_by(Job.created_at).all()
+    if not jobs:
+        return jsonify({"error": "Batch not found"}), 404
+    states = [job.state for job in jobs]
+    return jsonify(
+        {
+            "batch_id": batch_id,
+            "done": all(state in (Job.SUCCEEDED, Job.FAILED) for state in states),
+            "counts": {state: states.count(state) for state in set(states)},
+            "jobs": [job.to_dict() for job in jobs],
+        }
+    ), 200
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+@read_only()
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    payload = job.to_dict()
+    payload["timings"] = [stage.to_dict() for stage in IngestStage.get_for_job(job_id)]
+    if job.profiler:
+        payload["profile_url"] = f"/api/jobs/{job_id}/profile"
+    return jsonify(payload), 200
+
+
+@app.route("/api/jobs/<job_id>/profile", methods=["GET"])
+@read_only()
+def get_job_profile(job_id):
+    """The cProfile (as text) or pyinstrument (as HTML) capture of a job."""
+    job = db.session.get(Job, job_id)
+    if not job or not job.profiler:
+        return jsonify({"error": "No profile for this job"}), 404
+    path = profile_path(app.config["PROFILE_DIR"], job_id, job.profiler)
+    if not os.path.exists(path):
+        return jsonify({"error": "Profile not ready"}), 404
+    body, mimetype = render_profile(path)
+    return Response(body, mimetype=mimetype)
+
+
+@app.route("/api/ingest-history", methods=["GET"])
+@read_only()
+def get_ingest_history():
+    """
+    Stage timings of recent uploads.
+
+    Query parameters: limit (default 20) recent jobs, each with its total
+    seconds per stage, plus a per-stage summary over all recorded uploads.
+    """
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}."}), 400
+
+    jobs = Job.query.order_by(Job.created_at.desc()).limit(limit).all()
+    totals = IngestStage.get_job_totals([job.job_id for job in jobs])
+    return jsonify(
+        {
+            "jobs": [dict(job.to_dict(), stages=totals[job.job_id]) for job in jobs],
+            "summary": IngestStage.get_summary(),
+        }
+    ), 200
+
+
 @app.route("/api/add-transaction", methods=["POST"])
 def add_transaction():
     try:
@@ -461,6 +1078,11 @@ def add_transaction():
             convert_to_float(data["amount"]),
         )
         return jsonify({"message": "Transaction added successfully!"}), 200
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(
+            {"error": "An identical transaction already exists in this account"}
+        ), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -489,29 +1111,52 @@ def delete_transactions():
                 {"success": False, "message": "'transaction_ids' should be a list."}
             ), 400
 
-        # Track deleted and not found transactions
-        deleted = []
-        not_found = []
-
-        # Attempt to delete each transaction
+        # Converted up front, so a string ID is not reported as not found
+        parsed_ids = []
+        invalid = []
         for transaction_id in transaction_ids:
-            if Transaction.delete_transaction(transaction_id):
-                deleted.append(transaction_id)
-            else:
-                not_found.append(transaction_id)
+            try:
+                parsed_ids.append(parse_transaction_id(transaction_id))
+            except ValueError:
+                invalid.append(transaction_id)
+        if invalid:
+            return jsonify(
+                {
+                    "success": False,
+                    "message": "'transaction_ids' should only contain integers.",
+                    "invalid": invalid,
+                }
+            ), 400
+        transaction_ids = parsed_ids
+
+        # One DELETE per chunk of IDs, all in a single transaction
+        deleted = Transaction.delete_transactions(transaction_ids)
+        not_found = [
+            transaction_id
+            for transaction_id in dict.fromkeys(transaction_ids)
+            if transaction_id not in deleted
+        ]
 
-        if len(deleted) == len(transaction_ids):
+        if not_found:
+            # All or nothing: keep every transaction if any ID was stale
+            db.session.rollback()
             return jsonify(
                 {
-                    "message": f"""Deleted transactions:{len(transaction_ids)} from the database"""
+                    "success": False,
+                    "message": f"{len(not_found)} of the transactions were not found; nothing was deleted.",
+                    "not_found": not_found,
                 }
-            ), 200
+            ), 404
 
+        db.session.commit()
         return jsonify(
-            {"error": f""""Delted {len(deleted)}/{len(transaction_ids)} transactions"""}
-        ), 500
+            {
+                "message": f"""Deleted transactions:{len(deleted)} from the database"""
+            }
+        ), 200
 
     except Exception as e:
+        db.session.rollback()
         return jsonify(
             {"success": False, "message": f"An error occurred: {str(e)}"}
         ), 500
@@ -543,12 +1188,34 @@ def edit_account(account_id):
 def delete_account(account_id):
     try:
         account = Account.query.get_or_404(account_id)
+        # A worker would write the statement back into a deleted account
+        pending = Job.query.filter(
+            Job.account_id == account_id, Job.state.in_([Job.QUEUED, Job.RUNNING])
+        ).count()
+        if pending:
+            return jsonify(
+                {"error": f"{pending} statement uploads for this account are still being processed"}
+            ), 409
+
         # Delete all associated transaction records
         Transaction.query.filter_by(account_id=account_id).delete()
 
         # Delete all associated balance records
         Balance.query.filter_by(account_id=account_id).delete()
 
+        # Delete the account's monthly totals
+        MonthlyRollup.query.filter_by(account_id=account_id).delete()
+
+        # Forget its imported statements, so a new account reusing the id
+        # does not see them as already imported, and its upload jobs
+        jobs = Job.query.filter_by(account_id=account_id).all()
+        job_ids = [job.job_id for job in jobs]
+        content_hashes = {job.content_hash for job in jobs if job.content_hash}
+        IngestStage.query.filter(IngestStage.job_id.in_(job_ids)).delete()
+        PageText.query.filter(PageText.content_hash.in_(content_hashes)).delete()
+        Job.query.filter_by(account_id=account_id).delete()
+        Statement.query.filter_by(account_id=account_id).delete()
+
         db.session.delete(account)
         db.session.commit()
 
@@ -561,36 +1228,15 @@ def delete_account(account_id):
 @app.route("/api/remove-duplicates", methods=["DELETE"])
 def remove_duplicates():
     """
-    Remove duplicate transactions by iterating rows and using a dictionary.
+    Remove duplicate transactions, keeping the oldest row of each key, with a
+    single DELETE inside SQLite.
     """
     try:
-        # Dictionary to store seen keys (e.g., a combination of transaction_date, amount, and description)
-        seen = {}
-
-        # Query all transactions ordered by id
-        transactions = Transaction.query.order_by(Transaction.transaction_id).all()
-
-        duplicates = []
-        for transaction in transactions:
-            # Create a unique key for each transaction
-            key = transaction.key
-
-            if key in seen:
-                # If the key is already seen, mark for deletion
-                duplicates.append(transaction.transaction_id)
-            else:
-                # Otherwise, store it in the dictionary
-                seen[key] = transaction.transaction_id
-
-        # Bulk delete duplicate transactions
-        if duplicates:
-            Transaction.query.filter(Transaction.transaction_id.in_(duplicates)).delete(
-                synchronize_session=False
-            )
-            db.session.commit()
+        removed = Transaction.remove_duplicates()
+        db.session.commit()
 
         return jsonify(
-            {"message": f"Removed {len(duplicates)} duplicate transactions."}
+            {"message": f"Removed {removed} duplicate transactions."}
         ), 200
 
     except Exception as e:
@@ -598,104 +1244,50 @@ def remove_duplicates():
         return jsonify({"error": str(e)}), 500
 
 
-def add_trasactions_to_db(transactions, account_id):
-    transaction_ids = []
-    for transaction in transactions:
-        # Extract fields from the transaction dictionary
-        transaction_date_str = transaction.get("transaction_date")
-        description = transaction.get("description")
-        category = transaction.get("category")
-        amount = transaction.get("amount")
-        comment = transaction.get("comment", None)
-
-        try:
-            transaction_date = datetime.strptime(
-                transaction_date_str, "%Y-%m-%d"
-            ).date()
-            temp_transaction = Transaction(
-                account_id=account_id,
-                transaction_date=transaction_date,
-                description=description,
-                category=category,
-                amount=amount,
-            )
-
-            # Check if a transaction with the same key exists
-            existing_transaction = Transaction.get_transaction_by_key(
-                temp_transaction.key
-            )
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Request latency, SQL and response size metrics for Prometheus."""
+    return Response(
+        request_metrics.render(), mimetype="text/plain; version=0.0.4"
+    )
 
-            # If exisitng transaction avoid insert into db
-            if existing_transaction:
-                print(
-                    f"Duplicate transaction detected, skipping: {temp_transaction.key}"
-                )
-                continue
 
-            new_transaction = Transaction.add_transaction(
-                account_id=account_id,
-                transaction_date=transaction_date,
-                description=description,
-                category=category,
-                amount=amount,
-                comment=comment,
-            )
-            print(f"Added transaction: {new_transaction.transaction_id}")
-            transaction_ids.append(new_transaction.transaction_id)
-        except ValueError as e:
-            print(f"Error parsing date: {e}")
-        except Exception as e:
-            print(f"Failed to add transaction for {transaction}: {e}")
-    return transaction_ids
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups():
+    """Recompute the monthly rollup table from the transactions."""
+    rows = MonthlyRollup.rebuild()
+    db.session.commit()
+    print(f"Rebuilt {rows} monthly rollup rows")
 
 
 def get_all_accounts_from_db():
-    with app.app_context():
-        accounts = Account.query.all()
-        return [account.to_dict() for account in accounts]
+    return [
+        account.to_dict(recent_balance)
+        for account, recent_balance in Account.get_all_with_recent_balance()
+    ]
 
 
 def backup_database():
     """
-    Creates a backup of the SQLite database.
-    The backup is saved with a timestamp in the filename.
+    Creates a compressed backup of the SQLite database, unless nothing has
+    changed since the last one, and prunes backups beyond BACKUP_RETENTION.
     """
     try:
-        # Define potential paths
-        parent_dir = os.getcwd()  # Current working directory
-        possible_paths = [
-            os.path.join(parent_dir, DATABASE_NAME),
-            os.path.join(parent_dir, "instance", DATABASE_NAME),
-        ]
-
-        # Find the first valid database file path
-        src = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                src = path
-                break
-
-        # If no valid source file is found, raise an error
-        if not src:
-            raise FileNotFoundError(
-                "Database file not found in either the parent or 'instance' folder."
-            )
-
-        # Define the backup directory
-        backup_dir = "./backups"
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-
-        # Add a timestamp to the backup file name
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = os.path.join(backup_dir, f"bankBuddy_backup_{timestamp}.bak")
-
-        # Copy the database file to create a backup
-        with open(src, "rb") as db_file:
-            with open(backup_path, "wb") as backup_file:
-                backup_file.write(db_file.read())
-
-        print(f"Backup created successfully at {backup_path}")
+        with app.app_context():
+            src = db.engine.url.database
+        if not src or src == ":memory:" or not os.path.exists(src):
+            raise FileNotFoundError(f"Database file not found: {src}")
+
+        backup_path = create_backup(
+            src,
+            app.config["BACKUP_DIR"],
+            retention=app.config["BACKUP_RETENTION"],
+            pages_per_step=app.config["BACKUP_PAGES_PER_STEP"],
+        )
+        if backup_path:
+            print(f"Backup created successfully at {backup_path}")
+        else:
+            print("Database unchanged since last backup, skipping")
     except Exception as e:
         print(f"Error during backup: {str(e)}")
 
@@ -721,23 +1313,12 @@ def initialize_scheduler():
         scheduler.start()
 
 
-# Create tables
+# Create tables and bring existing databases up to the current schema
 with app.app_context():
-    parent_dir = os.getcwd()  # Current working directory
-    possible_paths = [
-        os.path.join(parent_dir, DATABASE_NAME),
-        os.path.join(parent_dir, "instance", DATABASE_NAME),
-    ]
-
-    # Find the first valid database file path
-    src = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            src = path
-            break
-    if not src:
-        db.create_all()
+    upgrade_schema()
     initialize_scheduler()
+    # Pick up statements that were queued when the server last stopped
+    job_queue.resume_pending()
 
 # Ensure app runs only in Flask's debug mode or as a WSGI app
 if __name__ == "__main__":
@@ -745,5 +1326,7 @@ if __name__ == "__main__":
         app.run(debug=True)
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown()
+        job_queue.shutdown()
+        shutdown_pool()
 # if __name__ == '__main__':
 #     app.run(host='localhost', port=5000, debug=True)
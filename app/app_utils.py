@@ -1,4 +1,7 @@
+import base64
+import hashlib
 import re
+from datetime import datetime
 
 def convert_to_float(amount_str):
     # Remove any characters that are not digits, decimal points, or minus signs
@@ -8,3 +11,82 @@ def convert_to_float(amount_str):
     except ValueError:
         raise ValueError(f"Invalid amount string: {amount_str}")
 
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_cursor(transaction_date, transaction_id):
+    raw = f"{transaction_date.strftime('%Y-%m-%d')}:{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, transaction_id = raw.split(":")
+        return datetime.strptime(date_str, "%Y-%m-%d").date(), int(transaction_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def transaction_row_to_dict(row):
+    return {
+        "transaction_id": row.transaction_id,
+        "transaction_date": row.transaction_date.strftime("%Y-%m-%d"),
+        "description": row.description,
+        "category": row.category,
+        "amount": row.amount,
+        "comment": row.comment,
+        "account_name": row.account_name,
+        "account_institution": row.account_institution,
+        "last_4_digits": row.last_4_digits,
+        "account_type": row.account_type,
+        "account_id": row.account_id,
+    }
+
+
+def parse_transaction_id(value):
+    """
+    Accept a transaction ID sent as a JSON number or a numeric string.
+
+    Raises:
+        ValueError: If the value is not an integer
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError("Invalid transaction_id")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid transaction_id")
+
+
+def parse_transaction_field(field, value):
+    """
+    Validate an edit to one field of a transaction.
+
+    Returns:
+        The value converted to the column's type
+
+    Raises:
+        ValueError: With the message the edit endpoints return to the client
+    """
+    if field == "transaction_date":
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            raise ValueError("Invalid date format")
+    if field == "amount":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid amount")
+    if field in ("description", "category", "comment"):
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"Invalid {field}")
+        return value
+    raise ValueError("Invalid field")
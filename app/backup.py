@@ -0,0 +1,137 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+BACKUP_PREFIX = "bankBuddy_backup_"
+MANIFEST_NAME = "last_backup.json"
+CHUNK_SIZE = 1024 * 1024
+# The startup and daily scheduler jobs can overlap
+_backup_lock = threading.Lock()
+
+
+def _source_state(db_path):
+    """Cheap signature of the database files; it changes on every write."""
+    state = {}
+    for path in (db_path, db_path + "-wal"):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            state[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return state
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(backup_dir):
+    try:
+        with open(os.path.join(backup_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _snapshot(db_path, snapshot_path, pages_per_step):
+    """
+    Copy the database with SQLite's online backup API.
+
+    Pages are copied pages_per_step at a time, releasing the read lock between
+    steps so writers are not blocked; SQLite restarts the copy if another
+    connection writes mid-way, so the snapshot is never torn.
+    """
+    source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    destination = sqlite3.connect(snapshot_path)
+    try:
+        source.backup(destination, pages=pages_per_step, sleep=0.005)
+        result = destination.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            raise RuntimeError(f"Backup failed integrity check: {result}")
+    finally:
+        destination.close()
+        source.close()
+
+
+def _rotate(backup_dir, retention):
+    backups = sorted(glob.glob(os.path.join(backup_dir, BACKUP_PREFIX + "*.db.gz")))
+    for path in backups[:-retention] if retention > 0 else []:
+        os.remove(path)
+
+
+def create_backup(db_path, backup_dir, retention=14, pages_per_step=1024):
+    """
+    Write a compressed, integrity-checked backup of a SQLite database.
+
+    Backups are taken one at a time and named to the microsecond, so two in
+    the same second neither share files nor count as one when rotating.
+
+    Nothing is written when the data has not changed since the last backup:
+    first the database files' size and modification times are compared with
+    the last backup's, then the SHA-256 of the new snapshot.
+
+    Args:
+        db_path (str): Path of the database file
+        backup_dir (str): Folder holding the backups
+        retention (int): Number of backups to keep
+        pages_per_step (int): Database pages copied per backup step
+
+    Returns:
+        str: Path of the new backup
+        None: If the database has not changed since the last backup
+    """
+    with _backup_lock:
+        return _create_backup(db_path, backup_dir, retention, pages_per_step)
+
+
+def _create_backup(db_path, backup_dir, retention, pages_per_step):
+    os.makedirs(backup_dir, exist_ok=True)
+    manifest = _read_manifest(backup_dir)
+    source_state = _source_state(db_path)
+    if manifest.get("source_state") == source_state and os.path.exists(manifest.get("path", "")):
+        return None
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    snapshot_path = os.path.join(backup_dir, f".{BACKUP_PREFIX}{timestamp}.db.tmp")
+    backup_path = os.path.join(backup_dir, f"{BACKUP_PREFIX}{timestamp}.db.gz")
+    try:
+        _snapshot(db_path, snapshot_path, pages_per_step)
+        fingerprint = _file_sha256(snapshot_path)
+        unchanged = fingerprint == manifest.get("fingerprint") and os.path.exists(manifest.get("path", ""))
+        if not unchanged:
+            # Compress to a temporary name first so a crash never leaves a
+            # truncated file that looks like a backup
+            partial_path = backup_path + ".part"
+            with open(snapshot_path, "rb") as snapshot, gzip.open(partial_path, "wb") as backup:
+                shutil.copyfileobj(snapshot, backup, CHUNK_SIZE)
+            os.replace(partial_path, backup_path)
+    finally:
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+
+    manifest = {
+        "path": manifest["path"] if unchanged else backup_path,
+        "fingerprint": fingerprint,
+        "source_state": source_state,
+    }
+    with open(os.path.join(backup_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+    if unchanged:
+        return None
+
+    _rotate(backup_dir, retention)
+    return backup_path
+
+
+def restore_backup(backup_path, db_path):
+    """Decompress a backup to db_path."""
+    with gzip.open(backup_path, "rb") as backup, open(db_path, "wb") as database:
+        shutil.copyfileobj(backup, database, CHUNK_SIZE)
@@ -0,0 +1,149 @@
+import csv
+import importlib.util
+import io
+import json
+
+from app.app_utils import transaction_row_to_dict
+from app.sqlite_profile import read_only
+from models import db
+
+# Rows fetched from SQLite per round-trip; each batch becomes one chunk of output
+EXPORT_BATCH_SIZE = 1000
+# Rows per Parquet row group; only the group being built is held in memory
+PARQUET_ROW_GROUP_SIZE = 50000
+# Same fields, in the same order, as transaction_row_to_dict
+COLUMNS = [
+    "transaction_id",
+    "transaction_date",
+    "description",
+    "category",
+    "amount",
+    "comment",
+    "account_name",
+    "account_institution",
+    "last_4_digits",
+    "account_type",
+    "account_id",
+]
+
+
+def iter_row_batches(query, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield the query's rows in lists of batch_size, read incrementally from a
+    cursor on the read engine so the full result is never in memory.
+    """
+    with read_only():
+        result = db.session.execute(query.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield rows
+
+
+def stream_csv(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for rows in iter_row_batches(query):
+        for row in rows:
+            writer.writerow(transaction_row_to_dict(row).values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # The header, if there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(query):
+    for rows in iter_row_batches(query):
+        yield "".join(json.dumps(transaction_row_to_dict(row)) + "\n" for row in rows)
+
+
+def parquet_available():
+    # pyarrow is an optional dependency, only needed for Parquet exports
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class ChunkSink:
+    """Write-only file that keeps what pyarrow writes until it is drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(query, row_group_size=None):
+    """
+    Write rows as Parquet one row group at a time, yielding the file's bytes
+    as each group is written; the footer follows the last group.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    row_group_size = row_group_size or PARQUET_ROW_GROUP_SIZE
+
+    schema = pa.schema([
+        ("transaction_id", pa.int64()),
+        ("transaction_date", pa.date32()),
+        ("description", pa.string()),
+        ("category", pa.string()),
+        ("amount", pa.float64()),
+        ("comment", pa.string()),
+        ("account_name", pa.string()),
+        ("account_institution", pa.string()),
+        ("last_4_digits", pa.string()),
+        ("account_type", pa.string()),
+        ("account_id", pa.int64()),
+    ])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    columns = {name: [] for name in COLUMNS}
+    pending = 0
+
+    def write_row_group():
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema), row_group_size=row_group_size)
+        for values in columns.values():
+            values.clear()
+
+    try:
+        for rows in iter_row_batches(query):
+            for row in rows:
+                for name, values in columns.items():
+                    values.append(getattr(row, name))
+            pending += len(rows)
+            if pending >= row_group_size:
+                write_row_group()
+                pending = 0
+                yield sink.drain()
+        if pending:
+            write_row_group()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# format -> (writer, mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv", "csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson", "ndjson"),
+    "parquet": (stream_parquet, "application/vnd.apache.parquet", "parquet"),
+}
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.profiling import StageTimer
+from models.extraction_cache import ExtractionCache
+
+EXTRACTION_MODEL = "claude-sonnet-4-5-20250929"
+# Bump whenever EXTRACTION_PROMPT changes so cached extractions are not reused
+EXTRACTION_PROMPT_VERSION = 1
+EXTRACTION_PROMPT = """RESPOND WITH VALID JSON ONLY - NO OTHER TEXT
+
+    Extract transactions from this credit card statement as JSON:
+
+    {{
+        "statement_date": "YYYY-MM-DD or null",
+        "account_balance": "numeric value or null",
+        "transactions": [
+            {{
+                "transaction_date": "YYYY-MM-DD", 
+                "description": "string",
+                "amount": -123.45,  
+                "category": "string from allowed list"
+            }}
+        ]
+    }}
+
+    IMPORTANT: 
+    - amount must be a NUMBER (not string)
+    - Use negative numbers for debits/charges
+    - Use positive numbers for credits/payments
+    - Do not include currency symbols or commas
+
+    Allowed categories: paycheck, other income, transfer, credit card payment, home, utilities, rent, auto, gas, parking, travel, restaurant, groceries, medical, amazon, walmart, shopping, subscriptions, donations, insurance, investments, other expenses
+
+    Statement text:
+    {text}"""
+
+
+def extraction_cache_key(text):
+    """Hash of everything that determines an extraction result."""
+    digest = hashlib.sha256()
+    for part in (str(EXTRACTION_PROMPT_VERSION), EXTRACTION_MODEL, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English statement text
+    return len(text) // 4 + 1
+
+
+def chunk_pages(pages, chunk_tokens):
+    """
+    Group consecutive pages into chunks of at most chunk_tokens estimated tokens.
+
+    A page larger than the budget on its own becomes a chunk by itself.
+
+    Args:
+        pages (list): Redacted text of each page
+        chunk_tokens (int): Token budget per chunk
+
+    Returns:
+        list: Chunk texts, in page order
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for page in pages:
+        page_tokens = estimate_tokens(page)
+        if current and current_tokens + page_tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(page)
+        current_tokens += page_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def parse_response(response):
+    """
+    Parse the JSON document in an LLM reply.
+
+    Returns:
+        dict: Extraction result with statement_date, account_balance and transactions
+    """
+    # Clean the response - remove markdown code blocks if present
+    response = response.strip()
+
+    # Remove opening code fence
+    if response.startswith("```json"):
+        response = response[7:]  # Remove ```json
+    elif response.startswith("```"):
+        response = response[3:]  # Remove ```
+
+    # Remove closing code fence
+    if response.endswith("```"):
+        response = response[:-3]  # Remove trailing ```
+
+    # Strip again after removing fences
+    response = response.strip()
+
+    # Parse JSON response
+    data = json.loads(response)
+
+    # Basic validation
+    if not isinstance(data["transactions"], list):
+        raise ValueError("Response is not a JSON array")
+
+    return data
+
+
+def request_extraction(client, text, max_tokens):
+    """
+    Send one chunk of statement text to Claude and parse the reply.
+
+    Returns:
+        tuple: (extraction result, dict of prompt_build, llm and json_parse
+            seconds and the request's input and output token counts)
+    """
+    started = time.perf_counter()
+    prompt = EXTRACTION_PROMPT.format(text=text)
+    prompted = time.perf_counter()
+    message = client.messages.create(
+        model=EXTRACTION_MODEL,
+        max_tokens=max_tokens,
+        # system="You are a JSON API. You only respond with valid JSON objects. Never include explanatory text, markdown formatting, or anything other than pure JSON.",
+        messages=[{"role": "user", "content": prompt}],
+    )
+    answered = time.perf_counter()
+    data = parse_response(message.content[0].text)
+    usage = getattr(message, "usage", None)
+    return data, {
+        "prompt_build": prompted - started,
+        "llm": answered - prompted,
+        "json_parse": time.perf_counter() - answered,
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "output_tokens": getattr(usage, "output_tokens", None),
+    }
+
+
+def _transaction_identity(transaction):
+    return (
+        transaction.get("transaction_date"),
+        transaction.get("description"),
+        transaction.get("amount"),
+    )
+
+
+def _boundary_overlap(previous, current):
+    """Length of the longest run ending previous that also starts current."""
+    previous_ids = [_transaction_identity(t) for t in previous]
+    current_ids = [_transaction_identity(t) for t in current]
+    for size in range(min(len(previous_ids), len(current_ids)), 0, -1):
+        if previous_ids[-size:] == current_ids[:size]:
+            return size
+    return 0
+
+
+def merge_chunk_results(results):
+    """
+    Combine per-chunk extraction results into one statement.
+
+    A transaction that straddles a page break can be reported by both
+    neighbouring chunks, so a run of transactions ending one chunk that is
+    repeated at the start of the next is only kept once. The statement date
+    and balance come from the first chunk that reports them.
+
+    Args:
+        results (list): Extraction results, in chunk order
+
+    Returns:
+        dict: Extraction result for the whole statement
+    """
+    merged = {"statement_date": None, "account_balance": None, "transactions": []}
+    previous = []
+    for data in results:
+        for field in ("statement_date", "account_balance"):
+            if merged[field] is None and data.get(field) is not None:
+                merged[field] = data[field]
+        transactions = data["transactions"]
+        merged["transactions"].extend(transactions[_boundary_overlap(previous, transactions):])
+        previous = transactions
+    return merged
+
+
+def extract_statement_data(client, pages, chunk_tokens, max_tokens, concurrency, cache_max_bytes, timer=None):
+    """
+    Extract a statement's transactions with one LLM request per chunk of pages.
+
+    Cached chunk results are reused; the remaining chunks are requested
+    concurrently, at most `concurrency` at a time, and cached as they succeed.
+    Cache access stays on the calling thread, which holds the app context.
+
+    Args:
+        client: Anthropic client (or anything with the same messages.create)
+        pages (list): Redacted text of each page
+        chunk_tokens (int): Token budget of statement text per request
+        max_tokens (int): Output token limit per request
+        concurrency (int): Maximum requests in flight
+        cache_max_bytes (int): Size bound of the extraction cache
+        timer (StageTimer): Records chunking, cache lookups and each
+            request's prompt build, LLM latency, token counts and JSON parse
+
+    Returns:
+        dict: Extraction result with statement_date, account_balance and transactions
+    """
+    timer = timer or StageTimer()
+    with timer.stage("chunking") as details:
+        chunks = chunk_pages(pages, chunk_tokens)
+        keys = [extraction_cache_key(chunk) for chunk in chunks]
+        details["chunks"] = len(chunks)
+    with timer.stage("extraction_cache_lookup") as details:
+        results = [ExtractionCache.get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        details["hits"] = len(chunks) - len(missing)
+
+    if missing:
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(missing)))) as executor:
+            futures = {
+                index: executor.submit(request_extraction, client, chunks[index], max_tokens)
+                for index in missing
+            }
+            for index, future in futures.items():
+                try:
+                    results[index], stats = future.result()
+                    chunk = index + 1
+                    timer.add("prompt_build", stats["prompt_build"], chunk=chunk)
+                    timer.add(
+                        "llm", stats["llm"], chunk=chunk,
+                        input_tokens=stats["input_tokens"], output_tokens=stats["output_tokens"],
+                    )
+                    timer.add("json_parse", stats["json_parse"], chunk=chunk)
+                    ExtractionCache.put(keys[index], results[index], cache_max_bytes)
+                except Exception as e:
+                    errors.append(f"chunk {index + 1}/{len(chunks)}: {str(e)}")
+        if errors:
+            raise Exception(f"Error processing with Claude: {'; '.join(errors)}")
+
+    with timer.stage("merge"):
+        return merge_chunk_results(results)
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from models.data_version import DataVersion
+
+
+class ResponseCache:
+    """
+    Conditional GET support for read endpoints.
+
+    Each response gets an ETag derived from the data version and the request's
+    path and query string. A matching If-None-Match is answered with 304, and
+    the last max_entries response bodies are kept so repeated identical reads
+    skip both the database and JSON encoding. Every write bumps the data
+    version, which changes every ETag, so nothing needs explicit invalidation.
+    """
+
+    def __init__(self, max_entries=32, max_body_bytes=1024 * 1024):
+        """
+        Args:
+            max_entries (int): Response bodies kept in memory; 0 disables the
+                cache but keeps ETags
+            max_body_bytes (int): Larger bodies are not cached
+        """
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_etag(version):
+        args = sorted(request.args.items(multi=True))
+        key = f"{version}|{request.path}|{args}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+    def get(self, etag):
+        with self.lock:
+            entry = self.entries.get(etag)
+            if entry is not None:
+                self.entries.move_to_end(etag)
+            return entry
+
+    def put(self, version, etag, body, mimetype):
+        if self.max_entries <= 0 or len(body) > self.max_body_bytes:
+            return
+        with self.lock:
+            # Bodies of older versions can never be served again
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            self.entries[etag] = (body, mimetype)
+            self.entries.move_to_end(etag)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.version = None
+
+    def cached(self, view):
+        """Decorator adding ETags, 304s and body caching to a GET view."""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Read the version before the data, so a write racing with this
+            # request can only make the body newer than its ETag, never older
+            version = DataVersion.get()
+            etag = self.make_etag(version)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                entry = self.get(etag)
+                if entry is not None:
+                    body, mimetype = entry
+                    response = Response(body, mimetype=mimetype)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if not response.is_streamed:
+                        self.put(version, etag, response.get_data(), response.mimetype)
+
+            response.set_etag(etag)
+            # Browsers keep the body but revalidate it on every request
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from app.app_utils import convert_to_float
+from app.profiling import StageTimer
+from models import db
+from models.account import Account
+from models.balance import Balance
+from models.merchant_category import MerchantCategory, MerchantMatcher
+from models.statement import Statement
+from models.transaction import Transaction
+
+
+def parse_transactions(transactions, account_id):
+    """
+    Convert extracted transaction dicts into rows ready for insertion.
+
+    Rows with a missing description or an unparseable date or amount are skipped.
+
+    Args:
+        transactions (list): Transaction dictionaries from the PDF extraction
+        account_id (int): Account the statement belongs to
+
+    Returns:
+        list: Row dictionaries keyed by Transaction column name
+    """
+    rows = []
+    for transaction in transactions:
+        try:
+            amount = transaction.get("amount")
+            if not isinstance(amount, (int, float)):
+                amount = convert_to_float(amount)
+            description = transaction.get("description")
+            if description is None:
+                raise ValueError("Missing description")
+            rows.append(
+                {
+                    "account_id": account_id,
+                    "transaction_date": datetime.strptime(
+                        transaction.get("transaction_date"), "%Y-%m-%d"
+                    ).date(),
+                    "description": description,
+                    "category": transaction.get("category"),
+                    "amount": float(amount),
+                    "comment": transaction.get("comment", None),
+                }
+            )
+        except (TypeError, ValueError) as e:
+            print(f"Failed to parse transaction {transaction}: {e}")
+    return rows
+
+
+def ingest_statement(account_id, data, content_hash=None, timer=None):
+    """
+    Add a statement's transactions and closing balance in a single transaction.
+
+    The rows go in with one executemany, in which the unique dedup_key index
+    skips rows already in the database or repeated within the statement, and
+    the balance row and account's last_statement_date are written in the same
+    commit. If anything fails, nothing from the statement is kept.
+
+    Categories are first corrected from remembered merchants (see
+    MerchantMatcher.apply), and merchants seen for the first time are
+    remembered with their category.
+
+    Args:
+        account_id (int): Account the statement belongs to
+        data (dict): Extraction result with transactions, account_balance
+            and statement_date
+        content_hash (str): Optional hash of the statement file, recorded so
+            the same file is not imported into the account twice
+        timer (StageTimer): Records parsing, merchant matching, the insert
+            (whose dedup_key conflicts are the per-row dedup lookups) and commit
+
+    Returns:
+        list: IDs of the inserted transactions
+    """
+    timer = timer or StageTimer()
+    with timer.stage("parse_rows") as details:
+        rows = parse_transactions(data["transactions"], account_id)
+        details["rows"] = len(rows)
+    with timer.stage("merchant_match") as details:
+        # Categories the user has corrected before win over extracted ones
+        remembered = MerchantMatcher.load().apply(rows)
+        details["matched"] = remembered
+    balance = data["account_balance"] if data["account_balance"] is not None else 0.0
+
+    try:
+        with timer.stage("insert") as details:
+            transaction_ids = Transaction.bulk_add_transactions(rows)
+            details.update(inserted=len(transaction_ids), duplicates=len(rows) - len(transaction_ids))
+        with timer.stage("statement_records"):
+            MerchantCategory.learn_from_history(
+                (row["description"], row["category"]) for row in rows
+            )
+            Balance.add_balance(account_id, balance, data["statement_date"], commit=False)
+            Account.update_last_statement_date(account_id, commit=False)
+            if content_hash:
+                Statement.add_statement(
+                    account_id, data["statement_date"], content_hash, commit=False
+                )
+        with timer.stage("commit"):
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    print(
+        f"Added {len(transaction_ids)} transactions to account {account_id}, "
+        f"skipped {len(rows) - len(transaction_ids)} duplicates, "
+        f"took {remembered} categories from remembered merchants"
+    )
+    return transaction_ids
@@ -0,0 +1,68 @@
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from models import db
+from models.job import Job
+
+
+class JobQueue:
+    """
+    Runs statement jobs on a bounded pool of worker threads.
+
+    Jobs live in the jobs table, so anything queued or interrupted when the
+    server stopped is picked up again by resume_pending(). With JOB_WORKERS set
+    to 0, jobs run synchronously inside the request that submitted them.
+    """
+
+    def __init__(self, app, handler):
+        """
+        Args:
+            app (Flask): Application whose context the workers run in
+            handler (callable): Called with a Job; returns a result dict with
+                an "inserted_count" key, or raises on failure
+        """
+        self.app = app
+        self.handler = handler
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.app.config["JOB_WORKERS"],
+                thread_name_prefix="bankbuddy-job",
+            )
+        return self.executor
+
+    def submit(self, job_id):
+        if self.app.config["JOB_WORKERS"] <= 0:
+            self.run(job_id)
+        else:
+            self._get_executor().submit(self.run, job_id)
+
+    def run(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(Job, job_id)
+            if job is None or job.state not in (Job.QUEUED, Job.RUNNING):
+                return
+            job.mark_running()
+            try:
+                job.mark_succeeded(self.handler(job))
+            except Exception as e:
+                db.session.rollback()
+                traceback.print_exc()
+                job.mark_failed(str(e))
+            finally:
+                if os.path.exists(job.file_path):
+                    os.remove(job.file_path)
+
+    def resume_pending(self):
+        """Resubmit jobs left queued or running by a previous process."""
+        pending = [job.job_id for job in Job.get_pending()]
+        for job_id in pending:
+            self.submit(job_id)
+        return len(pending)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
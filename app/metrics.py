@@ -0,0 +1,245 @@
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Upper bounds of the histogram buckets; +Inf is added when rendering
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)
+# Statements kept per request for the slow-request log
+MAX_RECORDED_STATEMENTS = 100
+# Slowest statements whose query plan is logged for a slow request
+EXPLAINED_STATEMENTS = 5
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # labels -> [per-bucket counts, sum, count]
+        self.values = {}
+
+    def observe(self, labels, value):
+        entry = self.values.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][index] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class RequestStats:
+    """What one request spent, filled in by the engine events."""
+
+    def __init__(self, method, route):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.status = 500
+        self.size = None
+        self.streamed = False
+        self.finished = False
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        # (seconds, engine, statement, parameters) of the first statements
+        self.statements = []
+
+
+class RequestMetrics:
+    """
+    Per-route request latency, SQL statement counts and time, and response
+    sizes, rendered in the Prometheus text format for /metrics.
+
+    Every response also gets a Server-Timing header with the time spent so
+    far and in SQL, so the browser's network panel shows which call is slow
+    and why. Requests slower than slow_request_ms are printed together with
+    the query plans of their slowest SELECTs.
+
+    Streamed responses are recorded when their body is exhausted, so their
+    latency and size include the streaming; their Server-Timing header is
+    sent before the body and only covers the view itself.
+    """
+
+    def __init__(self, slow_request_ms=None):
+        """
+        Args:
+            slow_request_ms (float): Log requests taking at least this long;
+                None or 0 turns the log off
+        """
+        self.slow_request_ms = slow_request_ms
+        self.lock = threading.Lock()
+        labels = ("method", "route")
+        self.requests = Counter(
+            "bankbuddy_http_requests_total", "Requests handled.", labels + ("status",))
+        self.duration = Histogram(
+            "bankbuddy_http_request_duration_seconds", "Request latency.", labels, DURATION_BUCKETS)
+        self.sql_statements = Histogram(
+            "bankbuddy_http_request_sql_statements", "SQL statements run per request.", labels, STATEMENT_BUCKETS)
+        self.sql_duration = Histogram(
+            "bankbuddy_http_request_sql_duration_seconds", "Time spent in SQL per request.", labels, DURATION_BUCKETS)
+        self.response_size = Histogram(
+            "bankbuddy_http_response_size_bytes", "Response body size.", labels, SIZE_BUCKETS)
+
+    def init_app(self, app):
+        app.before_request(self.start_request)
+        app.after_request(self.add_server_timing)
+        app.teardown_request(self.end_request)
+
+    def instrument_engine(self, engine):
+        """Count and time the statements the engine runs during a request."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+            context._metrics_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+            stats = g.get("request_stats") if has_request_context() else None
+            if stats is None or stats.finished:
+                return
+            seconds = time.perf_counter() - context._metrics_started
+            stats.sql_count += 1
+            stats.sql_seconds += seconds
+            if len(stats.statements) < MAX_RECORDED_STATEMENTS and not executemany:
+                stats.statements.append((seconds, engine, statement, parameters))
+
+    def start_request(self):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        g.request_stats = RequestStats(request.method, route)
+
+    def add_server_timing(self, response):
+        stats = g.get("request_stats")
+        if stats is None:
+            return response
+        stats.status = response.status_code
+        elapsed_ms = (time.perf_counter() - stats.started) * 1000
+        response.headers["Server-Timing"] = (
+            f"app;dur={elapsed_ms:.1f}, "
+            f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries"'
+        )
+        response.headers["Timing-Allow-Origin"] = "*"
+        if response.is_streamed:
+            stats.streamed = True
+            response.response = self.count_bytes(response.response, stats)
+        else:
+            stats.size = response.content_length or 0
+        return response
+
+    def count_bytes(self, body, stats):
+        """Pass a streamed body through, recording the request once it ends."""
+        size = 0
+        try:
+            for chunk in body:
+                size += len(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                yield chunk
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+            stats.size = size
+            self.finish(stats)
+
+    def end_request(self, exception=None):
+        stats = g.get("request_stats")
+        if stats is not None and not stats.streamed:
+            self.finish(stats)
+
+    def finish(self, stats):
+        if stats.finished:
+            return
+        stats.finished = True
+        seconds = time.perf_counter() - stats.started
+        labels = (stats.method, stats.route)
+        with self.lock:
+            self.requests.inc(labels + (str(stats.status),))
+            self.duration.observe(labels, seconds)
+            self.sql_statements.observe(labels, stats.sql_count)
+            self.sql_duration.observe(labels, stats.sql_seconds)
+            if stats.size is not None:
+                self.response_size.observe(labels, stats.size)
+        if self.slow_request_ms and seconds * 1000 >= self.slow_request_ms:
+            self.log_slow_request(stats, seconds)
+
+    def log_slow_request(self, stats, seconds):
+        print(
+            f"Slow request {stats.method} {stats.route} ({stats.status}): "
+            f"{seconds * 1000:.0f} ms, {stats.sql_count} SQL statements in "
+            f"{stats.sql_seconds * 1000:.0f} ms"
+        )
+        selects = [
+            entry for entry in stats.statements
+            if entry[2].lstrip().upper().startswith(("SELECT", "WITH"))
+        ]
+        for statement_seconds, engine, statement, parameters in sorted(
+            selects, key=lambda entry: entry[0], reverse=True
+        )[:EXPLAINED_STATEMENTS]:
+            print(f"  {statement_seconds * 1000:.1f} ms: {' '.join(statement.split())}")
+            try:
+                with engine.connect() as connection:
+                    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            except Exception as e:
+                print(f"    (no query plan: {e})")
+                continue
+            for row in plan:
+                print(f"    {row[-1]}")
+
+    def render(self):
+        """
+        Returns:
+            str: Every metric in the Prometheus text exposition format
+        """
+        lines = []
+        with self.lock:
+            for metric in (self.requests, self.duration, self.sql_statements, self.sql_duration, self.response_size):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
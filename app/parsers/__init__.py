@@ -0,0 +1,85 @@
+"""
+Local statement parsers for institutions with stable layouts.
+
+A parser is picked by the account's institution, or failing that by a
+fingerprint of the first page, and turns the PDF into the same
+{statement_date, account_balance, transactions} dict as the LLM extraction
+without any network call. parse_statement returns None whenever no parser
+matches or the parser's confidence check fails, so the caller can fall back
+to the LLM.
+
+Statements carry no categories, so parsed rows only get a generic "other
+expenses"/"other income" placeholder unless their merchant is remembered.
+A result left mostly with placeholders can be sent to the LLM instead (see
+require_categories); without an API key it is kept as it is.
+"""
+import pdfplumber
+
+from app.privacy_filter import PrivacyFilter
+from models.merchant_category import GENERIC_CATEGORIES
+
+PARSERS = []
+
+
+def register_parser(cls):
+    """Class decorator adding a StatementParser subclass to the registry."""
+    PARSERS.append(cls())
+    return cls
+
+
+def find_parser(institution, first_page_text):
+    for parser in PARSERS:
+        if parser.matches_institution(institution):
+            return parser
+    for parser in PARSERS:
+        if parser.matches_first_page(first_page_text):
+            return parser
+    return None
+
+
+def parse_statement(pdf_path, institution=None, matcher=None, require_categories=False):
+    """
+    Parse a statement with a registered local parser.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        institution (str): Institution of the account the statement belongs to
+        matcher (MerchantMatcher): Remembered merchant categories to apply
+        require_categories (bool): Also reject results in which fewer than
+            the parser's min_categorized share of rows have a specific category
+
+    Returns:
+        dict: Extraction result, with the parser's name under "parser" and
+            the redaction's matches per pattern name under "redaction_hits"
+        None: If no parser matches or its result is not trusted
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        if not pdf.pages:
+            return None
+        parser = find_parser(institution, pdf.pages[0].extract_text())
+        if parser is None:
+            return None
+        data, coverage = parser.parse(pdf)
+
+    if not parser.is_confident(data, coverage):
+        print(f"Parser {parser.name} not confident (coverage {coverage:.0%}), falling back to LLM")
+        return None
+    # Descriptions are masked the same way as text sent to the LLM
+    privacy_filter = PrivacyFilter()
+    for transaction in data["transactions"]:
+        transaction["description"] = privacy_filter.hash_sensitive_data(transaction["description"])
+    if matcher is not None:
+        matcher.apply(data["transactions"])
+    categorized = sum(
+        transaction["category"] not in GENERIC_CATEGORIES for transaction in data["transactions"]
+    ) / len(data["transactions"])
+    if require_categories and categorized < parser.min_categorized:
+        print(f"Parser {parser.name} left {1 - categorized:.0%} of rows uncategorized, falling back to LLM")
+        return None
+    data["parser"] = parser.name
+    data["redaction_hits"] = dict(privacy_filter.hits)
+    return data
+
+
+# Imported last so the parsers can register themselves
+from app.parsers import bank_of_america, chase  # noqa: E402,F401
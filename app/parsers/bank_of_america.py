@@ -0,0 +1,19 @@
+import re
+
+from app.parsers import register_parser
+from app.parsers.base import LineStatementParser
+
+
+@register_parser
+class BankOfAmericaCheckingParser(LineStatementParser):
+    """Bank of America checking/savings statements."""
+
+    name = "bank_of_america_checking"
+    institutions = ("bank of america",)
+    fingerprints = (r"Bank of America", r"Deposits and other additions")
+    date_pattern = re.compile(r"\d{2}/\d{2}/\d{2}")
+    statement_date_pattern = re.compile(r"Ending balance on (?P<date>[A-Z][a-z]+ \d{1,2}, \d{4})")
+    statement_date_format = "%B %d, %Y"
+    balance_pattern = re.compile(
+        r"Ending balance on [A-Z][a-z]+ \d{1,2}, \d{4}\s+(?P<amount>-?\$?-?[\d,]+\.\d{2})"
+    )
@@ -0,0 +1,160 @@
+import re
+from datetime import datetime
+
+from app.app_utils import convert_to_float
+
+
+class StatementParser:
+    """
+    Base class for parsers that read a known statement layout locally.
+
+    Subclasses declare which accounts they handle, through `institutions`
+    (matched against Account.institution) and `fingerprints` (regexes that must
+    all match the first page's text), and implement `parse`.
+    """
+
+    name = None
+    # Lowercase substrings of Account.institution this parser handles
+    institutions = ()
+    # Regexes that must all be found on the first page
+    fingerprints = ()
+    # Share of transaction-looking lines that must parse for a result to be trusted
+    min_coverage = 0.95
+    # Card statements print charges as positive amounts
+    charges_positive = False
+    # Share of transactions that must end up with a specific category, after
+    # remembered merchants are applied, for a result to skip the LLM when one
+    # is available to categorize instead
+    min_categorized = 0.5
+
+    def matches_institution(self, institution):
+        institution = (institution or "").lower()
+        return any(name in institution for name in self.institutions)
+
+    def matches_first_page(self, text):
+        return bool(self.fingerprints) and all(
+            re.search(pattern, text or "") for pattern in self.fingerprints
+        )
+
+    def parse(self, pdf):
+        """
+        Read a statement.
+
+        Args:
+            pdf (pdfplumber.PDF): The opened statement
+
+        Returns:
+            tuple: (data, coverage) where data has statement_date,
+                account_balance and transactions like the LLM extraction,
+                and coverage is the share of candidate lines parsed
+        """
+        raise NotImplementedError
+
+    def is_confident(self, data, coverage):
+        """Whether a parse result is complete enough to skip the LLM."""
+        if not data["transactions"] or data["statement_date"] is None:
+            return False
+        return coverage >= self.min_coverage
+
+    def categorize(self, description, amount):
+        """
+        Placeholder category until the transaction is recategorized. Layouts
+        carry no category, so apart from card payments every row gets a
+        generic one; remembered merchants (MerchantMatcher) replace it.
+        """
+        if self.charges_positive and "PAYMENT" in description.upper():
+            return "credit card payment"
+        is_charge = amount > 0 if self.charges_positive else amount < 0
+        return "other expenses" if is_charge else "other income"
+
+
+class LineStatementParser(StatementParser):
+    """
+    Parser for statements that list one transaction per row, such as
+    "01/05 MERCHANT NAME 12.34".
+
+    Rows are rebuilt from pdfplumber's word positions rather than from
+    extract_text() or extract_tables(): these layouts have no ruling lines
+    for the table finder to anchor on, and an amount column printed apart
+    from its row's text still lands on the row it is level with. A row is
+    a transaction if its first word is a date and its rightmost word an
+    amount; everything between is the description.
+    """
+
+    # First words that start a transaction row
+    date_pattern = re.compile(r"\d{2}/\d{2}(?:/\d{2,4})?")
+    amount_pattern = re.compile(r"-?\$?-?[\d,]+\.\d{2}")
+    # Words whose tops are this many points apart or less are on one row
+    row_tolerance = 3
+    statement_date_pattern = None
+    statement_date_format = "%m/%d/%y"
+    balance_pattern = None
+
+    def _transaction_date(self, date_str, statement_date):
+        parts = date_str.split("/")
+        if len(parts) == 3:
+            year_format = "%Y" if len(parts[2]) == 4 else "%y"
+            return datetime.strptime(date_str, f"%m/%d/{year_format}").date()
+        # No year printed: take the statement's year, or the one before for
+        # December transactions on a January statement
+        month, day = int(parts[0]), int(parts[1])
+        year = statement_date.year if month <= statement_date.month else statement_date.year - 1
+        return datetime(year, month, day).date()
+
+    def rows(self, page):
+        """
+        Returns:
+            list: The page's rows, top to bottom, each a list of words
+                ordered left to right
+        """
+        rows = []
+        top = None
+        for word in sorted(page.extract_words(), key=lambda word: (word["top"], word["x0"])):
+            if top is None or word["top"] - top > self.row_tolerance:
+                rows.append([])
+                top = word["top"]
+            rows[-1].append(word["text"])
+        return rows
+
+    def parse(self, pdf):
+        rows = [row for page in pdf.pages for row in self.rows(page)]
+        text = "\n".join(" ".join(row) for row in rows)
+
+        statement_date = None
+        match = self.statement_date_pattern and self.statement_date_pattern.search(text)
+        if match:
+            statement_date = datetime.strptime(match.group("date"), self.statement_date_format).date()
+
+        balance = None
+        match = self.balance_pattern and self.balance_pattern.search(text)
+        if match:
+            balance = convert_to_float(match.group("amount"))
+
+        transactions = []
+        candidates = 0
+        for row in rows:
+            if not self.date_pattern.fullmatch(row[0]):
+                continue
+            candidates += 1
+            if len(row) < 3 or not self.amount_pattern.fullmatch(row[-1]) or statement_date is None:
+                continue
+            try:
+                transaction_date = self._transaction_date(row[0], statement_date)
+            except ValueError:
+                continue
+            amount = convert_to_float(row[-1])
+            description = " ".join(row[1:-1])
+            transactions.append({
+                "transaction_date": transaction_date.strftime("%Y-%m-%d"),
+                "description": description,
+                "amount": amount,
+                "category": self.categorize(description, amount),
+            })
+
+        data = {
+            "statement_date": statement_date.strftime("%Y-%m-%d") if statement_date else None,
+            "account_balance": balance,
+            "transactions": transactions,
+        }
+        coverage = len(transactions) / candidates if candidates else 0.0
+        return data, coverage
@@ -0,0 +1,20 @@
+import re
+
+from app.parsers import register_parser
+from app.parsers.base import LineStatementParser
+
+
+@register_parser
+class ChaseCreditCardParser(LineStatementParser):
+    """Chase credit card statements ("ACCOUNT ACTIVITY" section)."""
+
+    name = "chase_credit_card"
+    # Chase checking statements use a different layout, so only the
+    # fingerprint selects this parser
+    institutions = ()
+    fingerprints = (r"ACCOUNT ACTIVITY", r"Opening/Closing Date")
+    charges_positive = True
+    statement_date_pattern = re.compile(
+        r"Opening/Closing Date\s+\d{2}/\d{2}/\d{2}\s*-\s*(?P<date>\d{2}/\d{2}/\d{2})"
+    )
+    balance_pattern = re.compile(r"New Balance\s+(?P<amount>-?\$?-?[\d,]+\.\d{2})")
@@ -0,0 +1,126 @@
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfplumber
+
+from app.pdf_worker import extract_page_batch
+from app.privacy_filter import PrivacyFilter
+from app.profiling import StageTimer
+from models.page_text import PageText
+
+
+# One pool for the life of the process, created on first use
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_process_context():
+    # Forking a process that already runs job, scheduler and LLM threads can
+    # deadlock on locks held at fork time. Workers are forked from a clean
+    # forkserver that has only imported app.pdf_worker instead, or spawned
+    # where forkserver is unavailable
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["app.pdf_worker"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_get_process_context())
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _extract_pages(pdf_path, page_numbers, workers):
+    if workers <= 1 or len(page_numbers) <= 1:
+        return extract_page_batch(pdf_path, page_numbers)
+
+    # Contiguous batches so each worker opens the file once
+    batch_size = math.ceil(len(page_numbers) / workers)
+    batches = [
+        page_numbers[start:start + batch_size]
+        for start in range(0, len(page_numbers), batch_size)
+    ]
+    pool = _get_pool(workers)
+    results = []
+    try:
+        for batch_results in pool.map(extract_page_batch, [pdf_path] * len(batches), batches):
+            results.extend(batch_results)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next statement
+        _discard_pool(pool)
+        raise
+    return results
+
+
+def extract_pdf_pages(pdf_path, content_hash, workers=1, timer=None):
+    """
+    Extract the redacted text of every page of a PDF, in page order.
+
+    Pages are fanned out over a long-lived pool of worker processes. Each
+    page that is extracted successfully is cached under the file's content
+    hash, so retrying a statement only re-parses the pages that failed.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        content_hash (str): SHA-256 of the file, used as the cache key
+        workers (int): Number of worker processes
+        timer (StageTimer): Records pdfplumber extraction and redaction time
+            of each page parsed, with the redaction's hits per pattern
+
+    Returns:
+        list: Redacted text of each page
+    """
+    timer = timer or StageTimer()
+    with timer.stage("pdf_open") as details:
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+        details["pages"] = page_count
+
+    with timer.stage("page_cache_lookup") as details:
+        pages = PageText.get_pages(content_hash, PrivacyFilter.VERSION)
+        details["hits"] = len(pages)
+    missing = [number for number in range(page_count) if number not in pages]
+    if missing:
+        extracted = {}
+        errors = []
+        for page_number, text, error, extract_seconds, redact_seconds, hits in _extract_pages(pdf_path, missing, workers):
+            timer.add("pdf_extract", extract_seconds, page=page_number + 1)
+            timer.add("redaction", redact_seconds, page=page_number + 1, hits=hits)
+            if error is None:
+                extracted[page_number] = text
+            else:
+                errors.append(f"page {page_number + 1}: {error}")
+        if extracted:
+            with timer.stage("page_cache_store", pages=len(extracted)):
+                PageText.add_pages(content_hash, PrivacyFilter.VERSION, extracted)
+        if errors:
+            raise Exception("; ".join(errors))
+        pages.update(extracted)
+
+    return [pages[number] for number in range(page_count)]
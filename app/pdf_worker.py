@@ -0,0 +1,42 @@
+"""
+Page extraction run inside the PDF worker processes.
+
+Workers import only this module, pdfplumber and the privacy filter, never
+the Flask app, so starting one does not open the database, run migrations
+or start the scheduler.
+"""
+import time
+
+import pdfplumber
+
+from app.privacy_filter import PrivacyFilter
+
+
+def extract_page_batch(pdf_path, page_numbers):
+    """
+    Extract and redact a batch of pages.
+
+    Returns:
+        list: (page_number, text, error, extract_seconds, redact_seconds,
+            hits) tuples, hits being the page's matches per pattern name;
+            text is None when the page failed
+    """
+    results = []
+    with pdfplumber.open(pdf_path, pages=[number + 1 for number in page_numbers]) as pdf:
+        for page_number, page in zip(page_numbers, pdf.pages):
+            privacy_filter = PrivacyFilter()
+            text = error = extracted = None
+            started = time.perf_counter()
+            try:
+                raw_text = page.extract_text() or ""
+                extracted = time.perf_counter()
+                text = privacy_filter.hash_sensitive_data(raw_text)
+            except Exception as e:
+                error = str(e)
+            finished = time.perf_counter()
+            # A page that failed in pdfplumber was never redacted
+            extracted = extracted or finished
+            results.append((
+                page_number, text, error, extracted - started, finished - extracted, dict(privacy_filter.hits)
+            ))
+    return results
@@ -1,25 +1,71 @@
 import re
+from collections import Counter
+
+# Patterns for sensitive data, in priority order: where two could match at the
+# same position, the earlier one wins
+PATTERNS = {
+    'credit_card': r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
+    'account_number': r'\b\d{8,12}\b',  # typical account number lengths
+    'ssn': r'\b\d{3}[-]?\d{2}[-]?\d{4}\b',
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'phone': r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+}
+
+
+def combine_patterns(patterns):
+    """
+    Compile patterns into one alternation of named groups, so text is scanned
+    once for all of them.
+
+    Every pattern starts with a word boundary, which is matched once up front,
+    and consecutive patterns starting with a digit share a (?=\\d) guard so
+    they are skipped at non-digit positions. Alternatives keep their order.
+    """
+    branches = []
+    digit_branches = []
+    for name, pattern in patterns.items():
+        if not pattern.startswith(r"\b"):
+            raise ValueError(f"Pattern {name} must start with a word boundary")
+        branch = f"(?P<{name}>{pattern[2:]})"
+        if pattern.startswith(r"\b\d"):
+            digit_branches.append(branch)
+            continue
+        if digit_branches:
+            branches.append(r"(?=\d)(?:" + "|".join(digit_branches) + ")")
+            digit_branches = []
+        branches.append(branch)
+    if digit_branches:
+        branches.append(r"(?=\d)(?:" + "|".join(digit_branches) + ")")
+    return re.compile(r"\b(?:" + "|".join(branches) + ")")
+
+
+COMBINED_PATTERN = combine_patterns(PATTERNS)
+
+MASK = "****"
 
 
 class PrivacyFilter:
     """Handles privacy protection for sensitive financial data"""
-    
+
+    # Bump whenever the patterns change so cached redacted text is not reused
+    VERSION = 2
+
     def __init__(self):
-        # Patterns for sensitive data
-        self.patterns = {
-            'credit_card': r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
-            'account_number': r'\b\d{8,12}\b',  # typical account number lengths
-            'ssn': r'\b\d{3}[-]?\d{2}[-]?\d{4}\b',
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'phone': r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-        }
-        
+        self.patterns = PATTERNS
+        # Matches per pattern name, for auditing what was redacted
+        self.hits = Counter()
+
+    def _mask(self, match):
+        self.hits[match.lastgroup] += 1
+        return MASK
+
     def hash_sensitive_data(self, text):
-        """Hash sensitive data while optionally preserving last 4 digits"""
+        """
+        Mask sensitive data in a single pass over the text.
+
+        Matches are found left to right, so an email address containing a run
+        of digits is masked as a whole rather than just the digits.
+        """
         if not text:
             return text
-                
-        redacted = text
-        for _, pattern in self.patterns.items():
-            redacted = re.sub(pattern, "****", redacted)
-        return redacted
\ No newline at end of file
+        return COMBINED_PATTERN.sub(self._mask, text)
@@ -0,0 +1,118 @@
+import cProfile
+import importlib.util
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+CPROFILE = "cprofile"
+PYINSTRUMENT = "pyinstrument"
+PROFILERS = (CPROFILE, PYINSTRUMENT)
+# Functions listed in the text rendering of a cProfile capture
+PROFILE_TEXT_LINES = 60
+# Only one cProfile can be enabled per interpreter from Python 3.12 on
+_capture_lock = threading.Lock()
+
+
+class StageTimer:
+    """
+    Wall-clock time of each stage of a statement upload, in the order they ran.
+
+    A stage can appear more than once, e.g. one "llm" entry per chunk, and
+    carries details such as page numbers or token counts alongside its time.
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    def add(self, stage, seconds, **details):
+        self.stages.append({"stage": stage, "seconds": round(seconds, 6), **details})
+
+    @contextmanager
+    def stage(self, name, **details):
+        """
+        Time a with-block. Items added to the yielded dict are recorded as
+        details, so counts known only at the end can be reported too.
+        """
+        started = time.perf_counter()
+        try:
+            yield details
+        finally:
+            self.add(name, time.perf_counter() - started, **details)
+
+
+def profiler_available(profiler):
+    if profiler == PYINSTRUMENT:
+        # Optional dependency, only needed when this profiler is asked for
+        return importlib.util.find_spec("pyinstrument") is not None
+    return profiler == CPROFILE
+
+
+def profile_path(directory, job_id, profiler):
+    extension = "html" if profiler == PYINSTRUMENT else "prof"
+    return os.path.join(directory, f"{job_id}.{extension}")
+
+
+@contextmanager
+def capture_profile(profiler, path):
+    """
+    Profile the with-block on the calling thread and save the result to path:
+    pstats data for cProfile, an HTML report for pyinstrument.
+
+    Work handed to other threads or processes (LLM requests, PDF pages) only
+    shows up as time spent waiting for it; the stage timings cover it instead.
+    Captures run one at a time, so a profiled job on another worker waits.
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {profiler}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _capture_lock:
+        with _capture(profiler, path):
+            yield
+
+
+@contextmanager
+def _capture(profiler, path):
+    if profiler == CPROFILE:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another tool, e.g. "python -m cProfile", holds the profiler;
+            # the job still runs, just without a profile
+            print(f"Skipping profile {path}: {str(e)}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(path)
+    elif profiler == PYINSTRUMENT:
+        from pyinstrument import Profiler
+
+        profile = Profiler(async_mode="disabled")
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(path, "w") as f:
+                f.write(profile.output_html())
+
+
+def render_profile(path):
+    """
+    Returns:
+        tuple: (body, mimetype) of a saved profile for viewing in a browser;
+            cProfile data is rendered as text sorted by cumulative time
+    """
+    if path.endswith(".html"):
+        with open(path) as f:
+            return f.read(), "text/html"
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TEXT_LINES)
+    return output.getvalue(), "text/plain"
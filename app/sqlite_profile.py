@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from models import db
+
+# Applied to every new SQLite connection. WAL lets readers keep going while a
+# statement is being ingested; NORMAL sync is durable in WAL mode except on
+# power loss; negative cache_size is in KiB.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+def apply_pragmas(engine, pragmas, read_only=False):
+    """
+    Run PRAGMA statements on every connection the engine opens.
+
+    Args:
+        engine (Engine): SQLite engine
+        pragmas (dict): Pragma name to value
+        read_only (bool): Also set query_only, so the connection refuses writes
+
+    On a writable engine the driver's implicit BEGIN before the first write
+    is BEGIN IMMEDIATE. A deferred transaction whose INSERT has already read
+    (e.g. ingest's dedup lookup) cannot take the write lock once another
+    connection commits, and in WAL mode fails at once regardless of
+    busy_timeout; taking the lock up front makes it wait its turn instead.
+    """
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+    if read_only:
+        statements.append("PRAGMA query_only=ON")
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+        if not read_only:
+            dbapi_connection.isolation_level = "IMMEDIATE"
+
+
+@contextmanager
+def read_only():
+    """
+    Route the current session's queries to the read engine. Usable as a
+    decorator on read-only views and as a with-block around streamed reads.
+    """
+    session = db.session()
+    previous = session.info.get("read_only", False)
+    session.info["read_only"] = True
+    try:
+        yield
+    finally:
+        session.info["read_only"] = previous
@@ -1,5 +1,5 @@
 
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useRef } from 'react';
 import { Paper, Box, Button, Typography, Grid2, CircularProgress, Dialog, DialogContent, DialogTitle, DialogActions } from '@mui/material';
 import { AllCommunityModule, ModuleRegistry } from "ag-grid-community";
 import { AgGridReact } from "ag-grid-react";
@@ -146,30 +146,31 @@ const TransactionsTab = () => {
             setIsLoading(false);
         }
     };
-    const onCellValueChanged = async (params) => {
-        const { data, colDef, newValue } = params;
-        const fieldName = colDef.field;
+    // Cell edits made together (paste, fill) are sent as one batch request
+    const pendingEdits = useRef([]);
+    const flushTimer = useRef(null);
+
+    const flushEdits = async () => {
+        const updates = pendingEdits.current;
+        pendingEdits.current = [];
+        flushTimer.current = null;
 
         try {
-            const response = await fetch('http://127.0.0.1:5000/api/update-transaction', {
+            const response = await fetch('http://127.0.0.1:5000/api/update-transactions', {
                 method: 'PUT',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({
-                    transaction_id: data.transaction_id,
-                    field: fieldName,
-                    value: newValue
-                })
+                body: JSON.stringify({ updates })
             });
 
             if (!response.ok) {
-                throw new Error('Failed to update transaction');
+                throw new Error(updates.length > 1 ? 'Failed to update transactions' : 'Failed to update transaction');
             }
 
             setToast({
                 open: true,
-                message: 'Transaction updated successfully!',
+                message: updates.length > 1 ? `${updates.length} transactions updated successfully!` : 'Transaction updated successfully!',
                 severity: 'success'
             });
 
@@ -184,6 +185,18 @@ const TransactionsTab = () => {
         }
     };
 
+    const onCellValueChanged = (params) => {
+        const { data, colDef, newValue } = params;
+        pendingEdits.current.push({
+            transaction_id: data.transaction_id,
+            field: colDef.field,
+            value: newValue
+        });
+        if (!flushTimer.current) {
+            flushTimer.current = setTimeout(flushEdits, 50);
+        }
+    };
+
     const handleSubmit = async (e) => {
         e.preventDefault();
 
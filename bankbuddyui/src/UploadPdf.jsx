@@ -60,7 +60,12 @@ const UploadPDF = ({ open, onClose }) => {
                 body: formData,
             });
 
-            const responseData = await response.json();
+            let responseData = await response.json();
+
+            if (response.status === 202) {
+                // Statement is processed in the background; poll until the job finishes
+                responseData = await waitForJob(responseData.job_id);
+            }
 
             if (response.ok) {
                 setToast({
@@ -86,6 +91,23 @@ const UploadPDF = ({ open, onClose }) => {
         }
     };
 
+    const waitForJob = async (jobId) => {
+        while (true) {
+            await new Promise((resolve) => setTimeout(resolve, 2000));
+            const response = await fetch(`http://127.0.0.1:5000/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok) {
+                throw new Error(job.error || 'Failed to fetch job status');
+            }
+            if (job.state === 'succeeded') {
+                return job.result;
+            }
+            if (job.state === 'failed') {
+                throw new Error(job.error || 'Processing failed');
+            }
+        }
+    };
+
     const handleFileChange = (e) => {
         setFile(e.target.files[0]);
     };
@@ -0,0 +1,349 @@
+"""
+Time the dashboard API endpoints and statement ingestion on synthetic data.
+
+    python -m benchmarks.bench_api [--sizes 1000,10000,100000] [--output results.json]
+    python -m benchmarks.bench_api --baseline results.json [--threshold 0.2]
+
+The database is grown to each size in turn (transactions across all
+accounts) and every benchmark is run against it. Data comes from a seeded
+generator, so the same arguments always build the same database. With
+--baseline, results are compared to a saved run and the exit status is 1
+if any benchmark got slower by more than the threshold.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ACCOUNT_TYPES = ["checking/savings", "credit/debit"]
+MERCHANTS = {
+    "checking/savings": [
+        ("PAYROLL ACME CORP", "paycheck", 1500, 4500),
+        ("RENT PAYMENT", "rent", -2500, -900),
+        ("PG&E UTILITIES", "utilities", -250, -40),
+        ("ATM WITHDRAWAL", "cash", -300, -20),
+        ("CHASE CARD AUTOPAY", "credit card payment", -3000, -200),
+        ("VENMO", "other expenses", -200, 200),
+    ],
+    "credit/debit": [
+        ("COSTCO WHOLESALE", "groceries", 20, 400),
+        ("TRADER JOES", "groceries", 10, 150),
+        ("AMAZON MKTPLACE", "shopping", 5, 300),
+        ("SHELL OIL", "gas", 20, 90),
+        ("UBER TRIP", "transportation", 8, 60),
+        ("BLUE BOTTLE COFFEE", "restaurant", 4, 25),
+        ("NETFLIX.COM", "subscriptions", 15, 23),
+        ("RETURN AMAZON MKTPLACE", "shopping", -300, -5),
+        ("AUTOPAY PAYMENT THANK YOU", "credit card payment", -3000, -200),
+    ],
+}
+# Transactions are generated in blocks seeded by their index, so growing the
+# database from one size to the next gives the same rows as building it at once
+BLOCK_SIZE = 1000
+# Rows sent to bulk_add_transactions per statement while seeding
+SEED_BATCH_SIZE = 20000
+# Transactions in each statement timed by the ingest benchmark
+INGEST_SIZE = 500
+# Legacy duplicate rows inserted before each remove-duplicates run
+DUPLICATE_ROWS = 100
+LAST_DAY = date(2024, 12, 31)
+
+
+def synthetic_accounts(count):
+    """Alternate checking/savings and credit/debit accounts."""
+    return [
+        {
+            "name": f"Bench {ACCOUNT_TYPES[index % 2].split('/')[0].title()} {index}",
+            "institution": "Bench Bank",
+            "type": ACCOUNT_TYPES[index % 2],
+            "last_4_digits": f"{index:04d}",
+        }
+        for index in range(count)
+    ]
+
+
+def synthetic_transactions(accounts, start, stop, seed=0, days=3 * 365):
+    """
+    Yield transaction rows start..stop-1 spread over `days` days before
+    LAST_DAY, round-robin across accounts.
+
+    Args:
+        accounts (list): (account_id, account_type) pairs
+    """
+    for block in range(start // BLOCK_SIZE, (stop + BLOCK_SIZE - 1) // BLOCK_SIZE):
+        rng = random.Random(seed * 1_000_003 + block)
+        for index in range(block * BLOCK_SIZE, (block + 1) * BLOCK_SIZE):
+            # Draw every row of the block so the rng stays in step
+            account_id, account_type = accounts[index % len(accounts)]
+            description, category, low, high = rng.choice(MERCHANTS[account_type])
+            row = {
+                "account_id": account_id,
+                "transaction_date": LAST_DAY - timedelta(days=rng.randrange(days)),
+                # The reference number keeps rows distinct for the dedup key
+                "description": f"{description} #{index}",
+                "category": category,
+                "amount": round(rng.uniform(low, high), 2),
+                "comment": None,
+            }
+            if start <= index < stop:
+                yield row
+
+
+def synthetic_balances(accounts, seed=0, months=36):
+    """One statement balance per account per month, newest in LAST_DAY's month."""
+    rng = random.Random(seed)
+    rows = []
+    for account_id, _ in accounts:
+        for month in range(months):
+            year, month_index = divmod(LAST_DAY.year * 12 + LAST_DAY.month - 1 - month, 12)
+            statement_date = date(year, month_index + 1, 28)
+            rows.append({
+                "account_id": account_id,
+                "balance": round(rng.uniform(-5000, 20000), 2),
+                "statement_date": statement_date,
+                "created_at": datetime(2024, 12, 31),
+            })
+    return rows
+
+
+def seed_accounts(count, seed):
+    from models import db
+    from models.account import Account
+    from models.balance import Balance
+
+    accounts = []
+    for spec in synthetic_accounts(count):
+        account_id = Account.add_account(
+            spec["name"], spec["last_4_digits"], spec["type"], institution=spec["institution"]
+        )
+        accounts.append((account_id, spec["type"]))
+    db.session.execute(Balance.__table__.insert(), synthetic_balances(accounts, seed))
+    db.session.commit()
+    return accounts
+
+
+def seed_transactions(accounts, start, stop, seed):
+    from models import db
+    from models.transaction import Transaction
+
+    batch = []
+    for row in synthetic_transactions(accounts, start, stop, seed):
+        batch.append(row)
+        if len(batch) == SEED_BATCH_SIZE:
+            Transaction.bulk_add_transactions(batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        Transaction.bulk_add_transactions(batch)
+        db.session.commit()
+
+
+def measure(function, repeat, setup=None):
+    """
+    Returns:
+        dict: min and median of `repeat` runs, in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": round(min(timings), 3), "median_ms": round(statistics.median(timings), 3)}
+
+
+def endpoint_benchmarks(client, response_cache):
+    """
+    Name to zero-argument callable for each timed request. The response
+    cache is cleared first so every run does the full work.
+    """
+    last_month = "fromDate=2024-12-01&toDate=2024-12-31"
+    everything = "fromDate=2022-01-01&toDate=2024-12-31"
+
+    def get(url):
+        def run():
+            response_cache.clear()
+            response = client.get(url)
+            # Streamed bodies are only produced when read
+            response.get_data()
+            assert response.status_code == 200, (url, response.status_code)
+        return run
+
+    return {
+        "get-transactions month": get(f"/api/get-transactions?{last_month}"),
+        "get-transactions all": get(f"/api/get-transactions?{everything}"),
+        "get-transactions page": get(f"/api/get-transactions?{everything}&limit=100"),
+        "financial-summary month": get(f"/api/financial-summary?{last_month}"),
+        "financial-summary all": get("/api/financial-summary?fromDate=2022-01-15&toDate=2024-12-20"),
+        "transactions-by-categories all": get("/api/transactions-by-categories?fromDate=2022-01-15&toDate=2024-12-20"),
+        "get-all-accounts": get("/api/get-all-accounts"),
+    }
+
+
+def run_size(client, response_cache, accounts, repeat, seed, size):
+    from app.ingest import ingest_statement
+    from models import db
+    from models.transaction import Transaction
+
+    results = {}
+    for name, function in endpoint_benchmarks(client, response_cache).items():
+        results[name] = measure(function, repeat)
+
+    # remove-duplicates only finds rows predating dedup_key, so add some each run
+    account_id = accounts[0][0]
+
+    def add_duplicates():
+        db.session.execute(Transaction.__table__.insert(), [
+            {"account_id": account_id, "transaction_date": LAST_DAY, "description": "LEGACY DUPLICATE",
+             "category": "other expenses", "amount": -1.0, "created_at": datetime(2024, 12, 31)}
+        ] * DUPLICATE_ROWS)
+        db.session.commit()
+
+    def remove_duplicates():
+        response = client.delete("/api/remove-duplicates")
+        assert response.status_code == 200, response.get_json()
+
+    results["remove-duplicates"] = measure(remove_duplicates, repeat, setup=add_duplicates)
+    Transaction.query.filter_by(description="LEGACY DUPLICATE").delete()
+    db.session.commit()
+
+    # Each run ingests a statement of new rows, removed again afterwards
+    statements = iter(range(repeat))
+
+    def ingest():
+        run = next(statements)
+        rows = synthetic_transactions([(account_id, accounts[0][1])], 0, INGEST_SIZE, seed=seed + 1 + run)
+        ingest_statement(account_id, {
+            "statement_date": LAST_DAY.isoformat(),
+            "account_balance": 100.0,
+            "transactions": [
+                dict(row, transaction_date=row["transaction_date"].isoformat(),
+                     description=f"INGEST {size} {run} {row['description']}")
+                for row in rows
+            ],
+        })
+
+    results[f"ingest {INGEST_SIZE} rows"] = measure(ingest, repeat)
+    ingested = db.session.execute(
+        db.select(Transaction.transaction_id).where(Transaction.description.like("INGEST %"))
+    ).scalars().all()
+    Transaction.delete_transactions(ingested)
+    db.session.commit()
+    return results
+
+
+def run(sizes, accounts_count, repeat, seed):
+    """
+    Returns:
+        dict: {"meta": {...}, "results": {size: {benchmark: timings}}}
+    """
+    import importlib
+
+    app_module = importlib.import_module("app.app")
+    app = app_module.app
+    # Keep the startup backup from copying the benchmark database mid-run
+    app_module.scheduler.shutdown(wait=True)
+    app.config["TESTING"] = True
+    client = app.test_client()
+
+    results = {}
+    with app.app_context():
+        accounts = seed_accounts(accounts_count, seed)
+        current = 0
+        for size in sorted(sizes):
+            started = time.perf_counter()
+            seed_transactions(accounts, current, size, seed)
+            current = size
+            print(f"{size} transactions seeded in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+            results[str(size)] = run_size(client, app_module.response_cache, accounts, repeat, seed, size)
+            for name, timings in results[str(size)].items():
+                print(f"{size:>9} {name:<32} {timings['median_ms']:10.2f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "accounts": accounts_count,
+            "repeat": repeat,
+            "seed": seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare median timings present in both runs.
+
+    Returns:
+        list: (size, benchmark, baseline_ms, current_ms) for every benchmark
+            whose median grew by more than `threshold` (0.2 = 20%)
+    """
+    regressions = []
+    for size, benchmarks in current["results"].items():
+        for name, timings in benchmarks.items():
+            before = baseline["results"].get(size, {}).get(name)
+            if before is None:
+                continue
+            if timings["median_ms"] > before["median_ms"] * (1 + threshold):
+                regressions.append((size, name, before["median_ms"], timings["median_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="Comma-separated transaction counts, e.g. 1000,1000000")
+    parser.add_argument("--accounts", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown before a benchmark is flagged (default 0.2 = 20%%)")
+    parser.add_argument("--database", help="SQLite file to build; a temporary one by default")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.abspath(args.database or os.path.join(directory, "bench.db"))
+        if os.path.exists(path):
+            parser.error(f"{path} already exists")
+        # Read by app.app at import; statements are ingested inline
+        os.environ["BANKBUDDY_DATABASE_URI"] = f"sqlite:///{path}"
+        os.environ["BANKBUDDY_BACKUP_DIR"] = os.path.join(directory, "backups")
+        os.environ["BANKBUDDY_JOB_WORKERS"] = "0"
+        # The app's progress messages would otherwise mix with the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run(sizes, args.accounts, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for size, name, before, after in regressions:
+            print(f"REGRESSION {size:>9} {name:<32} {before:10.2f} ms -> {after:10.2f} ms ({after / before - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare PrivacyFilter throughput against the previous one-re.sub-per-pattern
+implementation on large synthetic statements.
+
+    python -m benchmarks.bench_privacy_filter [--lines 200000] [--repeat 3]
+"""
+import argparse
+import random
+import re
+import time
+
+from app.privacy_filter import PATTERNS, PrivacyFilter
+
+
+def sequential_hash_sensitive_data(text):
+    """The previous implementation: one full re.sub pass per pattern."""
+    redacted = text
+    for pattern in PATTERNS.values():
+        redacted = re.sub(pattern, "****", redacted)
+    return redacted
+
+
+def synthetic_statement(lines, seed=0):
+    rng = random.Random(seed)
+    merchants = ["COSTCO WHSE", "AMAZON MKTPLACE", "SHELL OIL", "UBER TRIP", "TRADER JOES", "NETFLIX.COM"]
+
+    def digits(count):
+        return "".join(rng.choice("0123456789") for _ in range(count))
+
+    sensitive = [
+        lambda: f"CARD {digits(4)} {digits(4)} {digits(4)} {digits(4)}",
+        lambda: f"ACCT {digits(10)}",
+        lambda: f"SSN {digits(3)}-{digits(2)}-{digits(4)}",
+        lambda: f"CONTACT jane.doe{digits(2)}@example.com",
+        lambda: f"CALL {digits(3)}-{digits(3)}-{digits(4)}",
+    ]
+    output = []
+    for _ in range(lines):
+        line = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} {rng.choice(merchants)} #{digits(4)} {rng.randint(1, 99999) / 100:.2f}"
+        if rng.random() < 0.1:
+            line += " " + rng.choice(sensitive)()
+        output.append(line)
+    return "\n".join(output)
+
+
+def measure(function, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = synthetic_statement(args.lines)
+    megabytes = len(text.encode()) / (1024 * 1024)
+    privacy_filter = PrivacyFilter()
+    results = {
+        "sequential re.sub": measure(sequential_hash_sensitive_data, text, args.repeat),
+        "single pass": measure(privacy_filter.hash_sensitive_data, text, args.repeat),
+    }
+
+    print(f"{args.lines} lines, {megabytes:.1f} MB")
+    for name, seconds in results.items():
+        print(f"{name:>18}: {seconds:.3f} s  {megabytes / seconds:7.1f} MB/s")
+    print(f"{'speedup':>18}: {results['sequential re.sub'] / results['single pass']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
+
+from models.session import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
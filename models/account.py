@@ -1,9 +1,13 @@
 import datetime
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, func, select
+from sqlalchemy.orm import aliased
 
 from models.balance import Balance
 from . import db
 
+# Lets to_dict tell "no balance" apart from "balance not looked up yet"
+_UNSET = object()
+
 # Account table schema
 class Account(db.Model):
     __tablename__ = 'accounts'
@@ -30,8 +34,9 @@ class Account(db.Model):
     def __repr__(self):
         return f"<Account {self.name} - {self.last_4_digits}>"
     
-    def to_dict(self):
-        recent_balance = Balance.get_recent_balance(self.account_id)
+    def to_dict(self, recent_balance=_UNSET):
+        if recent_balance is _UNSET:
+            recent_balance = Balance.get_recent_balance(self.account_id)
         return {
             "account_id": self.account_id,
             "name": self.name,
@@ -44,6 +49,30 @@ class Account(db.Model):
             "last_statement_date": self.last_statement_date.strftime('%Y-%m-%d') if self.last_statement_date else "NA",
         }
     
+    @classmethod
+    def get_all_with_recent_balance(cls):
+        """
+        Get every account together with its most recent balance in a single
+        query, ranking each account's balances with a window function.
+
+        Returns:
+            list: (Account, Balance or None) tuples
+        """
+        ranked = select(
+            Balance,
+            func.row_number().over(
+                partition_by=Balance.account_id,
+                order_by=(Balance.statement_date.desc(), Balance.id.desc()),
+            ).label("rank"),
+        ).subquery()
+        recent_balance = aliased(Balance, ranked)
+        query = (
+            select(cls, recent_balance)
+            .outerjoin(ranked, (ranked.c.account_id == cls.account_id) & (ranked.c.rank == 1))
+            .order_by(cls.account_id)
+        )
+        return db.session.execute(query).all()
+
     @classmethod
     def add_account(cls, name, last_4_digits, type, institution=None):
         new_account = cls(name=name, 
@@ -56,7 +85,7 @@ class Account(db.Model):
         return new_account.account_id
     
     @classmethod
-    def update_last_statement_date(cls, account_id):
+    def update_last_statement_date(cls, account_id, commit=True):
         # Get the account by account_id
         account = cls.query.get(account_id)
         
@@ -67,10 +96,10 @@ class Account(db.Model):
             if recent_balance:
                 # Update the last_statement_date to the statement date of the most recent balance
                 account.last_statement_date = recent_balance.statement_date
-                db.session.commit()
             else:
                 # Optionally handle the case where there is no balance
                 account.last_statement_date = None
+            if commit:
                 db.session.commit()
         else:
             raise ValueError(f"Account with id {account_id} does not exist.")
@@ -1,4 +1,6 @@
 import datetime
+from sqlalchemy import Index
+
 from . import db
 
 class Balance(db.Model):
@@ -10,8 +12,13 @@ class Balance(db.Model):
     statement_date = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.datetime.now(datetime.UTC), nullable=False)
 
+    # Serves get_recent_balance without a sort
+    __table_args__ = (
+        Index('ix_balance_account_statement_date', account_id, statement_date.desc()),
+    )
+
     @classmethod
-    def add_balance(cls, account_id, balance, statement_date):
+    def add_balance(cls, account_id, balance, statement_date, commit=True):
         # Ensure statement_date is a datetime.date object
         if isinstance(statement_date, str):
             try:
@@ -29,7 +36,8 @@ class Balance(db.Model):
         )
             # Add the new balance history to the session
         db.session.add(new_balance)
-        db.session.commit()
+        if commit:
+            db.session.commit()
 
         return new_balance
     
@@ -0,0 +1,76 @@
+import uuid
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import db
+
+# Tables whose contents the cached GET endpoints return
+TRACKED_TABLES = {'accounts', 'balance', 'transactions', 'monthly_rollups'}
+
+
+class DataVersion(db.Model):
+    """
+    Single-row counter bumped in every transaction that writes a tracked
+    table, so responses built from those tables can be cached per version.
+    """
+    __tablename__ = 'data_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Changes whenever the database is recreated, so versions of an old file
+    # never match versions of a new one
+    epoch = db.Column(db.String(32), nullable=False, default=lambda: uuid.uuid4().hex)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def get(cls):
+        """
+        Returns:
+            str: "<epoch>-<version>" of the current data, or "0" before the
+                counter row exists
+        """
+        row = db.session.execute(select(cls.epoch, cls.version).where(cls.id == 1)).first()
+        return f"{row.epoch}-{row.version}" if row else "0"
+
+    @classmethod
+    def ensure_row(cls, connection):
+        """Create the counter row unless it exists."""
+        if connection.execute(select(cls.id).where(cls.id == 1)).first() is None:
+            connection.execute(insert(cls).values(id=1, epoch=uuid.uuid4().hex, version=0))
+
+    @classmethod
+    def bump(cls, connection):
+        """Increment the version inside the caller's transaction."""
+        cls.ensure_row(connection)
+        connection.execute(update(cls).where(cls.id == 1).values(version=cls.version + 1))
+
+
+def _bump_once(session):
+    if not session.info.get('data_version_bumped'):
+        session.info['data_version_bumped'] = True
+        DataVersion.bump(session.connection())
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_after_flush(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(getattr(obj, '__tablename__', None) in TRACKED_TABLES for obj in changed):
+        _bump_once(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_after_bulk_write(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if getattr(table, 'name', None) not in TRACKED_TABLES:
+        return None
+    result = orm_execute_state.invoke_statement()
+    _bump_once(orm_execute_state.session)
+    return result
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _reset_bump(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('data_version_bumped', None)
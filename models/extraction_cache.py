@@ -0,0 +1,72 @@
+import datetime
+import json
+
+from sqlalchemy import func, select
+
+from . import db
+
+
+class ExtractionCache(db.Model):
+    """Parsed LLM extraction results keyed by a hash of their inputs"""
+    __tablename__ = 'extraction_cache'
+
+    cache_key = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+    last_used_at = db.Column(db.DateTime, default=lambda: datetime.datetime.now(datetime.UTC), nullable=False, index=True)
+
+    @classmethod
+    def get(cls, cache_key):
+        """
+        Look up a cached extraction result and mark it as recently used.
+
+        Args:
+            cache_key (str): Hash identifying the extraction inputs
+
+        Returns:
+            dict: The cached extraction result
+            None: If nothing is cached under cache_key
+        """
+        entry = db.session.get(cls, cache_key)
+        if entry is None:
+            return None
+        entry.last_used_at = datetime.datetime.now(datetime.UTC)
+        db.session.commit()
+        return json.loads(entry.data)
+
+    @classmethod
+    def put(cls, cache_key, data, max_bytes):
+        """
+        Store an extraction result, evicting least recently used entries so the
+        cache stays within max_bytes.
+
+        Args:
+            cache_key (str): Hash identifying the extraction inputs
+            data (dict): Parsed extraction result
+            max_bytes (int): Upper bound on the total size of cached results
+        """
+        payload = json.dumps(data)
+        entry = db.session.get(cls, cache_key) or cls(cache_key=cache_key)
+        entry.data = payload
+        entry.size = len(payload)
+        entry.last_used_at = datetime.datetime.now(datetime.UTC)
+        db.session.add(entry)
+        db.session.flush()
+
+        excess = db.session.scalar(select(func.sum(cls.size))) - max_bytes
+        if excess > 0:
+            oldest = db.session.execute(
+                select(cls.cache_key, cls.size)
+                .where(cls.cache_key != cache_key)
+                .order_by(cls.last_used_at)
+            )
+            evicted = []
+            for key, size in oldest:
+                if excess <= 0:
+                    break
+                evicted.append(key)
+                excess -= size
+            if evicted:
+                cls.query.filter(cls.cache_key.in_(evicted)).delete(synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,96 @@
+import datetime
+import json
+
+from sqlalchemy import func, select
+
+from . import db
+
+
+class IngestStage(db.Model):
+    """Time one stage of a statement upload took, kept as ingest history"""
+    __tablename__ = 'ingest_stages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(32), db.ForeignKey('jobs.job_id'), nullable=False, index=True)
+    stage = db.Column(db.String(50), nullable=False, index=True)
+    seconds = db.Column(db.Float, nullable=False)
+    # JSON object of stage-specific details, e.g. page number or token counts
+    details = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    def to_dict(self):
+        return {
+            "stage": self.stage,
+            "seconds": self.seconds,
+            **(json.loads(self.details) if self.details else {}),
+        }
+
+    @classmethod
+    def add_stages(cls, job_id, stages, commit=True):
+        """
+        Record a job's stage timings with one executemany.
+
+        Args:
+            job_id (str): Job the stages belong to
+            stages (list): StageTimer.stages dicts
+            commit (bool): Commit after adding
+        """
+        if stages:
+            now = datetime.datetime.now(datetime.UTC)
+            rows = []
+            for stage in stages:
+                details = {key: value for key, value in stage.items() if key not in ("stage", "seconds")}
+                rows.append({
+                    "job_id": job_id,
+                    "stage": stage["stage"],
+                    "seconds": stage["seconds"],
+                    "details": json.dumps(details) if details else None,
+                    "created_at": now,
+                })
+            db.session.execute(cls.__table__.insert(), rows)
+        if commit:
+            db.session.commit()
+
+    @classmethod
+    def get_for_job(cls, job_id):
+        return cls.query.filter_by(job_id=job_id).order_by(cls.id).all()
+
+    @classmethod
+    def get_job_totals(cls, job_ids):
+        """
+        Returns:
+            dict: job_id -> {stage: total seconds}
+        """
+        totals = {job_id: {} for job_id in job_ids}
+        if not job_ids:
+            return totals
+        query = (
+            select(cls.job_id, cls.stage, func.sum(cls.seconds))
+            .where(cls.job_id.in_(job_ids))
+            .group_by(cls.job_id, cls.stage)
+        )
+        for job_id, stage, seconds in db.session.execute(query):
+            totals[job_id][stage] = seconds
+        return totals
+
+    @classmethod
+    def get_summary(cls, since=None):
+        """
+        Per-stage count, mean and max seconds, optionally only since a time.
+
+        Returns:
+            list: Dicts ordered by total time, slowest stage first
+        """
+        query = select(
+            cls.stage,
+            func.count(),
+            func.sum(cls.seconds),
+            func.avg(cls.seconds),
+            func.max(cls.seconds),
+        ).group_by(cls.stage).order_by(func.sum(cls.seconds).desc())
+        if since is not None:
+            query = query.where(cls.created_at >= since)
+        return [
+            {"stage": stage, "count": count, "total_seconds": total, "mean_seconds": mean, "max_seconds": longest}
+            for stage, count, total, mean, longest in db.session.execute(query)
+        ]
@@ -0,0 +1,104 @@
+import datetime
+import json
+import uuid
+
+from . import db
+
+
+def _now():
+    return datetime.datetime.now(datetime.UTC)
+
+
+class Job(db.Model):
+    """A statement upload waiting for, or done with, background processing"""
+    __tablename__ = 'jobs'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    job_id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.account_id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(1024), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True)
+    # Groups the jobs of one /api/upload-statements request
+    batch_id = db.Column(db.String(32), nullable=True, index=True)
+    # cProfile or pyinstrument capture requested with the upload, if any
+    profiler = db.Column(db.String(20), nullable=True)
+    state = db.Column(db.String(20), nullable=False, default=QUEUED, index=True)
+    created_at = db.Column(db.DateTime, default=_now, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    inserted_count = db.Column(db.Integer, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.job_id} - {self.state}>"
+
+    def to_dict(self):
+        def seconds(start, end):
+            if start is None or end is None:
+                return None
+            return (end - start).total_seconds()
+
+        return {
+            "job_id": self.job_id,
+            "account_id": self.account_id,
+            "filename": self.filename,
+            "batch_id": self.batch_id,
+            "profiler": self.profiler,
+            "state": self.state,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queued_seconds": seconds(self.created_at, self.started_at),
+            "run_seconds": seconds(self.started_at, self.finished_at),
+            "inserted_count": self.inserted_count,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+        }
+
+    @classmethod
+    def add_job(cls, account_id, filename, file_path, content_hash=None, batch_id=None, profiler=None):
+        new_job = cls(
+            account_id=account_id,
+            filename=filename,
+            file_path=file_path,
+            content_hash=content_hash,
+            batch_id=batch_id,
+            profiler=profiler
+        )
+        db.session.add(new_job)
+        db.session.commit()
+        return new_job
+
+    @classmethod
+    def get_pending(cls):
+        """
+        Jobs that were queued or interrupted mid-run, oldest first.
+        """
+        return cls.query.filter(cls.state.in_([cls.QUEUED, cls.RUNNING]))\
+                  .order_by(cls.created_at)\
+                  .all()
+
+    def mark_running(self):
+        self.state = self.RUNNING
+        self.started_at = _now()
+        self.finished_at = None
+        db.session.commit()
+
+    def mark_succeeded(self, result):
+        self.state = self.SUCCEEDED
+        self.finished_at = _now()
+        self.inserted_count = result.get("inserted_count")
+        self.result = json.dumps(result)
+        db.session.commit()
+
+    def mark_failed(self, error):
+        self.state = self.FAILED
+        self.finished_at = _now()
+        self.error = error
+        db.session.commit()
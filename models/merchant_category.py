@@ -0,0 +1,205 @@
+import datetime
+import re
+from collections import Counter, defaultdict
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from . import db
+
+USER = 'user'
+HISTORY = 'history'
+
+# Catch-all categories, also used by the local parsers as placeholders; they
+# say nothing about a merchant, so they are neither learned nor kept over a memo
+GENERIC_CATEGORIES = {'other expenses', 'other income'}
+# Payment processor prefixes that come before the merchant's own name
+NOISE_TOKENS = {'SQ', 'TST', 'SP', 'PP', 'PAYPAL', 'POS', 'PURCHASE'}
+# Store numbers, cities and states usually follow the first few words
+MAX_KEY_TOKENS = 4
+
+
+def normalize_merchant(description):
+    """
+    Reduce a transaction description to a merchant key, e.g.
+    "SQ *BLUE BOTTLE #0421 OAKLAND CA" -> "BLUE BOTTLE OAKLAND CA".
+
+    Returns:
+        str: Upper-case words without digits, or "" if no word is left
+    """
+    tokens = [
+        token for token in re.split(r"[^A-Z0-9&']+", (description or "").upper())
+        if token and not any(char.isdigit() for char in token)
+    ]
+    while tokens and tokens[0] in NOISE_TOKENS:
+        tokens.pop(0)
+    tokens = tokens[:MAX_KEY_TOKENS]
+    # "&" or "'" alone name no merchant
+    if not any(char.isalpha() for token in tokens for char in token):
+        return ""
+    return " ".join(tokens)
+
+
+class MerchantCategory(db.Model):
+    """Category remembered for a merchant, from a user's edit or past statements"""
+    __tablename__ = 'merchant_categories'
+
+    merchant_key = db.Column(db.String(255), primary_key=True)
+    category = db.Column(db.String(100), nullable=False)
+    # USER entries override the extracted category of the same merchant,
+    # HISTORY ones only fill gaps
+    source = db.Column(db.String(20), nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    @classmethod
+    def learn(cls, description, category, source=USER, connection=None):
+        """
+        Remember a merchant's category without committing. A HISTORY entry
+        never replaces an existing one; a USER entry always does.
+
+        Returns:
+            str: The merchant key, or None if the description has none
+        """
+        key = normalize_merchant(description)
+        if not key or not category:
+            return None
+        query = insert(cls).values(
+            merchant_key=key,
+            category=category,
+            source=source,
+            updated_at=datetime.datetime.now(datetime.UTC),
+        )
+        if source == USER:
+            query = query.on_conflict_do_update(
+                index_elements=[cls.merchant_key],
+                set_={"category": category, "source": source, "updated_at": query.excluded.updated_at},
+            )
+        else:
+            query = query.on_conflict_do_nothing(index_elements=[cls.merchant_key])
+        (connection if connection is not None else db.session).execute(query)
+        return key
+
+    @classmethod
+    def learn_from_history(cls, rows, connection=None):
+        """
+        Remember the most common specific category of each merchant in rows,
+        for merchants not already known. Does not commit.
+
+        Args:
+            rows (iterable): (description, category) pairs
+
+        Returns:
+            int: Number of merchants in rows with a specific category
+        """
+        counts = defaultdict(Counter)
+        for description, category in rows:
+            if category and category not in GENERIC_CATEGORIES:
+                key = normalize_merchant(description)
+                if key:
+                    counts[key][category] += 1
+        if not counts:
+            return 0
+
+        now = datetime.datetime.now(datetime.UTC)
+        query = insert(cls).on_conflict_do_nothing(index_elements=[cls.merchant_key])
+        (connection if connection is not None else db.session).execute(query, [
+            {"merchant_key": key, "category": categories.most_common(1)[0][0], "source": HISTORY, "updated_at": now}
+            for key, categories in counts.items()
+        ])
+        return len(counts)
+
+
+class MerchantMatcher:
+    """
+    In-memory lookup of remembered merchant categories.
+
+    A description matches its exact merchant key first. Otherwise the known
+    key sharing the longest run of leading words with it wins, so a category
+    learned for "COSTCO WHOLESALE SEATTLE" also covers "COSTCO WHOLESALE
+    PORTLAND". One shared word is enough only if it is at least four letters.
+    Such a related match is weaker evidence than an exact one, so apply()
+    only uses it to fill a missing or generic category.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (iterable): (merchant_key, category, source) tuples
+        """
+        self.exact = {}
+        self.by_first_token = defaultdict(list)
+        for key, category, source in entries:
+            self.exact[key] = (category, source)
+            tokens = key.split()
+            self.by_first_token[tokens[0]].append((tokens, key))
+
+    @classmethod
+    def load(cls):
+        query = select(MerchantCategory.merchant_key, MerchantCategory.category, MerchantCategory.source)
+        return cls(db.session.execute(query))
+
+    def match_key(self, description):
+        """
+        Returns:
+            str: Merchant key the description matches, or None
+        """
+        return self._match(normalize_merchant(description))
+
+    def _match(self, key):
+        if not key:
+            return None
+        if key in self.exact:
+            return key
+
+        tokens = key.split()
+        best_key = None
+        best_length = 0
+        for candidate_tokens, candidate_key in self.by_first_token.get(tokens[0], ()):
+            length = 0
+            for ours, theirs in zip(tokens, candidate_tokens):
+                if ours != theirs:
+                    break
+                length += 1
+            if length > best_length or (
+                length == best_length and best_key is not None
+                and self.exact[candidate_key][1] == USER and self.exact[best_key][1] != USER
+            ):
+                best_key, best_length = candidate_key, length
+        if best_length == 1 and len(tokens[0]) < 4:
+            return None
+        return best_key
+
+    def match(self, description):
+        """
+        Returns:
+            tuple: (category, source) remembered for the description's
+                merchant, or None
+        """
+        key = self.match_key(description)
+        return self.exact[key] if key else None
+
+    def apply(self, rows):
+        """
+        Fill in or override the categories of parsed transaction rows.
+
+        A USER category replaces whatever was extracted for that exact
+        merchant. Otherwise, for HISTORY entries and related merchants (one
+        user edit of "UBER TRIP" says nothing about "UBER EATS"), the
+        remembered category only replaces a missing or generic one.
+
+        Returns:
+            int: Number of rows whose category changed
+        """
+        changed = 0
+        for row in rows:
+            key = normalize_merchant(row["description"])
+            matched_key = self._match(key)
+            if matched_key is None:
+                continue
+            category, source = self.exact[matched_key]
+            if category == row.get("category"):
+                continue
+            overrides = source == USER and matched_key == key
+            if overrides or row.get("category") in (None, "") or row.get("category") in GENERIC_CATEGORIES:
+                row["category"] = category
+                changed += 1
+        return changed
@@ -0,0 +1,155 @@
+"""
+Lightweight schema migrations for existing bankBuddy.db files.
+
+db.create_all() only creates tables that are missing, so indexes and columns
+added to existing tables never reach a database created by an older version.
+Each migration is an idempotent function of a connection, and SQLite's
+PRAGMA user_version records how many of them have already been applied.
+"""
+from sqlalchemy import bindparam, func, select, update
+
+# Imported so every table is registered on db.metadata
+from models.account import Account  # noqa: F401
+from models.balance import Balance
+from models.data_version import DataVersion
+from models.extraction_cache import ExtractionCache  # noqa: F401
+from models.ingest_stage import IngestStage  # noqa: F401
+from models.job import Job
+from models.merchant_category import MerchantCategory
+from models.monthly_rollup import MonthlyRollup
+from models.page_text import PageText  # noqa: F401
+from models.statement import Statement  # noqa: F401
+from models.transaction import Transaction, create_search_index
+from . import db
+
+
+def _create_index(connection, model, index_name):
+    """Create one of a model's declared indexes unless it already exists."""
+    index = next(index for index in model.__table__.indexes if index.name == index_name)
+    index.create(connection, checkfirst=True)
+
+
+def _create_hot_path_indexes(connection):
+    _create_index(connection, Transaction, "ix_transactions_date_account")
+    _create_index(connection, Transaction, "ix_transactions_dedup")
+    _create_index(connection, Balance, "ix_balance_account_statement_date")
+
+
+def _add_column(connection, model, column_name):
+    """Add a model's column to its table unless it is already there."""
+    table = model.__table__
+    existing = {
+        row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table.name})")
+    }
+    if column_name in existing:
+        return
+    column = table.columns[column_name]
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.exec_driver_sql(
+        f"ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type}"
+    )
+
+
+def _add_job_batch_id(connection):
+    _add_column(connection, Job, "batch_id")
+    for index in Job.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _add_transaction_dedup_key(connection):
+    """
+    Add and backfill transactions.dedup_key, then make it unique.
+
+    Only the first transaction of each key gets a value; any duplicates keep
+    NULL so the index can be built without deleting anything, and are cleaned
+    up by /api/remove-duplicates.
+    """
+    _add_column(connection, Transaction, "dedup_key")
+    first_of_each_key = select(
+        func.min(Transaction.transaction_id),
+        Transaction.transaction_date,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.category,
+        Transaction.account_id,
+    ).where(Transaction.dedup_key.is_(None)).group_by(
+        Transaction.account_id,
+        Transaction.transaction_date,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.category,
+    )
+    rows = connection.execute(first_of_each_key).all()
+    update_key = (
+        update(Transaction.__table__)
+        .where(Transaction.__table__.c.transaction_id == bindparam("row_id"))
+        .values(dedup_key=bindparam("key"))
+    )
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        batch = rows[start:start + BACKFILL_BATCH_SIZE]
+        connection.execute(
+            update_key,
+            [{"row_id": row[0], "key": Transaction.compute_dedup_key(*row[1:])} for row in batch],
+        )
+    _create_index(connection, Transaction, "uix_transactions_dedup_key")
+
+
+def _build_monthly_rollups(connection):
+    MonthlyRollup.rebuild(connection)
+
+
+def _seed_data_version(connection):
+    DataVersion.ensure_row(connection)
+
+
+def _create_transaction_search_index(connection):
+    create_search_index(connection)
+
+
+def _learn_merchant_categories(connection):
+    rows = connection.execute(select(Transaction.description, Transaction.category))
+    MerchantCategory.learn_from_history(rows, connection)
+
+
+def _add_job_profiler(connection):
+    _add_column(connection, Job, "profiler")
+
+
+# Append only: a migration's schema version is its position in this list + 1
+MIGRATIONS = [
+    _create_hot_path_indexes,
+    _add_job_batch_id,
+    _add_transaction_dedup_key,
+    _build_monthly_rollups,
+    _seed_data_version,
+    _create_transaction_search_index,
+    _learn_merchant_categories,
+    _add_job_profiler,
+]
+
+# Rows updated per executemany when backfilling a new column
+BACKFILL_BATCH_SIZE = 1000
+
+
+def get_schema_version(connection):
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def upgrade_schema(engine=None):
+    """
+    Create missing tables and apply any pending migrations.
+
+    Args:
+        engine: Engine to upgrade; defaults to the Flask-SQLAlchemy engine.
+
+    Returns:
+        int: The schema version after upgrading
+    """
+    engine = engine or db.engine
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        version = get_schema_version(connection)
+        for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {target}")
+        return get_schema_version(connection)
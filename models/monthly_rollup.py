@@ -0,0 +1,247 @@
+import datetime
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+
+from models.account import Account
+from . import db
+
+CREDIT_CARD_PAYMENT = "credit card payment"
+
+
+def _next_month(day):
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def split_months(from_date, to_date):
+    """
+    Split a date range into whole calendar months and the partial months at
+    either end.
+
+    Args:
+        from_date (date): First day of the range
+        to_date (date): Last day of the range
+
+    Returns:
+        tuple: ((first_month, end_month), edges) where whole months are those
+            starting on or after first_month and before end_month (None if the
+            range holds no whole month), and edges is a list of (start, end)
+            date ranges not covered by them
+    """
+    first_month = from_date if from_date.day == 1 else _next_month(from_date)
+    day_after = to_date + datetime.timedelta(days=1)
+    end_month = day_after if day_after.day == 1 else to_date.replace(day=1)
+    if first_month >= end_month:
+        return None, [(from_date, to_date)]
+
+    edges = []
+    if from_date < first_month:
+        edges.append((from_date, first_month - datetime.timedelta(days=1)))
+    if end_month <= to_date:
+        edges.append((end_month, to_date))
+    return (first_month, end_month), edges
+
+
+class MonthlyRollup(db.Model):
+    """
+    Per account, month and category sums of transactions, so dashboard
+    summaries read a few rows per month instead of every transaction.
+
+    Money in and money out are kept apart rather than as income, expense,
+    refunds and so on, because which of those a row counts towards depends on
+    the account type, and that can be edited after the fact.
+    """
+    __tablename__ = 'monthly_rollups'
+
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.account_id'), primary_key=True)
+    # First day of the month
+    month = db.Column(db.Date, primary_key=True)
+    # '' for uncategorized transactions, since NULLs never conflict in a key
+    category = db.Column(db.String(100), primary_key=True, default='')
+    inflow = db.Column(db.Float, nullable=False, default=0.0)
+    outflow = db.Column(db.Float, nullable=False, default=0.0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def apply(cls, rows, sign=1, connection=None):
+        """
+        Add transactions to (or, with sign=-1, remove them from) the rollup.
+        Does not commit.
+
+        Args:
+            rows (iterable): (account_id, transaction_date, category, amount)
+                tuples
+            sign (int): 1 to add the rows, -1 to remove them
+            connection: Connection to run on, for use inside a flush;
+                defaults to the session
+        """
+        deltas = {}
+        for account_id, transaction_date, category, amount in rows:
+            if isinstance(transaction_date, datetime.datetime):
+                transaction_date = transaction_date.date()
+            key = (account_id, transaction_date.replace(day=1), category or '')
+            inflow, outflow, count = deltas.get(key, (0.0, 0.0, 0))
+            if amount > 0:
+                inflow += amount
+            else:
+                outflow -= amount
+            deltas[key] = (inflow, outflow, count + 1)
+        if not deltas:
+            return
+
+        executor = connection if connection is not None else db.session
+        query = insert(cls)
+        query = query.on_conflict_do_update(
+            index_elements=[cls.account_id, cls.month, cls.category],
+            set_={
+                "inflow": cls.inflow + query.excluded.inflow,
+                "outflow": cls.outflow + query.excluded.outflow,
+                "transaction_count": cls.transaction_count + query.excluded.transaction_count,
+            },
+        )
+        executor.execute(query, [
+            {
+                "account_id": account_id,
+                "month": month,
+                "category": category,
+                "inflow": sign * inflow,
+                "outflow": sign * outflow,
+                "transaction_count": sign * count,
+            }
+            for (account_id, month, category), (inflow, outflow, count) in deltas.items()
+        ])
+        if sign < 0:
+            executor.execute(delete(cls).where(cls.transaction_count <= 0))
+
+    @classmethod
+    def rebuild(cls, connection=None):
+        """
+        Recompute the whole rollup from the transactions table. Does not commit.
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        # Imported here because Transaction keeps the rollup up to date
+        from models.transaction import Transaction
+
+        executor = connection if connection is not None else db.session
+        month = func.date(Transaction.transaction_date, 'start of month')
+        category = func.coalesce(Transaction.category, '')
+        totals = select(
+            Transaction.account_id,
+            month,
+            category,
+            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0.0)),
+            func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0.0)),
+            func.count(),
+        ).group_by(Transaction.account_id, month, category)
+
+        executor.execute(delete(cls))
+        result = executor.execute(insert(cls).from_select(
+            ["account_id", "month", "category", "inflow", "outflow", "transaction_count"],
+            totals,
+        ))
+        return result.rowcount
+
+    @classmethod
+    def get_totals(cls, from_date, to_date):
+        """
+        Sum money in and out per account type and category between from_date
+        and to_date, reading whole months from the rollup and only the partial
+        months at either end from the transactions table.
+
+        Returns:
+            list: (account_type, category, inflow, outflow) tuples, with None
+                for uncategorized transactions
+        """
+        from models.transaction import Transaction
+
+        whole_months, edges = split_months(from_date, to_date)
+        totals = {}
+
+        def add(results):
+            for account_type, category, inflow, outflow in results:
+                key = (account_type, category or None)
+                total_in, total_out = totals.get(key, (0.0, 0.0))
+                totals[key] = (total_in + inflow, total_out + outflow)
+
+        if whole_months:
+            first_month, end_month = whole_months
+            add(db.session.execute(
+                select(Account.type, cls.category, func.sum(cls.inflow), func.sum(cls.outflow))
+                .join(Account, cls.account_id == Account.account_id)
+                .where(cls.month >= first_month, cls.month < end_month)
+                .group_by(Account.type, cls.category)
+            ))
+        if edges:
+            add(db.session.execute(
+                select(
+                    Account.type,
+                    Transaction.category,
+                    func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0.0)),
+                    func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0.0)),
+                )
+                .join(Account, Transaction.account_id == Account.account_id)
+                .where(or_(*(
+                    and_(Transaction.transaction_date >= start, Transaction.transaction_date <= end)
+                    for start, end in edges
+                )))
+                .group_by(Account.type, Transaction.category)
+            ))
+
+        return [
+            (account_type, category, inflow, outflow)
+            for (account_type, category), (inflow, outflow) in totals.items()
+        ]
+
+    @classmethod
+    def get_category_totals(cls, from_date, to_date):
+        """
+        Same result as Transaction.get_category_totals, read from the rollup.
+
+        Returns:
+            dict: Category to its total amount
+        """
+        category_totals = {}
+        for account_type, category, inflow, outflow in cls.get_totals(from_date, to_date):
+            if category == CREDIT_CARD_PAYMENT and account_type != "checking/savings":
+                continue
+            total = inflow - outflow
+            if account_type == "credit/debit":
+                total = -total
+            category_totals[category] = category_totals.get(category, 0.0) + total
+        return category_totals
+
+    @classmethod
+    def get_financial_summary(cls, from_date, to_date):
+        """
+        Income and spending between from_date and to_date.
+
+        Money in and out of checking/savings accounts is income and expense;
+        charges on credit/debit accounts are credit card expense and money
+        back onto them is a refund, except for credit card payments.
+
+        Returns:
+            dict: total_income, total_expense, refunds, credit_card_expense
+                and net_position
+        """
+        total_income = 0
+        total_expense = 0
+        refunds = 0
+        credit_card_expense = 0
+
+        for account_type, category, inflow, outflow in cls.get_totals(from_date, to_date):
+            if account_type.lower() == "checking/savings":
+                total_income += inflow
+                total_expense += outflow
+            elif account_type.lower() == "credit/debit":
+                credit_card_expense += inflow
+                if category != CREDIT_CARD_PAYMENT:
+                    refunds += outflow
+
+        return {
+            "total_income": total_income,
+            "total_expense": total_expense,
+            "refunds": refunds,
+            "credit_card_expense": credit_card_expense,
+            "net_position": total_income - total_expense,
+        }
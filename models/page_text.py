@@ -0,0 +1,49 @@
+import datetime
+
+from . import db
+
+
+class PageText(db.Model):
+    """Redacted text of one statement page, kept until the statement is ingested"""
+    __tablename__ = 'page_text'
+
+    content_hash = db.Column(db.String(64), primary_key=True)
+    filter_version = db.Column(db.Integer, primary_key=True)
+    page_number = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    @classmethod
+    def get_pages(cls, content_hash, filter_version):
+        """
+        Get the cached pages of a statement file.
+
+        Returns:
+            dict: Page number (0-based) to redacted text
+        """
+        pages = cls.query.filter_by(content_hash=content_hash, filter_version=filter_version)
+        return {page.page_number: page.text for page in pages}
+
+    @classmethod
+    def add_pages(cls, content_hash, filter_version, pages):
+        """
+        Cache redacted page texts.
+
+        Args:
+            content_hash (str): Hash of the statement file
+            filter_version (int): PrivacyFilter.VERSION used for redaction
+            pages (dict): Page number (0-based) to redacted text
+        """
+        for page_number, text in pages.items():
+            db.session.merge(cls(
+                content_hash=content_hash,
+                filter_version=filter_version,
+                page_number=page_number,
+                text=text
+            ))
+        db.session.commit()
+
+    @classmethod
+    def delete_pages(cls, content_hash):
+        cls.query.filter_by(content_hash=content_hash).delete()
+        db.session.commit()
@@ -0,0 +1,17 @@
+from flask_sqlalchemy.session import Session
+
+# Bind key of the engine read-only endpoints query through
+READ_BIND = 'read'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends every statement to the read engine while
+    session.info["read_only"] is set, so analytics reads use their own
+    connection pool and never wait behind the writer.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and READ_BIND in self._db.engines:
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
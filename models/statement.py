@@ -0,0 +1,49 @@
+import datetime
+from sqlalchemy import UniqueConstraint
+
+from . import db
+
+
+class Statement(db.Model):
+    """A statement PDF that has been imported into an account"""
+    __tablename__ = 'statements'
+
+    statement_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.account_id'), nullable=False)
+    statement_date = db.Column(db.Date, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    # The same file may be imported once per account
+    __table_args__ = (
+        UniqueConstraint('account_id', 'content_hash', name='uix_statement_content'),
+    )
+
+    @classmethod
+    def get_by_hash(cls, account_id, content_hash):
+        """
+        Find a statement already imported into an account by its content hash.
+
+        Returns:
+            Statement: The imported statement
+            None: If this file has not been imported into the account
+        """
+        return cls.query.filter_by(account_id=account_id, content_hash=content_hash).first()
+
+    @classmethod
+    def add_statement(cls, account_id, statement_date, content_hash, commit=True):
+        """
+        Record an imported statement. A file imported again with force=1
+        updates the existing record instead of adding a second one.
+        """
+        if isinstance(statement_date, str):
+            statement_date = datetime.datetime.strptime(statement_date, '%Y-%m-%d').date()
+        statement = cls.get_by_hash(account_id, content_hash)
+        if statement is None:
+            statement = cls(account_id=account_id, content_hash=content_hash)
+            db.session.add(statement)
+        statement.statement_date = statement_date
+        statement.created_at = datetime.datetime.now(datetime.UTC)
+        if commit:
+            db.session.commit()
+        return statement
@@ -1,6 +1,18 @@
 import datetime
+import hashlib
+import json
+import re
+from collections import defaultdict
+from sqlalchemy import DDL, Index, case, column, delete, event, func, inspect, literal_column, or_, select, table, text, update
+from sqlalchemy.dialects.sqlite import insert
+
+from models.account import Account
+from models.monthly_rollup import MonthlyRollup
 from . import db
 
+# IDs per DELETE ... IN (...); older SQLite builds allow 999 bound variables
+DELETE_CHUNK_SIZE = 900
+
 # Transaction Table Schema
 class Transaction(db.Model):
     __tablename__ = 'transactions'
@@ -14,6 +26,17 @@ class Transaction(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.datetime.now(datetime.UTC), nullable=False)  # Renamed to created_at
     last_modified_time = db.Column(db.DateTime, onupdate=datetime.datetime.now(datetime.UTC), nullable=True)  # Renamed to last_modified_time, only updates on modification
     comment = db.Column(db.Text, nullable=True)
+    # Hash of Transaction.key; NULL only on duplicates left over from before it existed
+    dedup_key = db.Column(db.String(64), nullable=True)
+
+    __table_args__ = (
+        # Every read endpoint filters on a date range
+        Index('ix_transactions_date_account', 'transaction_date', 'account_id'),
+        # Duplicate detection looks up all the columns of Transaction.key
+        Index('ix_transactions_dedup', 'account_id', 'transaction_date', 'amount', 'description', 'category'),
+        # Rejects duplicates at insert time
+        Index('uix_transactions_dedup_key', 'dedup_key', unique=True),
+    )
 
     def __repr__(self):
         return f"<Transaction {self.transaction_id} - {self.amount}>"
@@ -27,7 +50,24 @@ class Transaction(db.Model):
             self.category, 
             self.account_id
         )
+
+    @property
+    def rollup_row(self):
+        """The fields MonthlyRollup aggregates on."""
+        return (self.account_id, self.transaction_date, self.category, self.amount)
     
+    @staticmethod
+    def compute_dedup_key(transaction_date, amount, description, category, account_id):
+        """
+        Hash the fields of Transaction.key into the value stored in dedup_key.
+        """
+        if isinstance(transaction_date, datetime.datetime):
+            transaction_date = transaction_date.date()
+        if isinstance(transaction_date, datetime.date):
+            transaction_date = transaction_date.isoformat()
+        payload = json.dumps([transaction_date, float(amount), description, category, account_id])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
     @classmethod
     def add_transaction(cls, account_id, transaction_date, description, category, amount, comment=None):
         new_transaction = cls(
@@ -45,6 +85,139 @@ class Transaction(db.Model):
 
         return new_transaction  # Return the created transaction
     
+    @classmethod
+    def bulk_add_transactions(cls, rows):
+        """
+        Insert many transactions with a single executemany, without committing.
+
+        Rows whose key matches an existing transaction, or an earlier row in
+        the same batch, are skipped by the unique dedup_key index.
+
+        :param rows: List of dicts keyed by column name.
+        :return: List of the new transaction IDs.
+        """
+        if not rows:
+            return []
+        for row in rows:
+            row["dedup_key"] = cls.compute_dedup_key(
+                row["transaction_date"], row["amount"], row["description"],
+                row.get("category"), row["account_id"]
+            )
+        query = (
+            insert(cls)
+            .on_conflict_do_nothing(index_elements=["dedup_key"])
+            .returning(cls.transaction_id, cls.account_id, cls.transaction_date, cls.category, cls.amount)
+        )
+        inserted = db.session.execute(query, rows).all()
+        MonthlyRollup.apply(row[1:] for row in inserted)
+        return [row[0] for row in inserted]
+
+    @classmethod
+    def remove_duplicates(cls):
+        """
+        Delete every transaction whose key matches a transaction with a lower
+        ID, in a single statement. Does not commit.
+
+        :return: Number of transactions deleted.
+        """
+        keep = select(func.min(cls.transaction_id)).group_by(
+            cls.account_id, cls.transaction_date, cls.amount, cls.description, cls.category
+        )
+        deleted = db.session.execute(
+            delete(cls)
+            .where(cls.transaction_id.not_in(keep))
+            .returning(cls.account_id, cls.transaction_date, cls.category, cls.amount),
+            execution_options={"synchronize_session": False},
+        ).all()
+        MonthlyRollup.apply(deleted, sign=-1)
+        return len(deleted)
+
+    @classmethod
+    def get_existing_ids(cls, transaction_ids):
+        """
+        :param transaction_ids: Transaction IDs to look up.
+        :return: Set of those IDs that exist.
+        """
+        if not transaction_ids:
+            return set()
+        query = select(cls.transaction_id).where(cls.transaction_id.in_(set(transaction_ids)))
+        return set(db.session.execute(query).scalars())
+
+    @classmethod
+    def update_transactions(cls, changes):
+        """
+        Apply validated field edits to many transactions without committing.
+
+        Transactions getting the same value for a field are updated by a single
+        UPDATE ... WHERE transaction_id IN (...), so recategorizing many rows
+        is one statement. dedup_key and MonthlyRollup are then brought in line
+        with the new values.
+
+        :param changes: Dict of transaction ID to a dict of column name to new value.
+        """
+        columns = (cls.transaction_id, cls.account_id, cls.transaction_date, cls.description, cls.category, cls.amount)
+        before = {
+            row.transaction_id: row._asdict()
+            for row in db.session.execute(select(*columns).where(cls.transaction_id.in_(list(changes))))
+        }
+
+        ids_by_change = defaultdict(list)
+        for transaction_id, fields in changes.items():
+            for field, value in fields.items():
+                ids_by_change[(field, value)].append(transaction_id)
+        for (field, value), transaction_ids in ids_by_change.items():
+            db.session.execute(
+                update(cls).where(cls.transaction_id.in_(transaction_ids)).values({field: value}),
+                execution_options={"synchronize_session": "fetch"},
+            )
+
+        def rollup_row(row):
+            return (row["account_id"], row["transaction_date"], row["category"], row["amount"])
+
+        def dedup_key(row):
+            return cls.compute_dedup_key(
+                row["transaction_date"], row["amount"], row["description"], row["category"], row["account_id"]
+            )
+
+        key_updates = []
+        old_rows = []
+        new_rows = []
+        for transaction_id, old in before.items():
+            new = {**old, **changes[transaction_id]}
+            if dedup_key(new) != dedup_key(old):
+                key_updates.append({"transaction_id": transaction_id, "dedup_key": dedup_key(new)})
+            if rollup_row(new) != rollup_row(old):
+                old_rows.append(rollup_row(old))
+                new_rows.append(rollup_row(new))
+        if key_updates:
+            db.session.execute(update(cls), key_updates)
+        MonthlyRollup.apply(old_rows, sign=-1)
+        MonthlyRollup.apply(new_rows)
+
+    @classmethod
+    def delete_transactions(cls, transaction_ids):
+        """
+        Delete transactions by ID with DELETE ... WHERE transaction_id IN (...),
+        chunked to stay under SQLite's bound-variable limit. Does not commit,
+        so the caller decides whether the whole delete stands.
+
+        :param transaction_ids: IDs of the transactions to delete.
+        :return: Set of the IDs that existed and were deleted.
+        """
+        unique_ids = list(dict.fromkeys(transaction_ids))
+        deleted_ids = set()
+        for start in range(0, len(unique_ids), DELETE_CHUNK_SIZE):
+            chunk = unique_ids[start:start + DELETE_CHUNK_SIZE]
+            deleted = db.session.execute(
+                delete(cls)
+                .where(cls.transaction_id.in_(chunk))
+                .returning(cls.transaction_id, cls.account_id, cls.transaction_date, cls.category, cls.amount),
+                execution_options={"synchronize_session": "fetch"},
+            ).all()
+            MonthlyRollup.apply((row[1:] for row in deleted), sign=-1)
+            deleted_ids.update(row[0] for row in deleted)
+        return deleted_ids
+
     @classmethod
     def delete_transaction(cls, transaction_id):
         """
@@ -73,6 +246,132 @@ class Transaction(db.Model):
 
         return query.all()
     
+    @classmethod
+    def _select_with_account_columns(cls):
+        return select(
+            cls.transaction_id,
+            cls.transaction_date,
+            cls.description,
+            cls.category,
+            cls.amount,
+            cls.comment,
+            Account.name.label("account_name"),
+            Account.institution.label("account_institution"),
+            Account.last_4_digits,
+            Account.type.label("account_type"),
+            Account.account_id,
+        ).join(Account, cls.account_id == Account.account_id)
+
+    @classmethod
+    def select_with_accounts(cls, from_date, to_date, after=None, limit=None, account_id=None, category=None):
+        """
+        Build a query for transactions in a date range joined to their account.
+
+        Rows are ordered by (transaction_date, transaction_id) so the result can
+        be paged with a keyset cursor instead of an OFFSET.
+
+        :param from_date: Start date as a date object, or None for no lower bound.
+        :param to_date: End date as a date object, or None for no upper bound.
+        :param after: Optional (transaction_date, transaction_id) of the last row
+            already returned; only rows after it are selected.
+        :param limit: Optional maximum number of rows.
+        :param account_id: Optional account to restrict the rows to.
+        :param category: Optional category to restrict the rows to.
+        :return: A select statement yielding transaction and account columns.
+        """
+        query = cls._select_with_account_columns().order_by(cls.transaction_date, cls.transaction_id)
+        if from_date is not None:
+            query = query.where(cls.transaction_date >= from_date)
+        if to_date is not None:
+            query = query.where(cls.transaction_date <= to_date)
+        if account_id is not None:
+            query = query.where(cls.account_id == account_id)
+        if category is not None:
+            query = query.where(cls.category == category)
+        if after is not None:
+            after_date, after_id = after
+            query = query.where(
+                or_(
+                    cls.transaction_date > after_date,
+                    (cls.transaction_date == after_date)
+                    & (cls.transaction_id > after_id),
+                )
+            )
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @classmethod
+    def search(cls, terms, from_date=None, to_date=None, account_id=None, category=None, limit=50, offset=0):
+        """
+        Build a full-text search over descriptions and comments, best match
+        first, joined to the account like select_with_accounts.
+
+        Every word of terms must match, each as a prefix, so "cost" finds
+        "COSTCO WHOLESALE". Description matches rank above comment matches.
+
+        :param terms: Words to search for; punctuation is ignored.
+        :param from_date: Optional start date.
+        :param to_date: Optional end date.
+        :param account_id: Optional account to search in.
+        :param category: Optional category to search in.
+        :param limit: Maximum number of rows.
+        :param offset: Number of best matches to skip.
+        :return: A select statement yielding transaction and account columns.
+        :raises ValueError: If terms holds no words.
+        """
+        words = re.findall(r"\w+", terms or "")
+        if not words:
+            raise ValueError("Search terms must contain at least one word.")
+        match = " ".join(f'"{word}"*' for word in words)
+
+        query = (
+            cls._select_with_account_columns()
+            .join(SEARCH_INDEX, SEARCH_INDEX.c.rowid == cls.transaction_id)
+            .where(text("transactions_fts MATCH :match").bindparams(match=match))
+        )
+        if from_date is not None:
+            query = query.where(cls.transaction_date >= from_date)
+        if to_date is not None:
+            query = query.where(cls.transaction_date <= to_date)
+        if account_id is not None:
+            query = query.where(cls.account_id == account_id)
+        if category is not None:
+            query = query.where(cls.category == category)
+
+        rank = func.bm25(literal_column("transactions_fts"), *SEARCH_WEIGHTS)
+        return (
+            query.order_by(rank, cls.transaction_date.desc(), cls.transaction_id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+
+    @classmethod
+    def get_descriptions(cls, transaction_ids):
+        """
+        :param transaction_ids: Transaction IDs to look up.
+        :return: List of (transaction_id, description) rows.
+        """
+        if not transaction_ids:
+            return []
+        query = select(cls.transaction_id, cls.description).where(cls.transaction_id.in_(transaction_ids))
+        return db.session.execute(query).all()
+
+    @classmethod
+    def get_by_word(cls, word):
+        """
+        Find transactions mentioning a word, through the full-text index.
+
+        :param word: A single word.
+        :return: List of (transaction_id, description, category) rows.
+        """
+        query = (
+            select(cls.transaction_id, cls.description, cls.category)
+            .join(SEARCH_INDEX, SEARCH_INDEX.c.rowid == cls.transaction_id)
+            .where(text("transactions_fts MATCH :match").bindparams(match=f'description : "{word}"'))
+        )
+        return db.session.execute(query).all()
+
     @classmethod
     def get_transaction_by_key(cls, key):
         """
@@ -85,3 +384,112 @@ class Transaction(db.Model):
             cls.category == key[3],
             cls.account_id == key[4]
         ).first()
+
+    @classmethod
+    def get_category_totals(cls, from_date, to_date):
+        """
+        Sum transaction amounts per category between from_date and to_date.
+
+        Amounts on credit/debit accounts are sign-flipped so spending is positive,
+        and credit card payments are only counted on checking/savings accounts
+        (the card side of the payment would otherwise be counted twice).
+
+        :param from_date: Start date as a date object.
+        :param to_date: End date as a date object.
+        :return: Dict mapping category to its total amount.
+        """
+        signed_amount = case(
+            (Account.type == "credit/debit", -cls.amount),
+            else_=cls.amount,
+        )
+        included = case(
+            (
+                (cls.category == "credit card payment")
+                & (Account.type != "checking/savings"),
+                False,
+            ),
+            else_=True,
+        )
+        query = (
+            select(cls.category, func.sum(signed_amount))
+            .join(Account, cls.account_id == Account.account_id)
+            .where(
+                cls.transaction_date >= from_date,
+                cls.transaction_date <= to_date,
+                included,
+            )
+            .group_by(cls.category)
+        )
+        return {category: total for category, total in db.session.execute(query)}
+
+
+@event.listens_for(Transaction, "before_insert")
+@event.listens_for(Transaction, "before_update")
+def _set_dedup_key(mapper, connection, target):
+    target.dedup_key = Transaction.compute_dedup_key(*target.key)
+
+
+# Keeps MonthlyRollup in step with transactions written through the ORM;
+# bulk statements in the methods above update it themselves
+@event.listens_for(Transaction, "after_insert")
+def _add_to_rollup(mapper, connection, target):
+    MonthlyRollup.apply([target.rollup_row], connection=connection)
+
+
+@event.listens_for(Transaction, "after_update")
+def _move_in_rollup(mapper, connection, target):
+    state = inspect(target)
+    old_row = tuple(
+        state.attrs[name].history.deleted[0] if state.attrs[name].history.deleted else value
+        for name, value in zip(("account_id", "transaction_date", "category", "amount"), target.rollup_row)
+    )
+    if old_row != target.rollup_row:
+        MonthlyRollup.apply([old_row], sign=-1, connection=connection)
+        MonthlyRollup.apply([target.rollup_row], connection=connection)
+
+
+@event.listens_for(Transaction, "after_delete")
+def _remove_from_rollup(mapper, connection, target):
+    MonthlyRollup.apply([target.rollup_row], sign=-1, connection=connection)
+
+
+# Full-text index over description and comment. It is an external-content
+# FTS5 table that stores only the index and reads the text from transactions;
+# the triggers keep it in step with every insert, update and delete.
+SEARCH_INDEX = table("transactions_fts", column("rowid"))
+# bm25 weights of description and comment
+SEARCH_WEIGHTS = (4.0, 1.0)
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, comment,
+        content='transactions', content_rowid='transaction_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, comment)
+        VALUES (new.transaction_id, new.description, new.comment);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, comment)
+        VALUES ('delete', old.transaction_id, old.description, old.comment);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, comment ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, comment)
+        VALUES ('delete', old.transaction_id, old.description, old.comment);
+        INSERT INTO transactions_fts(rowid, description, comment)
+        VALUES (new.transaction_id, new.description, new.comment);
+    END""",
+]
+
+
+def create_search_index(connection):
+    """Create the full-text index and its triggers, and index existing rows."""
+    for statement in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+
+for statement in SEARCH_INDEX_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(statement))
+# The triggers go with the table, the index does not
+event.listen(Transaction.__table__, "before_drop", DDL("DROP TABLE IF EXISTS transactions_fts"))
@@ -0,0 +1,43 @@
+"""Build small text-only PDFs for tests without a PDF library."""
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """
+    Render a PDF with one page per entry in pages.
+
+    Args:
+        pages (list): Each page is a list of text lines
+
+    Returns:
+        bytes: The PDF document
+    """
+    objects = []
+    page_ids = []
+    font_id = 3 + 2 * len(pages)
+    for index, lines in enumerate(pages):
+        page_id, content_id = 3 + 2 * index, 4 + 2 * index
+        page_ids.append(page_id)
+        stream = "BT /F1 10 Tf 14 TL 50 750 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append((page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_id} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>"))
+        objects.append((content_id, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects.append((1, "<< /Type /Catalog /Pages 2 0 R >>"))
+    objects.append((2, f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>"))
+    objects.append((font_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"))
+    objects.sort()
+
+    output = b"%PDF-1.4\n"
+    offsets = {}
+    for object_id, body in objects:
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for object_id in range(1, len(objects) + 1):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return output
@@ -3,12 +3,18 @@ import unittest
 from app import app
 from models import db
 from models.account import Account
+from models.balance import Balance
 from models.transaction import Transaction
 from datetime import datetime
 import json
-# from unittest.mock import patch
+from sqlalchemy import event, func, select
+import importlib
+from unittest.mock import patch
+import models.transaction as transaction_module
 # from tempfile import NamedTemporaryFile
 
+app_module = importlib.import_module("app.app")
+
 
 class BankBuddyTestCase(unittest.TestCase):
     def setUp(self):
@@ -38,6 +44,38 @@ class BankBuddyTestCase(unittest.TestCase):
             self.assertIsInstance(data['transactions'], list)
             self.assertEqual(len(data['transactions']), 1)
 
+    def test_get_transactions_keyset_pagination(self):
+        with app.app_context():
+            for n, day in enumerate((1, 1, 2, 3, 3)):
+                db.session.add(Transaction(account_id=self.test_account_id, transaction_date=datetime(2024, 3, day), description=f"Day {day} #{n}", category="groceries", amount=-float(day)))
+            db.session.commit()
+
+            seen = []
+            cursor = None
+            pages = 0
+            while True:
+                url = '/api/get-transactions?fromDate=2023-01-01&toDate=2025-01-01&limit=2'
+                if cursor:
+                    url += f'&cursor={cursor}'
+                response = self.app.get(url)
+                self.assertEqual(response.status_code, 200)
+                data = response.get_json()
+                self.assertLessEqual(len(data['transactions']), 2)
+                seen.extend(data['transactions'])
+                pages += 1
+                cursor = data['next_cursor']
+                if cursor is None:
+                    break
+
+            self.assertEqual(pages, 3)
+            streamed = self.app.get('/api/get-transactions?fromDate=2023-01-01&toDate=2025-01-01').get_json()
+            self.assertEqual(seen, streamed['transactions'])
+            self.assertEqual([t['transaction_date'] for t in seen], sorted(t['transaction_date'] for t in seen))
+            self.assertEqual(seen[0]['account_name'], "Test Account")
+
+            response = self.app.get('/api/get-transactions?fromDate=2023-01-01&toDate=2025-01-01&cursor=bogus')
+            self.assertEqual(response.status_code, 400)
+
     # def test_add_transaction(self):
     #     new_transaction = {
     #         "account_id": self.test_account_id,
@@ -62,6 +100,215 @@ class BankBuddyTestCase(unittest.TestCase):
             self.assertIn('total_expense', data)
             self.assertEqual(data['total_income'], 50.00)
 
+    def test_transactions_by_categories_matches_python_loop(self):
+        with app.app_context():
+            card = Account(name="Card", last_4_digits="9999", type="credit/debit", institution="Test Bank")
+            other = Account(name="Brokerage", last_4_digits="4242", type="other", institution="Test Bank")
+            db.session.add_all([card, other])
+            db.session.commit()
+            rows = [
+                (self.test_account_id, "paycheck", 2000.0),
+                (self.test_account_id, "credit card payment", -300.0),
+                (self.test_account_id, "restaurant", -12.5),
+                (card.account_id, "groceries", -80.25),
+                (card.account_id, "groceries", 20.0),
+                (card.account_id, "credit card payment", 300.0),
+                (other.account_id, "credit card payment", 10.0),
+                (other.account_id, "investments", -500.0),
+            ]
+            for account_id, category, amount in rows:
+                db.session.add(Transaction(account_id=account_id, transaction_date=datetime(2024, 2, 1), description="Row", category=category, amount=amount))
+            db.session.add(Transaction(account_id=card.account_id, transaction_date=datetime(2026, 1, 1), description="Out of range", category="groceries", amount=-1.0))
+            db.session.commit()
+
+            # The aggregation the endpoint used to do row by row in Python
+            expected = {}
+            for transaction in Transaction.get_transactions_in_date_range(datetime(2023, 1, 1).date(), datetime(2025, 1, 1).date()):
+                if transaction.category == "credit card payment" and transaction.account.type != "checking/savings":
+                    continue
+                amount = transaction.amount
+                if transaction.account.type == "credit/debit":
+                    amount = -amount
+                expected[transaction.category] = expected.get(transaction.category, 0) + amount
+
+            totals = Transaction.get_category_totals(datetime(2023, 1, 1).date(), datetime(2025, 1, 1).date())
+            self.assertEqual(totals, expected)
+
+            response = self.app.get('/api/transactions-by-categories?fromDate=2023-01-01&toDate=2025-01-01')
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.get_data(as_text=True))
+            self.assertEqual(data['transactions'], expected)
+
+    def test_add_duplicate_transaction_is_rejected(self):
+        payload = {"account_id": self.test_account_id, "transaction_date": "2024-01-03", "description": "Coffee", "category": "restaurant", "amount": "4.50"}
+        self.assertEqual(self.app.post('/api/add-transaction', json=payload).status_code, 200)
+        response = self.app.post('/api/add-transaction', json=payload)
+
+        self.assertEqual(response.status_code, 409)
+        with app.app_context():
+            self.assertEqual(Transaction.query.count(), 2)
+
+    def test_remove_duplicates_keeps_oldest_row(self):
+        with app.app_context():
+            # Legacy duplicates predate dedup_key, so they are inserted without one
+            db.session.execute(
+                Transaction.__table__.insert(),
+                [
+                    {"account_id": self.test_account_id, "transaction_date": datetime(2024, 1, 3).date(), "description": "Coffee", "category": "restaurant", "amount": 4.5, "created_at": datetime(2024, 1, 3)}
+                    for _ in range(3)
+                ],
+            )
+            db.session.commit()
+            first_id = db.session.execute(select(func.min(Transaction.transaction_id)).where(Transaction.description == "Coffee")).scalar()
+
+        response = self.app.delete('/api/remove-duplicates')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["message"], "Removed 2 duplicate transactions.")
+        with app.app_context():
+            self.assertEqual([t.transaction_id for t in Transaction.query.filter_by(description="Coffee")], [first_id])
+            self.assertEqual(Transaction.query.count(), 2)
+
+    def test_get_all_accounts_runs_one_query(self):
+        with app.app_context():
+            for n in range(3):
+                account = Account(name=f"Card {n}", last_4_digits=f"000{n}", type="credit/debit", institution="Test Bank")
+                db.session.add(account)
+                db.session.commit()
+                for month in range(1, n + 2):
+                    Balance.add_balance(account.account_id, 100.0 * n + month, datetime(2024, month, 28).date())
+            expected = [account.to_dict() for account in Account.query.order_by(Account.account_id)]
+
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                accounts = app_module.get_all_accounts_from_db()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(accounts, expected)
+        self.assertEqual([a["balance"] for a in accounts], ["NA", "1.0", "102.0", "203.0"])
+        self.assertEqual(accounts[-1]["last_statement_date"], "NA")
+
+    def test_update_transactions_in_one_commit(self):
+        with app.app_context():
+            rows = [Transaction(account_id=self.test_account_id, transaction_date=datetime(2024, 2, day), description=f"Shop {day}", category="shopping", amount=-10.0 * day) for day in range(1, 5)]
+            db.session.add_all(rows)
+            db.session.commit()
+            ids = [row.transaction_id for row in rows]
+
+            commits = []
+            listener = lambda conn: commits.append(True)
+            event.listen(db.engine, "commit", listener)
+            try:
+                response = self.app.put('/api/update-transactions', json={"updates": [
+                    {"transaction_id": ids[0], "field": "category", "value": "groceries"},
+                    {"transaction_id": ids[1], "field": "category", "value": "groceries"},
+                    {"transaction_id": ids[2], "changes": {"amount": "-99.5", "transaction_date": "2024-03-01", "comment": "moved"}},
+                ]})
+            finally:
+                event.remove(db.engine, "commit", listener)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(commits), 1)
+            self.assertEqual([r["status"] for r in response.get_json()["results"]], ["updated"] * 3)
+            db.session.expire_all()
+            self.assertEqual([db.session.get(Transaction, i).category for i in ids], ["groceries", "groceries", "shopping", "shopping"])
+            moved = db.session.get(Transaction, ids[2])
+            self.assertEqual((moved.amount, moved.transaction_date, moved.comment), (-99.5, datetime(2024, 3, 1).date(), "moved"))
+            self.assertEqual(moved.dedup_key, Transaction.compute_dedup_key(*moved.key))
+
+    def test_update_transactions_validates_everything_first(self):
+        response = self.app.put('/api/update-transactions', json={"updates": [
+            {"transaction_id": 1, "field": "category", "value": "rent"},
+            {"transaction_id": 1, "field": "amount", "value": "lots"},
+            {"transaction_id": 1, "field": "transaction_date", "value": "01/02/2024"},
+            {"transaction_id": 1, "field": "colour", "value": "red"},
+            {"transaction_id": 999, "field": "category", "value": "rent"},
+            {"field": "category", "value": "rent"},
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(r["status"], r.get("error")) for r in response.get_json()["results"]],
+            [("skipped", None), ("error", "Invalid amount"), ("error", "Invalid date format"), ("error", "Invalid field"), ("error", "Transaction not found"), ("error", "Missing required fields")],
+        )
+        with app.app_context():
+            self.assertEqual(db.session.get(Transaction, 1).category, "groceries")
+
+    def test_update_transactions_normalises_ids_and_rejects_non_scalar_values(self):
+        response = self.app.put('/api/update-transactions', json={"updates": [{"transaction_id": "1", "field": "comment", "value": "checked"}]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["results"], [{"transaction_id": 1, "status": "updated"}])
+        with app.app_context():
+            self.assertEqual(db.session.get(Transaction, 1).comment, "checked")
+
+        response = self.app.put('/api/update-transactions', json={"updates": [
+            {"transaction_id": "one", "field": "comment", "value": "x"},
+            {"transaction_id": 1, "field": "description", "value": ["a"]},
+            {"transaction_id": 1, "field": "category", "value": {"name": "rent"}},
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [r.get("error") for r in response.get_json()["results"]],
+            ["Invalid transaction_id", "Invalid description", "Invalid category"],
+        )
+
+    def test_update_transactions_rejects_duplicates(self):
+        with app.app_context():
+            copy = Transaction(account_id=self.test_account_id, transaction_date=datetime(2024, 1, 1), description="Test Transaction", category="rent", amount=50.0)
+            db.session.add(copy)
+            db.session.commit()
+            copy_id = copy.transaction_id
+
+        response = self.app.put('/api/update-transactions', json={"updates": [{"transaction_id": copy_id, "field": "category", "value": "groceries"}]})
+
+        self.assertEqual(response.status_code, 409)
+        with app.app_context():
+            self.assertEqual(db.session.get(Transaction, copy_id).category, "rent")
+
+    def test_delete_transactions_in_chunks(self):
+        with app.app_context():
+            rows = [Transaction(account_id=self.test_account_id, transaction_date=datetime(2024, 2, day), description=f"Shop {day}", category="shopping", amount=-1.0) for day in range(1, 6)]
+            db.session.add_all(rows)
+            db.session.commit()
+            ids = [row.transaction_id for row in rows]
+
+        with patch.object(transaction_module, "DELETE_CHUNK_SIZE", 2):
+            response = self.app.post('/api/delete-transaction', json={"transaction_ids": ids + ids[:1]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["message"], "Deleted transactions:5 from the database")
+        with app.app_context():
+            self.assertEqual(Transaction.query.count(), 1)
+
+    def test_delete_transactions_is_all_or_nothing(self):
+        response = self.app.post('/api/delete-transaction', json={"transaction_ids": [1, 404, 405]})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()["not_found"], [404, 405])
+        with app.app_context():
+            self.assertIsNotNone(db.session.get(Transaction, 1))
+
+    def test_delete_transactions_accepts_numeric_strings(self):
+        response = self.app.post('/api/delete-transaction', json={"transaction_ids": ["1"]})
+
+        self.assertEqual(response.status_code, 200)
+        with app.app_context():
+            self.assertIsNone(db.session.get(Transaction, 1))
+
+    def test_delete_transactions_rejects_non_integer_ids(self):
+        response = self.app.post('/api/delete-transaction', json={"transaction_ids": [1, "abc", None]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["invalid"], ["abc", None])
+        with app.app_context():
+            self.assertIsNotNone(db.session.get(Transaction, 1))
+
     def test_create_account(self):
         new_account = {
             "account_name": "Test Account 2",
@@ -0,0 +1,80 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from app import backup
+from app.backup import create_backup, restore_backup
+
+
+class BackupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.db_path = os.path.join(self.folder, "bankBuddy.db")
+        self.backup_dir = os.path.join(self.folder, "backups")
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("CREATE TABLE transactions (transaction_id INTEGER PRIMARY KEY, description TEXT)")
+        connection.executemany("INSERT INTO transactions (description) VALUES (?)", [(f"row {i}",) for i in range(2000)])
+        connection.commit()
+        connection.close()
+
+    def write(self, description):
+        # mtime resolution can be coarse; make sure the write is observable
+        time.sleep(0.01)
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("INSERT INTO transactions (description) VALUES (?)", (description,))
+        connection.commit()
+        connection.close()
+
+    def backups(self):
+        return sorted(name for name in os.listdir(self.backup_dir) if name.endswith(".db.gz"))
+
+    def test_backup_is_compressed_and_restorable(self):
+        backup_path = create_backup(self.db_path, self.backup_dir, pages_per_step=4)
+
+        with gzip.open(backup_path, "rb") as f:
+            self.assertEqual(f.read(16), b"SQLite format 3\x00")
+        restored = os.path.join(self.folder, "restored.db")
+        restore_backup(backup_path, restored)
+        connection = sqlite3.connect(restored)
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0], 2000)
+        self.assertEqual(connection.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+        connection.close()
+
+    def test_unchanged_database_is_skipped(self):
+        self.assertIsNotNone(create_backup(self.db_path, self.backup_dir))
+        self.assertIsNone(create_backup(self.db_path, self.backup_dir))
+
+        # Touching the file without changing data is caught by the fingerprint
+        os.utime(self.db_path)
+        self.assertIsNone(create_backup(self.db_path, self.backup_dir))
+        self.assertEqual(len(self.backups()), 1)
+
+        self.write("new row")
+        self.assertIsNotNone(create_backup(self.db_path, self.backup_dir))
+
+    def test_backups_in_the_same_second_are_kept_apart(self):
+        first = create_backup(self.db_path, self.backup_dir, retention=2)
+        self.write("new row")
+        second = create_backup(self.db_path, self.backup_dir, retention=2)
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.backups(), sorted(os.path.basename(path) for path in (first, second)))
+
+    def test_old_backups_are_rotated(self):
+        for index in range(4):
+            with patch.object(backup, "datetime") as fake_datetime:
+                fake_datetime.now.return_value.strftime.return_value = f"20240101_00000{index}"
+                create_backup(self.db_path, self.backup_dir, retention=2)
+            self.write(f"row {index}")
+
+        self.assertEqual(self.backups(), ["bankBuddy_backup_20240101_000002.db.gz", "bankBuddy_backup_20240101_000003.db.gz"])
+
+
+if __name__ == '__main__':
+    unittest.main()
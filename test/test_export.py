@@ -0,0 +1,121 @@
+import csv
+import importlib
+import io
+import json
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from app import app
+from app import export
+from app.export import COLUMNS, parquet_available
+from models import db
+from models.account import Account
+from models.transaction import Transaction
+
+app_module = importlib.import_module("app.app")
+
+
+class ExportTestCase(unittest.TestCase):
+    ROWS = 2500
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            checking = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            card = Account(name="Card", last_4_digits="2222", type="credit/debit", institution="Test Bank")
+            db.session.add_all([checking, card])
+            db.session.commit()
+            self.checking_id = checking.account_id
+            self.card_id = card.account_id
+            Transaction.bulk_add_transactions([
+                {
+                    "account_id": (self.checking_id, self.card_id)[n % 2],
+                    "transaction_date": date(2024, 1, 1) + timedelta(days=n % 300),
+                    "description": f"Purchase, \"{n}\"",
+                    "category": ("groceries", "restaurant", None)[n % 3],
+                    "amount": -(n + 0.25),
+                    "comment": "note" if n % 7 == 0 else None,
+                }
+                for n in range(self.ROWS)
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def expected(self, **filters):
+        with app.app_context():
+            query = Transaction.select_with_accounts(filters.get("from_date"), filters.get("to_date"),
+                                                     account_id=filters.get("account_id"), category=filters.get("category"))
+            return [app_module.transaction_row_to_dict(row) for row in db.session.execute(query)]
+
+    def test_csv_streams_every_row_in_batches(self):
+        response = self.client.get('/api/export-transactions?format=csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIn("transactions.csv", response.headers["Content-Disposition"])
+        chunks = [chunk.decode() for chunk in response.response]
+        # One chunk per batch fetched from the cursor
+        self.assertEqual(len(chunks), -(-self.ROWS // export.EXPORT_BATCH_SIZE))
+
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        expected = self.expected()
+        self.assertEqual(len(rows), self.ROWS)
+        self.assertEqual(list(rows[0]), COLUMNS)
+        self.assertEqual(rows[5]["description"], expected[5]["description"])
+        self.assertEqual(float(rows[5]["amount"]), expected[5]["amount"])
+        self.assertEqual([int(row["transaction_id"]) for row in rows], [row["transaction_id"] for row in expected])
+
+    def test_ndjson_with_filters(self):
+        url = f'/api/export-transactions?format=ndjson&fromDate=2024-02-01&toDate=2024-03-31&account_id={self.card_id}&category=groceries'
+        response = self.client.get(url)
+
+        lines = response.get_data(as_text=True).splitlines()
+        expected = self.expected(from_date=date(2024, 2, 1), to_date=date(2024, 3, 31), account_id=self.card_id, category="groceries")
+        self.assertGreater(len(expected), 0)
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_empty_csv_has_header(self):
+        response = self.client.get('/api/export-transactions?fromDate=2030-01-01')
+
+        self.assertEqual(response.get_data(as_text=True).strip(), ",".join(COLUMNS))
+
+    def test_invalid_parameters(self):
+        for query in ["format=xlsx", "fromDate=01/02/2024", "fromDate=2024-03-01&toDate=2024-02-01", "account_id=abc"]:
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/export-transactions?{query}').status_code, 400)
+
+    def test_parquet_without_pyarrow(self):
+        with patch.object(app_module, "parquet_available", return_value=False):
+            response = self.client.get('/api/export-transactions?format=parquet')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pyarrow", response.get_json()["error"])
+
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet_is_written_in_row_groups(self):
+        import pyarrow.parquet as pq
+
+        with patch.object(export, "PARQUET_ROW_GROUP_SIZE", 500):
+            response = self.client.get('/api/export-transactions?format=parquet&category=groceries')
+            chunks = list(response.response)
+
+        parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+        expected = self.expected(category="groceries")
+        self.assertEqual(parquet.metadata.num_rows, len(expected))
+        self.assertEqual(parquet.num_row_groups, -(-len(expected) // 500))
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 1)
+        table = parquet.read()
+        self.assertEqual(table.column_names, COLUMNS)
+        self.assertEqual(table.column("transaction_id").to_pylist(), [row["transaction_id"] for row in expected])
+        self.assertEqual(table.column("transaction_date").to_pylist()[0].isoformat(), expected[0]["transaction_date"])
+
+
+if __name__ == '__main__':
+    unittest.main()
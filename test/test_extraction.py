@@ -0,0 +1,252 @@
+import importlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app import app
+from app.extraction import chunk_pages, extract_statement_data
+from models import db
+from models.account import Account
+from models.extraction_cache import ExtractionCache
+from models.job import Job
+from models.statement import Statement
+from models.transaction import Transaction
+from test.pdf_fixtures import make_pdf
+
+app_module = importlib.import_module("app.app")
+
+STATEMENT = {
+    "statement_date": "2024-01-31",
+    "account_balance": 100.0,
+    "transactions": [
+        {"transaction_date": "2024-01-05", "description": "COSTCO", "category": "groceries", "amount": -80.0},
+        {"transaction_date": "2024-01-15", "description": "PAYROLL", "category": "paycheck", "amount": 2000.0},
+    ],
+}
+
+
+class FakeMessage:
+    def __init__(self, text):
+        self.content = [type("Block", (), {"text": text})()]
+
+
+class FakeAnthropic:
+    """Stands in for anthropic.Anthropic and records every request."""
+    calls = []
+
+    def __init__(self, api_key=None):
+        self.messages = self
+
+    def create(self, **kwargs):
+        FakeAnthropic.calls.append(kwargs)
+        return FakeMessage("```json\n" + json.dumps(STATEMENT) + "\n```")
+
+
+class ExtractionCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['JOB_WORKERS'] = 0
+        self.app = app.test_client()
+        FakeAnthropic.calls = []
+        with app.app_context():
+            db.create_all()
+            accounts = [
+                Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank"),
+                Account(name="Other Checking", last_4_digits="2222", type="checking/savings", institution="Test Bank"),
+            ]
+            db.session.add_all(accounts)
+            db.session.commit()
+            self.account_ids = [account.account_id for account in accounts]
+        self.pdf = make_pdf([["Statement Period 01/01/2024 - 01/31/2024", "01/05 COSTCO -80.00", "01/15 PAYROLL 2000.00"]])
+        patchers = [
+            patch.object(app_module, "Anthropic", FakeAnthropic),
+            patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def upload(self, account_id):
+        data = {"account_id": str(account_id), "file": (io.BytesIO(self.pdf), "statement.pdf")}
+        return self.app.post('/api/upload-statement', content_type='multipart/form-data', data=data)
+
+    def test_reupload_short_circuits(self):
+        response = self.upload(self.account_ids[0])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(FakeAnthropic.calls), 1)
+
+        response = self.upload(self.account_ids[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["already_imported"])
+        self.assertEqual(len(FakeAnthropic.calls), 1)
+        with app.app_context():
+            self.assertEqual(Transaction.query.count(), 2)
+
+    def test_force_reimports_deleted_transactions(self):
+        self.upload(self.account_ids[0])
+        with app.app_context():
+            Transaction.query.delete()
+            db.session.commit()
+
+        data = {"account_id": str(self.account_ids[0]), "force": "1", "file": (io.BytesIO(self.pdf), "statement.pdf")}
+        response = self.app.post('/api/upload-statement', content_type='multipart/form-data', data=data)
+
+        self.assertEqual(response.status_code, 202)
+        with app.app_context():
+            self.assertEqual(Transaction.query.count(), 2)
+            self.assertEqual(Statement.query.count(), 1)
+
+    def test_recreated_account_can_import_again(self):
+        self.upload(self.account_ids[1])
+        self.app.delete(f'/api/delete-account/{self.account_ids[1]}')
+        with app.app_context():
+            self.assertEqual(Statement.query.count(), 0)
+            self.assertEqual(Job.query.count(), 0)
+            # SQLite hands the newest row's id out again
+            account = Account(name="Other Checking", last_4_digits="2222", type="checking/savings", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.assertEqual(account.account_id, self.account_ids[1])
+
+        response = self.upload(self.account_ids[1])
+
+        self.assertEqual(response.status_code, 202)
+        with app.app_context():
+            self.assertEqual(Transaction.query.filter_by(account_id=self.account_ids[1]).count(), 2)
+
+    def test_account_with_pending_jobs_is_not_deleted(self):
+        with app.app_context():
+            Job.add_job(self.account_ids[1], "statement.pdf", "missing.pdf")
+
+        response = self.app.delete(f'/api/delete-account/{self.account_ids[1]}')
+
+        self.assertEqual(response.status_code, 409)
+        with app.app_context():
+            self.assertIsNotNone(db.session.get(Account, self.account_ids[1]))
+            self.assertEqual(Job.query.count(), 1)
+
+    def test_cached_extraction_skips_llm_for_other_account(self):
+        self.upload(self.account_ids[0])
+        response = self.upload(self.account_ids[1])
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(FakeAnthropic.calls), 1)
+        with app.app_context():
+            self.assertEqual(Transaction.query.filter_by(account_id=self.account_ids[1]).count(), 2)
+
+    def test_cache_evicts_least_recently_used(self):
+        with app.app_context():
+            entry_size = len(json.dumps(STATEMENT))
+            ExtractionCache.put("a", STATEMENT, max_bytes=entry_size * 2)
+            ExtractionCache.put("b", STATEMENT, max_bytes=entry_size * 2)
+            ExtractionCache.get("a")
+            ExtractionCache.put("c", STATEMENT, max_bytes=entry_size * 2)
+
+            self.assertIsNotNone(ExtractionCache.get("a"))
+            self.assertIsNone(ExtractionCache.get("b"))
+            self.assertEqual(ExtractionCache.get("c"), STATEMENT)
+
+
+class LineParsingClient:
+    """
+    Fake Anthropic client that "extracts" lines shaped like
+    'YYYY-MM-DD DESCRIPTION AMOUNT' from the prompt, tracking concurrency.
+    """
+    LINE = re.compile(r"(\d{4}-\d{2}-\d{2}) (\S+) (-?\d+\.\d+)")
+
+    def __init__(self, fail_on=None):
+        self.messages = self
+        self.fail_on = fail_on
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def create(self, model, max_tokens, messages):
+        prompt = messages[0]["content"]
+        with self.lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.05)
+            if self.fail_on and self.fail_on in prompt:
+                return FakeMessage('{"transactions": [{"transaction_date": "2024-01-0')
+            statement_date = re.search(r"Statement Date (\S+)", prompt)
+            data = {
+                "statement_date": statement_date.group(1) if statement_date else None,
+                "account_balance": None,
+                "transactions": [
+                    {"transaction_date": date, "description": description, "amount": float(amount), "category": "shopping"}
+                    for date, description, amount in self.LINE.findall(prompt)
+                ],
+            }
+            return FakeMessage(json.dumps(data))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class ChunkedExtractionTestCase(unittest.TestCase):
+    PAGES = [
+        "2024-01-01 A -1.00\n2024-01-02 B -2.00",
+        "2024-01-03 C -3.00\n2024-01-04 D -4.00",
+        # Page 3 repeats the transaction that ends page 2
+        "2024-01-04 D -4.00\n2024-01-05 E -5.00\nStatement Date 2024-01-31",
+        "2024-01-06 F -6.00",
+        "2024-01-06 G -6.00",
+        "2024-01-07 H -7.00",
+    ]
+
+    def setUp(self):
+        with app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def extract(self, client, concurrency=2):
+        with app.app_context():
+            return extract_statement_data(
+                client, self.PAGES, chunk_tokens=1,
+                max_tokens=1000, concurrency=concurrency, cache_max_bytes=10 ** 6,
+            )
+
+    def test_chunk_pages_respects_budget_and_page_boundaries(self):
+        pages = ["a" * 40, "b" * 40, "c" * 200, "d" * 4]
+        self.assertEqual(chunk_pages(pages, 25), ["a" * 40 + "\n" + "b" * 40, "c" * 200, "d" * 4])
+        self.assertEqual(chunk_pages(pages, 10 ** 6), ["\n".join(pages)])
+
+    def test_chunks_are_extracted_concurrently_and_merged(self):
+        client = LineParsingClient()
+        data = self.extract(client)
+
+        self.assertEqual(len(client.prompts), len(self.PAGES))
+        self.assertEqual(client.max_in_flight, 2)
+        self.assertEqual(data["statement_date"], "2024-01-31")
+        self.assertEqual([t["description"] for t in data["transactions"]], list("ABCDEFGH"))
+
+    def test_retry_only_requests_failed_chunks(self):
+        with self.assertRaisesRegex(Exception, "chunk 4/6"):
+            self.extract(LineParsingClient(fail_on="F -6.00"))
+
+        client = LineParsingClient()
+        data = self.extract(client)
+        self.assertEqual(len(client.prompts), 1)
+        self.assertEqual(len(data["transactions"]), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import importlib
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from app import app
+from app.ingest import ingest_statement
+from models import db
+from models.account import Account
+from models.data_version import DataVersion
+from models.job import Job
+from models.monthly_rollup import MonthlyRollup
+
+app_module = importlib.import_module("app.app")
+
+
+class ConditionalGetTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        app_module.response_cache.clear()
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def add_transaction(self, description="Coffee"):
+        return self.client.post('/api/add-transaction', json={
+            "account_id": self.account_id, "transaction_date": "2024-01-03",
+            "description": description, "category": "restaurant", "amount": "4.50",
+        })
+
+    def test_matching_etag_returns_304(self):
+        response = self.client.get('/api/get-all-accounts')
+        etag = response.headers["ETag"]
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+
+        response = self.client.get('/api/get-all-accounts', headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_streamed_transactions_support_304(self):
+        url = '/api/get-transactions?fromDate=2024-01-01&toDate=2024-12-31'
+        etag = self.client.get(url).headers["ETag"]
+
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        url = '/api/financial-summary?fromDate=2024-01-01&toDate=2024-12-31'
+        before = self.client.get(url)
+
+        self.assertEqual(self.add_transaction().status_code, 200)
+        after = self.client.get(url, headers={"If-None-Match": before.headers["ETag"]})
+
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after.headers["ETag"], before.headers["ETag"])
+        self.assertEqual(after.get_json()["total_income"], 4.5)
+
+    def test_every_tracked_write_path_bumps_the_version(self):
+        with app.app_context():
+            versions = [DataVersion.get()]
+            ingest_statement(self.account_id, {
+                "statement_date": "2024-01-31",
+                "account_balance": 10.0,
+                "transactions": [{"transaction_date": "2024-01-05", "description": "Pay", "category": "paycheck", "amount": 100}],
+            })
+            versions.append(DataVersion.get())
+            MonthlyRollup.query.filter_by(account_id=self.account_id).delete()
+            db.session.commit()
+            versions.append(DataVersion.get())
+            self.assertEqual(len(set(versions)), len(versions))
+
+    def test_untracked_and_failed_writes_keep_the_version(self):
+        self.add_transaction()
+        with app.app_context():
+            version = DataVersion.get()
+            Job.add_job(self.account_id, "statement.pdf", "/tmp/statement.pdf")
+
+        self.assertEqual(self.add_transaction().status_code, 409)
+        with app.app_context():
+            self.assertEqual(DataVersion.get(), version)
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        url = '/api/financial-summary?fromDate=2024-01-01&toDate=2024-12-31'
+        with patch.object(MonthlyRollup, "get_financial_summary", wraps=MonthlyRollup.get_financial_summary) as summary:
+            first = self.client.get(url)
+            second = self.client.get(url)
+            self.client.get('/api/financial-summary?toDate=2024-12-31&fromDate=2024-01-01')
+            self.client.get('/api/financial-summary?fromDate=2024-02-01&toDate=2024-12-31')
+
+        self.assertEqual(summary.call_count, 2)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get('/api/financial-summary?fromDate=2024-12-31&toDate=2024-01-01')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from datetime import date
+
+from app import app
+from app.ingest import ingest_statement
+from models import db
+from models.account import Account
+from models.balance import Balance
+from models.transaction import Transaction
+
+
+class IngestTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Card", last_4_digits="1111", type="credit/debit", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+            db.session.add(Transaction(account_id=self.account_id, transaction_date=date(2024, 1, 3), description="Coffee", category="restaurant", amount=4.5))
+            db.session.commit()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def statement(self, **overrides):
+        data = {
+            "statement_date": "2024-01-31",
+            "account_balance": 321.5,
+            "transactions": [
+                {"transaction_date": "2024-01-03", "description": "Coffee", "category": "restaurant", "amount": 4.5},
+                {"transaction_date": "2024-01-05", "description": "Groceries", "category": "groceries", "amount": "82.10"},
+                {"transaction_date": "2024-01-05", "description": "Groceries", "category": "groceries", "amount": 82.1},
+                {"transaction_date": "not a date", "description": "Broken", "category": "shopping", "amount": 1},
+                {"transaction_date": "2024-01-20", "description": "Refund", "category": "shopping", "amount": -15},
+            ],
+        }
+        data.update(overrides)
+        return data
+
+    def test_ingest_skips_duplicates_and_records_balance(self):
+        with app.app_context():
+            transaction_ids = ingest_statement(self.account_id, self.statement())
+
+            self.assertEqual(len(transaction_ids), 2)
+            self.assertEqual(Transaction.query.count(), 3)
+            self.assertEqual(Balance.get_recent_balance(self.account_id).balance, 321.5)
+            self.assertEqual(db.session.get(Account, self.account_id).last_statement_date, date(2024, 1, 31))
+
+    def test_ingest_rolls_back_whole_statement(self):
+        with app.app_context():
+            with self.assertRaises(ValueError):
+                ingest_statement(self.account_id, self.statement(statement_date="31/01/2024"))
+
+            self.assertEqual(Transaction.query.count(), 1)
+            self.assertEqual(Balance.query.count(), 0)
+            self.assertIsNone(db.session.get(Account, self.account_id).last_statement_date)
+
+
+if __name__ == '__main__':
+    unittest.main()
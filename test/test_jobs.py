@@ -0,0 +1,171 @@
+import importlib
+import io
+import json
+import os
+import time
+import unittest
+import zipfile
+from unittest.mock import patch
+
+from app import app
+from models import db
+from models.account import Account
+from models.job import Job
+from models.transaction import Transaction
+from test.pdf_fixtures import make_pdf
+from test.test_extraction import FakeAnthropic
+
+app_module = importlib.import_module("app.app")
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['JOB_WORKERS'] = 2
+        self.app = app.test_client()
+        FakeAnthropic.calls = []
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+        patchers = [
+            patch.object(app_module, "Anthropic", FakeAnthropic),
+            patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def wait_for_job(self, job_id, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.app.get(f'/api/jobs/{job_id}').get_json()
+            if job["state"] in (Job.SUCCEEDED, Job.FAILED):
+                return job
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
+
+    def test_upload_returns_job_and_processes_in_background(self):
+        data = {"account_id": str(self.account_id), "file": (io.BytesIO(make_pdf([["01/05 COSTCO -80.00"]])), "statement.pdf")}
+        response = self.app.post('/api/upload-statement', content_type='multipart/form-data', data=data)
+        self.assertEqual(response.status_code, 202)
+
+        job = self.wait_for_job(response.get_json()["job_id"])
+        self.assertEqual(job["state"], Job.SUCCEEDED)
+        self.assertEqual(job["inserted_count"], 2)
+        self.assertIsNotNone(job["run_seconds"])
+        with app.app_context():
+            self.assertEqual(Transaction.query.count(), 2)
+
+    def test_failed_job_reports_error(self):
+        data = {"account_id": str(self.account_id), "file": (io.BytesIO(b"not a pdf"), "broken.pdf")}
+        response = self.app.post('/api/upload-statement', content_type='multipart/form-data', data=data)
+
+        job = self.wait_for_job(response.get_json()["job_id"])
+        self.assertEqual(job["state"], Job.FAILED)
+        self.assertIn("Error reading PDF", job["error"])
+
+    def test_resume_pending_runs_jobs_left_by_previous_process(self):
+        os.makedirs(app_module.UPLOAD_FOLDER, exist_ok=True)
+        file_path = os.path.join(app_module.UPLOAD_FOLDER, "resume_test.pdf")
+        with open(file_path, "wb") as f:
+            f.write(make_pdf([["01/05 COSTCO -80.00"]]))
+        with app.app_context():
+            job = Job.add_job(self.account_id, "resume_test.pdf", file_path)
+            job.mark_running()
+            job_id = job.job_id
+            self.assertEqual(app_module.job_queue.resume_pending(), 1)
+
+        self.assertEqual(self.wait_for_job(job_id)["state"], Job.SUCCEEDED)
+        self.assertFalse(os.path.exists(file_path))
+
+    def test_batch_upload_processes_each_file_independently(self):
+        with app.app_context():
+            savings = Account(name="Savings", last_4_digits="2222", type="checking/savings", institution="Test Bank")
+            db.session.add(savings)
+            db.session.commit()
+            savings_id = savings.account_id
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("checking.pdf", make_pdf([["Checking statement"]]))
+            zf.writestr("savings.pdf", make_pdf([["Savings statement"]]))
+            zf.writestr("__MACOSX/._savings.pdf", b"resource fork")
+        archive.seek(0)
+        data = {
+            "files": [(archive, "statements.zip"), (io.BytesIO(b"not a pdf"), "broken.pdf"), (io.BytesIO(b"%PDF"), "orphan.pdf")],
+            "accounts": json.dumps({
+                "checking.pdf": {"account_id": self.account_id},
+                "savings.pdf": {"name": "Savings", "last_4_digits": "2222"},
+                "broken.pdf": {"account_id": savings_id},
+            }),
+        }
+        response = self.app.post('/api/upload-statements', content_type='multipart/form-data', data=data)
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+        files = {result["filename"]: result for result in body["files"]}
+        self.assertEqual(set(files), {"checking.pdf", "savings.pdf", "broken.pdf", "orphan.pdf"})
+        self.assertEqual(files["orphan.pdf"]["error"], "Account not found")
+
+        deadline = time.monotonic() + 10
+        while not (batch := self.app.get(body["status_url"]).get_json())["done"]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(batch["counts"], {Job.SUCCEEDED: 2, Job.FAILED: 1})
+        with app.app_context():
+            self.assertEqual(Transaction.query.filter_by(account_id=self.account_id).count(), 2)
+            self.assertEqual(Transaction.query.filter_by(account_id=savings_id).count(), 2)
+
+    def test_batch_upload_reports_malformed_account_entries_per_file(self):
+        data = {
+            "files": [(io.BytesIO(make_pdf([["Statement"]])), "a.pdf"), (io.BytesIO(make_pdf([["Statement"]])), "b.pdf"), (io.BytesIO(b"%PDF"), "c.pdf")],
+            "accounts": json.dumps({"a.pdf": 5, "c.pdf": [], "b.pdf": {"account_id": self.account_id}}),
+        }
+        response = self.app.post('/api/upload-statements', content_type='multipart/form-data', data=data)
+
+        self.assertEqual(response.status_code, 202)
+        files = {result["filename"]: result for result in response.get_json()["files"]}
+        self.assertEqual(files["a.pdf"]["error"], "accounts entries must be JSON objects")
+        self.assertEqual(files["c.pdf"]["error"], "accounts entries must be JSON objects")
+        self.assertEqual(self.wait_for_job(files["b.pdf"]["job_id"])["state"], Job.SUCCEEDED)
+
+    def test_batch_upload_reports_bad_zips_per_file(self):
+        corrupt = io.BytesIO()
+        with zipfile.ZipFile(corrupt, "w") as zf:
+            zf.writestr("corrupt.pdf", make_pdf([["Statement"]]))
+        # Flip a byte of the stored member so its CRC check fails on read
+        data = bytearray(corrupt.getvalue())
+        data[60] ^= 0xFF
+        data = {
+            "account_id": str(self.account_id),
+            "files": [
+                (io.BytesIO(b"not a zip"), "broken.zip"),
+                (io.BytesIO(bytes(data)), "corrupt.zip"),
+                (io.BytesIO(make_pdf([["Statement"]])), "good.pdf"),
+            ],
+        }
+        response = self.app.post('/api/upload-statements', content_type='multipart/form-data', data=data)
+
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+        self.assertIn("batch_id", body)
+        files = {result["filename"]: result for result in body["files"]}
+        self.assertTrue(files["broken.zip"]["error"].startswith("Invalid zip file"))
+        self.assertTrue(files["corrupt.pdf"]["error"].startswith("Invalid zip file"))
+        self.assertEqual(self.wait_for_job(files["good.pdf"]["job_id"])["state"], Job.SUCCEEDED)
+        # The partly written copy of the corrupt member is removed
+        self.assertFalse([name for name in os.listdir(app_module.UPLOAD_FOLDER) if name.endswith("_corrupt.pdf")])
+
+    def test_unknown_job(self):
+        self.assertEqual(self.app.get('/api/jobs/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+
+from app import app
+from app.ingest import ingest_statement
+from models import db
+from models.account import Account
+from models.merchant_category import HISTORY, USER, MerchantCategory, MerchantMatcher, normalize_merchant
+from models.transaction import Transaction
+
+
+class MerchantMatcherTestCase(unittest.TestCase):
+    def test_normalize_merchant(self):
+        self.assertEqual(normalize_merchant("SQ *BLUE BOTTLE #0421 OAKLAND CA"), "BLUE BOTTLE OAKLAND CA")
+        self.assertEqual(normalize_merchant("AMZN Mktp US*2K4LM1"), "AMZN MKTP US")
+        self.assertEqual(normalize_merchant("Trader Joe's 552 ****"), "TRADER JOE'S")
+        self.assertEqual(normalize_merchant("#1234 0001"), "")
+        self.assertEqual(normalize_merchant("& ' 0001"), "")
+
+    def test_exact_then_longest_leading_words(self):
+        matcher = MerchantMatcher([
+            ("COSTCO WHOLESALE SEATTLE WA", "groceries", HISTORY),
+            ("COSTCO GAS", "gas", USER),
+            ("UBER", "travel", USER),
+            ("SQ", "restaurant", USER),
+            ("TARGET", "shopping", HISTORY),
+        ])
+
+        self.assertEqual(matcher.match("COSTCO WHOLESALE #1 SEATTLE WA"), ("groceries", HISTORY))
+        self.assertEqual(matcher.match("COSTCO WHOLESALE #9 PORTLAND OR"), ("groceries", HISTORY))
+        self.assertEqual(matcher.match("COSTCO GAS #88"), ("gas", USER))
+        self.assertEqual(matcher.match("UBER *TRIP HELP.UBER.COM"), ("travel", USER))
+        self.assertIsNone(matcher.match("CVS PHARMACY"))
+        self.assertIsNone(matcher.match("TAR"))
+
+    def test_shared_first_word_prefers_user_entries(self):
+        matcher = MerchantMatcher([("AMAZON PRIME", "subscriptions", HISTORY), ("AMAZON MKTP", "amazon", USER)])
+
+        self.assertEqual(matcher.match("AMAZON RETAIL"), ("amazon", USER))
+
+    def test_user_overrides_and_history_fills_gaps(self):
+        matcher = MerchantMatcher([("SAFEWAY", "groceries", HISTORY), ("NETFLIX COM", "subscriptions", USER)])
+        rows = [
+            {"description": "SAFEWAY #12", "category": "shopping"},
+            {"description": "SAFEWAY #13", "category": "other expenses"},
+            {"description": "NETFLIX.COM", "category": "shopping"},
+            {"description": "UNKNOWN", "category": None},
+        ]
+
+        self.assertEqual(matcher.apply(rows), 2)
+        self.assertEqual([row["category"] for row in rows], ["shopping", "groceries", "subscriptions", None])
+
+    def test_user_entry_only_fills_gaps_for_related_merchants(self):
+        matcher = MerchantMatcher([("ZELLE TO J SMITH", "rent", USER), ("UBER TRIP", "travel", USER)])
+        rows = [
+            {"description": "ZELLE FROM ACME PAYROLL", "category": "paycheck"},
+            {"description": "UBER EATS", "category": "restaurant"},
+            {"description": "UBER EATS", "category": "other expenses"},
+            {"description": "ZELLE TO J SMITH", "category": "transfer"},
+        ]
+
+        self.assertEqual(matcher.apply(rows), 2)
+        self.assertEqual([row["category"] for row in rows], ["paycheck", "restaurant", "travel", "rent"])
+
+
+class MerchantMemoTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Card", last_4_digits="2222", type="credit/debit", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def ingest(self, statement_date, transactions):
+        with app.app_context():
+            ingest_statement(self.account_id, {"statement_date": statement_date, "account_balance": 0.0, "transactions": transactions})
+
+    def categories(self):
+        with app.app_context():
+            return {t.description: t.category for t in Transaction.query.order_by(Transaction.transaction_id)}
+
+    def test_user_fix_is_remembered_for_the_next_statement(self):
+        self.ingest("2024-01-31", [
+            {"transaction_date": "2024-01-05", "description": "COSTCO WHOLESALE #123 SEATTLE WA", "category": "groceries", "amount": 120},
+            {"transaction_date": "2024-01-06", "description": "BLUE BOTTLE COFFEE", "category": "restaurant", "amount": 6},
+        ])
+        with app.app_context():
+            self.assertEqual(db.session.get(MerchantCategory, "COSTCO WHOLESALE SEATTLE WA").source, HISTORY)
+            costco = Transaction.query.filter(Transaction.description.like("COSTCO%")).one().transaction_id
+
+        self.client.put('/api/update-transaction', json={"transaction_id": costco, "field": "category", "value": "shopping"})
+        self.ingest("2024-02-29", [
+            {"transaction_date": "2024-02-05", "description": "COSTCO WHOLESALE #124 SEATTLE WA", "category": "groceries", "amount": 80},
+            {"transaction_date": "2024-02-06", "description": "BLUE BOTTLE COFFEE", "category": "other expenses", "amount": 7},
+            {"transaction_date": "2024-02-07", "description": "COSTCO WHOLESALE #456 PORTLAND OR", "category": "groceries", "amount": 90},
+            {"transaction_date": "2024-02-08", "description": "COSTCO WHOLESALE #457 PORTLAND OR", "category": None, "amount": 95},
+        ])
+
+        categories = self.categories()
+        self.assertEqual(categories["COSTCO WHOLESALE #124 SEATTLE WA"], "shopping")
+        # Another store only takes the correction where nothing better was extracted
+        self.assertEqual(categories["COSTCO WHOLESALE #456 PORTLAND OR"], "groceries")
+        self.assertEqual(categories["COSTCO WHOLESALE #457 PORTLAND OR"], "shopping")
+        with app.app_context():
+            self.assertEqual(Transaction.query.filter_by(description="BLUE BOTTLE COFFEE", category="restaurant").count(), 2)
+
+    def test_batch_edit_is_remembered(self):
+        self.ingest("2024-01-31", [{"transaction_date": "2024-01-05", "description": "SHELL OIL 5744", "category": "auto", "amount": 40}])
+        with app.app_context():
+            shell = Transaction.query.one().transaction_id
+
+        self.client.put('/api/update-transactions', json={"updates": [{"transaction_id": shell, "field": "category", "value": "gas"}]})
+
+        with app.app_context():
+            memo = db.session.get(MerchantCategory, "SHELL OIL")
+            self.assertEqual((memo.category, memo.source), ("gas", USER))
+
+    def test_user_edit_does_not_rewrite_related_merchants(self):
+        self.ingest("2024-01-31", [
+            {"transaction_date": "2024-01-05", "description": "ZELLE TO J SMITH", "category": "transfer", "amount": -1500},
+            {"transaction_date": "2024-01-06", "description": "UBER TRIP", "category": "restaurant", "amount": -20},
+        ])
+        self.client.post('/api/recategorize-merchant', json={"description": "ZELLE TO J SMITH", "category": "rent"})
+        self.client.post('/api/recategorize-merchant', json={"description": "UBER TRIP", "category": "travel"})
+
+        self.ingest("2024-02-29", [
+            {"transaction_date": "2024-02-01", "description": "ZELLE FROM ACME PAYROLL", "category": "paycheck", "amount": 3000},
+            {"transaction_date": "2024-02-02", "description": "UBER EATS", "category": "restaurant", "amount": -30},
+        ])
+        response = self.client.post('/api/recategorize-merchant', json={"description": "UBER TRIP", "category": "rideshare"})
+
+        self.assertEqual(response.get_json()["updated_count"], 1)
+        self.assertEqual(self.categories(), {
+            "ZELLE TO J SMITH": "rent",
+            "UBER TRIP": "rideshare",
+            "ZELLE FROM ACME PAYROLL": "paycheck",
+            "UBER EATS": "restaurant",
+        })
+
+    def test_recategorize_merchant_applies_to_history(self):
+        self.ingest("2024-01-31", [
+            {"transaction_date": "2024-01-05", "description": "AMAZON MKTP #1", "category": "shopping", "amount": 20},
+            {"transaction_date": "2024-01-07", "description": "AMAZON MKTP #2", "category": "shopping", "amount": 25},
+            {"transaction_date": "2024-01-09", "description": "AMAZON PRIME", "category": "subscriptions", "amount": 15},
+            {"transaction_date": "2024-01-10", "description": "TARGET", "category": "shopping", "amount": 30},
+        ])
+
+        response = self.client.post('/api/recategorize-merchant', json={"description": "Amazon Mktp", "category": "amazon"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["updated_count"], 2)
+        self.assertEqual(list(self.categories().values()), ["amazon", "amazon", "subscriptions", "shopping"])
+        self.assertEqual(self.client.post('/api/recategorize-merchant', json={"description": "#12", "category": "amazon"}).status_code, 400)
+
+    def test_recategorize_merchant_starting_with_punctuation(self):
+        self.ingest("2024-01-31", [
+            {"transaction_date": "2024-01-05", "description": "& CO PAYMENT #1", "category": "shopping", "amount": 20},
+            {"transaction_date": "2024-01-07", "description": "& CO PAYMENT #2", "category": "shopping", "amount": 25},
+        ])
+
+        response = self.client.post('/api/recategorize-merchant', json={"description": "& CO PAYMENT", "category": "bills"})
+
+        self.assertEqual(response.get_json()["updated_count"], 2)
+        self.assertEqual(list(self.categories().values()), ["bills", "bills"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import contextlib
+import importlib
+import io
+import re
+import unittest
+
+from app import app
+from models import db
+from models.account import Account
+
+app_module = importlib.import_module("app.app")
+
+
+def sample(text, name, **labels):
+    """Value of one sample in Prometheus text output, 0 if absent."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if match and match.group(1) == name and (match.group(2) or "") == wanted:
+            return float(match.group(3))
+    return 0.0
+
+
+class RequestMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        app_module.response_cache.clear()
+        self.slow_request_ms = app_module.request_metrics.slow_request_ms
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+        for day in range(1, 6):
+            self.client.post('/api/add-transaction', json={
+                "account_id": self.account_id, "transaction_date": f"2024-01-0{day}",
+                "description": f"Coffee {day}", "category": "restaurant", "amount": "4.50",
+            })
+
+    def tearDown(self):
+        app_module.request_metrics.slow_request_ms = self.slow_request_ms
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def metrics(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        return response.get_data(as_text=True)
+
+    def test_server_timing_and_route_metrics(self):
+        route = {"method": "GET", "route": "/api/financial-summary"}
+        before = self.metrics()
+
+        response = self.client.get('/api/financial-summary?fromDate=2024-01-02&toDate=2024-01-31')
+        after = self.metrics()
+
+        self.assertEqual(response.status_code, 200)
+        timing = re.fullmatch(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"', response.headers["Server-Timing"])
+        self.assertIsNotNone(timing)
+        queries = int(timing.group(1))
+        self.assertGreater(queries, 0)
+
+        self.assertEqual(sample(after, "bankbuddy_http_requests_total", **route, status="200")
+                         - sample(before, "bankbuddy_http_requests_total", **route, status="200"), 1)
+        self.assertEqual(sample(after, "bankbuddy_http_request_duration_seconds_count", **route)
+                         - sample(before, "bankbuddy_http_request_duration_seconds_count", **route), 1)
+        self.assertEqual(sample(after, "bankbuddy_http_request_sql_statements_sum", **route)
+                         - sample(before, "bankbuddy_http_request_sql_statements_sum", **route), queries)
+        self.assertEqual(sample(after, "bankbuddy_http_response_size_bytes_sum", **route)
+                         - sample(before, "bankbuddy_http_response_size_bytes_sum", **route), len(response.data))
+        self.assertEqual(sample(after, "bankbuddy_http_request_duration_seconds_bucket", **route, le="+Inf"),
+                         sample(after, "bankbuddy_http_request_duration_seconds_count", **route))
+
+    def test_streamed_response_is_recorded_when_finished(self):
+        route = {"method": "GET", "route": "/api/get-transactions"}
+        before = sample(self.metrics(), "bankbuddy_http_response_size_bytes_sum", **route)
+
+        response = self.client.get('/api/get-transactions?fromDate=2024-01-01&toDate=2024-01-31')
+        body = response.get_data()
+        after = self.metrics()
+
+        self.assertEqual(len(response.get_json()["transactions"]), 5)
+        self.assertEqual(sample(after, "bankbuddy_http_response_size_bytes_sum", **route) - before, len(body))
+        # The rows are read while streaming, after the view has returned
+        self.assertGreater(sample(after, "bankbuddy_http_request_sql_statements_sum", **route), 0)
+
+    def test_slow_requests_are_logged_with_query_plans(self):
+        app_module.request_metrics.slow_request_ms = 0.001
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            response = self.client.get('/api/get-transactions?fromDate=2024-01-01&toDate=2024-01-31&limit=2')
+        log = output.getvalue()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Slow request GET /api/get-transactions (200)", log)
+        self.assertIn("FROM transactions", log)
+        self.assertRegex(log, r"\n    (SEARCH|SCAN) transactions")
+
+    def test_fast_requests_are_not_logged(self):
+        app_module.request_metrics.slow_request_ms = 60 * 1000
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.client.get('/api/get-all-accounts')
+
+        self.assertNotIn("Slow request", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
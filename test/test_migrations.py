@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+
+from sqlalchemy import create_engine, inspect
+
+from app import app
+from models import db
+from models.balance import Balance
+from models.migrations import MIGRATIONS, get_schema_version, upgrade_schema
+from models.transaction import Transaction
+
+# Schema of a bankBuddy.db created before any indexes were declared
+OLD_SCHEMA = """
+CREATE TABLE accounts (
+    account_id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(100) NOT NULL,
+    institution VARCHAR(100), created_date DATETIME NOT NULL,
+    last_modified_date DATETIME NOT NULL, last_4_digits VARCHAR(4) NOT NULL,
+    type VARCHAR(50) NOT NULL, last_statement_date DATE,
+    CONSTRAINT uix_account_unique UNIQUE (name, last_4_digits, type)
+);
+CREATE TABLE balance (
+    id INTEGER NOT NULL PRIMARY KEY, account_id INTEGER NOT NULL REFERENCES accounts (account_id),
+    balance FLOAT NOT NULL, statement_date DATE NOT NULL, created_at DATETIME NOT NULL
+);
+CREATE TABLE transactions (
+    transaction_id INTEGER NOT NULL PRIMARY KEY, account_id INTEGER NOT NULL REFERENCES accounts (account_id),
+    transaction_date DATE NOT NULL, description VARCHAR(255) NOT NULL, category VARCHAR(100),
+    amount FLOAT NOT NULL, created_at DATETIME NOT NULL, last_modified_time DATETIME, comment TEXT
+);
+CREATE TABLE jobs (
+    job_id VARCHAR(32) NOT NULL PRIMARY KEY, account_id INTEGER NOT NULL REFERENCES accounts (account_id),
+    filename VARCHAR(255) NOT NULL, file_path VARCHAR(1024) NOT NULL, content_hash VARCHAR(64),
+    state VARCHAR(20) NOT NULL, created_at DATETIME NOT NULL, started_at DATETIME, finished_at DATETIME,
+    inserted_count INTEGER, result TEXT, error TEXT
+);
+"""
+
+
+class MigrationTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript(OLD_SCHEMA)
+        connection.close()
+        self.engine = create_engine("sqlite:///" + self.db_path)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.db_path)
+
+    def test_upgrade_adds_indexes_to_existing_database(self):
+        self.assertEqual(upgrade_schema(self.engine), len(MIGRATIONS))
+
+        inspector = inspect(self.engine)
+        transaction_indexes = {index["name"] for index in inspector.get_indexes("transactions")}
+        balance_indexes = {index["name"] for index in inspector.get_indexes("balance")}
+        self.assertIn("ix_transactions_date_account", transaction_indexes)
+        self.assertIn("ix_transactions_dedup", transaction_indexes)
+        self.assertIn("ix_balance_account_statement_date", balance_indexes)
+        self.assertIn("batch_id", {column["name"] for column in inspector.get_columns("jobs")})
+
+    def test_upgrade_backfills_dedup_key_around_legacy_duplicates(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("INSERT INTO accounts VALUES (1, 'Card', 'Bank', '2024-01-01', '2024-01-01', '1111', 'credit/debit', NULL)")
+        connection.executemany(
+            "INSERT INTO transactions (transaction_id, account_id, transaction_date, description, category, amount, created_at) VALUES (?, 1, ?, ?, 'restaurant', ?, '2024-01-01')",
+            [(1, "2024-01-03", "Coffee", 4.5), (2, "2024-01-03", "Coffee", 4.5), (3, "2024-01-04", "Lunch", 12.0)],
+        )
+        connection.commit()
+        connection.close()
+
+        upgrade_schema(self.engine)
+
+        with self.engine.connect() as connection:
+            keys = dict(connection.exec_driver_sql("SELECT transaction_id, dedup_key FROM transactions").all())
+        self.assertEqual(keys[1], Transaction.compute_dedup_key(date(2024, 1, 3), 4.5, "Coffee", "restaurant", 1))
+        self.assertIsNone(keys[2])
+        self.assertIsNotNone(keys[3])
+        indexes = {index["name"]: index for index in inspect(self.engine).get_indexes("transactions")}
+        self.assertTrue(indexes["uix_transactions_dedup_key"]["unique"])
+
+        with self.engine.connect() as connection:
+            matches = connection.exec_driver_sql("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'lun*'").scalars().all()
+        self.assertEqual(matches, [3])
+
+    def test_upgrade_is_idempotent(self):
+        upgrade_schema(self.engine)
+        self.assertEqual(upgrade_schema(self.engine), len(MIGRATIONS))
+        with self.engine.connect() as connection:
+            self.assertEqual(get_schema_version(connection), len(MIGRATIONS))
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    def setUp(self):
+        with app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def explain(self, query):
+        statement = getattr(query, "statement", query)
+        compiled = statement.compile(dialect=db.engine.dialect)
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params)
+        return " | ".join(row[3] for row in rows)
+
+    def test_date_range_uses_index(self):
+        with app.app_context():
+            query = Transaction.query.filter(Transaction.transaction_date >= date(2024, 1, 1), Transaction.transaction_date <= date(2024, 2, 1))
+            self.assertIn("USING INDEX ix_transactions_date_account", self.explain(query))
+
+    def test_dedup_lookup_uses_index(self):
+        with app.app_context():
+            key = (date(2024, 1, 1), -5.0, "Coffee", "restaurant", 1)
+            query = Transaction.query.filter(
+                Transaction.transaction_date == key[0],
+                Transaction.amount == key[1],
+                Transaction.description == key[2],
+                Transaction.category == key[3],
+                Transaction.account_id == key[4]
+            )
+            self.assertIn("USING INDEX ix_transactions_dedup", self.explain(query))
+
+    def test_search_uses_full_text_index(self):
+        with app.app_context():
+            plan = self.explain(Transaction.search("costco", account_id=1))
+            self.assertIn("VIRTUAL TABLE INDEX", plan)
+            self.assertIn("transactions USING INTEGER PRIMARY KEY", plan)
+
+    def test_recent_balance_uses_index_without_sort(self):
+        with app.app_context():
+            query = Balance.query.filter_by(account_id=1).order_by(Balance.statement_date.desc()).limit(1)
+            plan = self.explain(query)
+            self.assertIn("USING INDEX ix_balance_account_statement_date", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+from datetime import date, datetime
+
+from app import app
+from app.ingest import ingest_statement
+from models import db
+from models.account import Account
+from models.monthly_rollup import MonthlyRollup, split_months
+from models.transaction import Transaction
+
+RANGES = [
+    ("2023-01-01", "2025-01-01"),
+    ("2024-01-15", "2024-03-10"),
+    ("2024-02-01", "2024-02-29"),
+    ("2024-02-10", "2024-02-20"),
+    ("2024-03-05", "2024-03-05"),
+]
+
+
+def summary_from_transactions(from_date, to_date):
+    """The per-row loop /api/financial-summary used before the rollup."""
+    summary = {"total_income": 0, "total_expense": 0, "refunds": 0, "credit_card_expense": 0}
+    for transaction in Transaction.get_transactions_in_date_range(from_date, to_date):
+        amount = transaction.amount
+        if transaction.account.type.lower() == "checking/savings":
+            if amount > 0:
+                summary["total_income"] += amount
+            else:
+                summary["total_expense"] += abs(amount)
+        elif transaction.account.type.lower() == "credit/debit":
+            if amount > 0:
+                summary["credit_card_expense"] += amount
+            elif transaction.category != "credit card payment":
+                summary["refunds"] += abs(amount)
+    summary["net_position"] = summary["total_income"] - summary["total_expense"]
+    return summary
+
+
+class SplitMonthsTestCase(unittest.TestCase):
+    def test_whole_months_and_edges(self):
+        self.assertEqual(
+            split_months(date(2024, 1, 15), date(2024, 3, 10)),
+            ((date(2024, 2, 1), date(2024, 3, 1)), [(date(2024, 1, 15), date(2024, 1, 31)), (date(2024, 3, 1), date(2024, 3, 10))]),
+        )
+        self.assertEqual(split_months(date(2024, 2, 1), date(2024, 2, 29)), ((date(2024, 2, 1), date(2024, 3, 1)), []))
+        self.assertEqual(split_months(date(2023, 12, 1), date(2024, 1, 31)), ((date(2023, 12, 1), date(2024, 2, 1)), []))
+
+    def test_range_inside_one_month(self):
+        self.assertEqual(split_months(date(2024, 2, 10), date(2024, 2, 20)), (None, [(date(2024, 2, 10), date(2024, 2, 20))]))
+
+
+class MonthlyRollupTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            checking = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            card = Account(name="Card", last_4_digits="2222", type="credit/debit", institution="Test Bank")
+            db.session.add_all([checking, card])
+            db.session.commit()
+            self.checking_id = checking.account_id
+            self.card_id = card.account_id
+
+            ingest_statement(self.checking_id, {
+                "statement_date": "2024-03-31",
+                "account_balance": 1000.0,
+                "transactions": [
+                    {"transaction_date": "2024-01-20", "description": "Paycheck", "category": "paycheck", "amount": 2000},
+                    {"transaction_date": "2024-02-01", "description": "Rent", "category": "rent", "amount": -900},
+                    {"transaction_date": "2024-02-15", "description": "Card payment", "category": "credit card payment", "amount": -300},
+                    {"transaction_date": "2024-03-05", "description": "Cash", "category": None, "amount": -40},
+                ],
+            })
+            ingest_statement(self.card_id, {
+                "statement_date": "2024-03-31",
+                "account_balance": 150.0,
+                "transactions": [
+                    {"transaction_date": "2024-01-31", "description": "Groceries", "category": "groceries", "amount": 82.1},
+                    {"transaction_date": "2024-02-10", "description": "Refund", "category": "shopping", "amount": -15},
+                    {"transaction_date": "2024-02-15", "description": "Payment", "category": "credit card payment", "amount": -300},
+                    {"transaction_date": "2024-03-29", "description": "Dinner", "category": "restaurant", "amount": 45.5},
+                ],
+            })
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def assert_consistent(self):
+        expected = {}
+        for transaction in Transaction.query.all():
+            key = (transaction.account_id, transaction.transaction_date.replace(day=1), transaction.category or '')
+            inflow, outflow, count = expected.get(key, (0.0, 0.0, 0))
+            if transaction.amount > 0:
+                inflow += transaction.amount
+            else:
+                outflow -= transaction.amount
+            expected[key] = (inflow, outflow, count + 1)
+
+        rollup = {(row.account_id, row.month, row.category): row for row in MonthlyRollup.query.all()}
+        self.assertEqual(set(rollup), set(expected))
+        for key, (inflow, outflow, count) in expected.items():
+            self.assertAlmostEqual(rollup[key].inflow, inflow)
+            self.assertAlmostEqual(rollup[key].outflow, outflow)
+            self.assertEqual(rollup[key].transaction_count, count)
+
+        for from_date, to_date in RANGES:
+            with self.subTest(from_date=from_date, to_date=to_date):
+                from_day = date.fromisoformat(from_date)
+                to_day = date.fromisoformat(to_date)
+                query = f'fromDate={from_date}&toDate={to_date}'
+
+                summary = self.client.get('/api/financial-summary?' + query).get_json()
+                for field, value in summary_from_transactions(from_day, to_day).items():
+                    self.assertAlmostEqual(summary[field], value)
+
+                categories = MonthlyRollup.get_category_totals(from_day, to_day)
+                raw = Transaction.get_category_totals(from_day, to_day)
+                self.assertEqual(set(categories), set(raw))
+                for category, total in raw.items():
+                    self.assertAlmostEqual(categories[category], total)
+
+    def test_rollup_follows_every_write_path(self):
+        with app.app_context():
+            self.assert_consistent()
+
+            self.client.post('/api/add-transaction', json={
+                "account_id": self.card_id, "transaction_date": "2024-02-20",
+                "description": "Books", "category": "shopping", "amount": "30",
+            })
+            self.assert_consistent()
+
+            dinner = Transaction.query.filter_by(description="Dinner").one().transaction_id
+            rent = Transaction.query.filter_by(description="Rent").one().transaction_id
+            for transaction_id, field, value in [
+                (dinner, "amount", "50"),
+                (dinner, "transaction_date", "2024-02-28"),
+                (rent, "category", "housing"),
+                (rent, "comment", "March"),
+            ]:
+                response = self.client.put('/api/update-transaction', json={"transaction_id": transaction_id, "field": field, "value": value})
+                self.assertEqual(response.status_code, 200)
+                self.assert_consistent()
+
+            groceries = Transaction.query.filter_by(description="Groceries").one().transaction_id
+            response = self.client.put('/api/update-transactions', json={"updates": [
+                {"transaction_id": groceries, "changes": {"category": "restaurant", "transaction_date": "2024-02-02"}},
+                {"transaction_id": dinner, "changes": {"category": "restaurant", "amount": "-5"}},
+                {"transaction_id": rent, "field": "description", "value": "Rent (Feb)"},
+            ]})
+            self.assertEqual(response.status_code, 200)
+            self.assert_consistent()
+
+            self.client.post('/api/delete-transaction', json={"transaction_ids": [dinner]})
+            self.assert_consistent()
+
+            self.client.delete(f'/api/delete-account/{self.card_id}')
+            self.assert_consistent()
+
+    def test_remove_duplicates_updates_rollup(self):
+        with app.app_context():
+            # Legacy duplicates predate dedup_key and reach the rollup through a rebuild
+            db.session.execute(Transaction.__table__.insert(), [
+                {"account_id": self.checking_id, "transaction_date": date(2024, 2, 1), "description": "Rent", "category": "rent", "amount": -900.0, "created_at": datetime(2024, 2, 1)}
+            ] * 2)
+            MonthlyRollup.rebuild()
+            db.session.commit()
+            self.assert_consistent()
+
+            self.client.delete('/api/remove-duplicates')
+            self.assert_consistent()
+
+    def test_rebuild_command(self):
+        with app.app_context():
+            MonthlyRollup.query.delete()
+            db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=["rebuild-rollups"])
+
+        self.assertIn("Rebuilt 8 monthly rollup rows", result.output)
+        with app.app_context():
+            self.assert_consistent()
+
+
+if __name__ == '__main__':
+    unittest.main()
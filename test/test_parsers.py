@@ -0,0 +1,146 @@
+import importlib
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app import app
+from app.parsers import parse_statement
+from models import db
+from models.account import Account
+from models.merchant_category import MerchantCategory
+from models.transaction import Transaction
+from test.pdf_fixtures import make_pdf
+from test.test_extraction import FakeAnthropic
+
+app_module = importlib.import_module("app.app")
+
+CHASE_PAGE = [
+    "Manage your account online at chase.com",
+    "Opening/Closing Date 12/06/23 - 01/05/24",
+    "New Balance $1,234.56",
+    "ACCOUNT ACTIVITY",
+    "12/28 AMAZON MKTPLACE PMTS 45.10",
+    "01/02 Payment Thank You-Mobile -500.00",
+    "01/04 COSTCO WHSE #0123 1,080.25",
+]
+
+BOFA_PAGE = [
+    "Your checking account",
+    "Ending balance on January 31, 2024 $2,500.00",
+    "Deposits and other additions",
+    "01/15/24 PAYROLL ACME CORP 3,000.00",
+    "Withdrawals and other subtractions",
+    "01/20/24 RENT PAYMENT ACCT 123456789 -1,500.00",
+]
+
+
+class StatementParserTestCase(unittest.TestCase):
+    def write_pdf(self, pages):
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(make_pdf(pages))
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_chase_selected_by_first_page(self):
+        data = parse_statement(self.write_pdf([CHASE_PAGE]), institution="Some Bank")
+
+        self.assertEqual(data["parser"], "chase_credit_card")
+        self.assertEqual(data["statement_date"], "2024-01-05")
+        self.assertEqual(data["account_balance"], 1234.56)
+        self.assertEqual(
+            [(t["transaction_date"], t["amount"], t["category"]) for t in data["transactions"]],
+            [("2023-12-28", 45.10, "other expenses"), ("2024-01-02", -500.0, "credit card payment"), ("2024-01-04", 1080.25, "other expenses")],
+        )
+
+    def test_bank_of_america_selected_by_institution(self):
+        data = parse_statement(self.write_pdf([BOFA_PAGE]), institution="Bank of America")
+
+        self.assertEqual(data["parser"], "bank_of_america_checking")
+        self.assertEqual(data["statement_date"], "2024-01-31")
+        self.assertEqual(data["account_balance"], 2500.0)
+        self.assertEqual([t["amount"] for t in data["transactions"]], [3000.0, -1500.0])
+        # Descriptions are masked like text sent to the LLM
+        self.assertEqual(data["transactions"][1]["description"], "RENT PAYMENT ACCT ****")
+        self.assertEqual(data["redaction_hits"], {"account_number": 1})
+
+    def test_low_confidence_and_unknown_layouts_return_none(self):
+        unparseable = CHASE_PAGE + ["01/03 LINE WITHOUT AN AMOUNT", "01/03 ANOTHER ONE"]
+        self.assertIsNone(parse_statement(self.write_pdf([unparseable])))
+        self.assertIsNone(parse_statement(self.write_pdf([["Unknown Credit Union statement"]])))
+
+
+class ParserFallbackTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['JOB_WORKERS'] = 0
+        self.app = app.test_client()
+        FakeAnthropic.calls = []
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Sapphire", last_4_digits="4321", type="credit/debit", institution="Chase")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+        patcher = patch.object(app_module, "Anthropic", FakeAnthropic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def upload(self, pages):
+        data = {"account_id": str(self.account_id), "file": (io.BytesIO(make_pdf(pages)), "statement.pdf")}
+        return self.app.post('/api/upload-statement', content_type='multipart/form-data', data=data)
+
+    def test_parsed_statement_needs_no_api_key(self):
+        with patch.dict(os.environ, {}, clear=True):
+            response = self.upload([CHASE_PAGE])
+        job = self.app.get(response.get_json()["status_url"]).get_json()
+
+        self.assertEqual(job["state"], "succeeded")
+        self.assertEqual(job["inserted_count"], 3)
+        self.assertEqual(FakeAnthropic.calls, [])
+
+    def test_uncategorized_statement_goes_to_llm_when_available(self):
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}):
+            response = self.upload([CHASE_PAGE])
+        job = self.app.get(response.get_json()["status_url"]).get_json()
+
+        self.assertEqual(job["state"], "succeeded")
+        self.assertEqual(len(FakeAnthropic.calls), 1)
+
+    def test_remembered_merchants_keep_statement_local(self):
+        with app.app_context():
+            MerchantCategory.learn("AMAZON MKTPLACE PMTS", "shopping")
+            MerchantCategory.learn("COSTCO WHSE", "groceries")
+            db.session.commit()
+
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}):
+            response = self.upload([CHASE_PAGE])
+        job = self.app.get(response.get_json()["status_url"]).get_json()
+
+        self.assertEqual(job["state"], "succeeded")
+        self.assertEqual(FakeAnthropic.calls, [])
+        with app.app_context():
+            categories = {t.description: t.category for t in Transaction.query.all()}
+        self.assertEqual(categories["AMAZON MKTPLACE PMTS"], "shopping")
+        self.assertEqual(categories["COSTCO WHSE #0123"], "groceries")
+
+    def test_unrecognized_statement_falls_back_to_llm(self):
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}):
+            response = self.upload([["Unknown Credit Union statement"]])
+        job = self.app.get(response.get_json()["status_url"]).get_json()
+
+        self.assertEqual(job["state"], "succeeded")
+        self.assertEqual(len(FakeAnthropic.calls), 1)
+        with app.app_context():
+            self.assertEqual(Transaction.query.count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
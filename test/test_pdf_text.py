@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app import app
+from app import pdf_text
+from app.pdf_text import extract_pdf_pages
+from app.profiling import StageTimer
+from models import db
+from models.page_text import PageText
+from test.pdf_fixtures import make_pdf
+
+
+class PdfTextTestCase(unittest.TestCase):
+    def setUp(self):
+        with app.app_context():
+            db.create_all()
+        fd, self.pdf_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(make_pdf([[f"Page {number} call 555-123-4567"] for number in range(1, 7)]))
+
+    def tearDown(self):
+        os.remove(self.pdf_path)
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_pages_are_redacted_in_order_across_workers(self):
+        timer = StageTimer()
+        with app.app_context():
+            pages = extract_pdf_pages(self.pdf_path, "hash", workers=3, timer=timer)
+
+        self.assertEqual(pages, [f"Page {number} call ****" for number in range(1, 7)])
+        redactions = [stage for stage in timer.stages if stage["stage"] == "redaction"]
+        self.assertEqual([stage["hits"] for stage in redactions], [{"phone": 1}] * 6)
+
+    def test_worker_pool_is_reused(self):
+        with app.app_context():
+            extract_pdf_pages(self.pdf_path, "first", workers=2)
+            pool = pdf_text._pool
+            extract_pdf_pages(self.pdf_path, "second", workers=2)
+
+        self.assertIsNotNone(pool)
+        self.assertIs(pdf_text._pool, pool)
+
+    def test_retry_only_extracts_failed_pages(self):
+        def flaky(pdf_path, page_numbers, workers):
+            return [
+                (number, None, "layout error", 0.1, 0.0, {}) if number == 2 else (number, f"text {number}", None, 0.1, 0.01, {})
+                for number in page_numbers
+            ]
+
+        with app.app_context():
+            with patch.object(pdf_text, "_extract_pages", side_effect=flaky):
+                with self.assertRaisesRegex(Exception, "page 3: layout error"):
+                    extract_pdf_pages(self.pdf_path, "hash", workers=2)
+            self.assertEqual(len(PageText.get_pages("hash", pdf_text.PrivacyFilter.VERSION)), 5)
+
+            with patch.object(pdf_text, "_extract_pages", return_value=[(2, "text 2", None, 0.1, 0.01, {})]) as retry:
+                pages = extract_pdf_pages(self.pdf_path, "hash", workers=2)
+
+        retry.assert_called_once_with(self.pdf_path, [2], 2)
+        self.assertEqual(pages, [f"text {number}" for number in range(6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from app.privacy_filter import PrivacyFilter
+from benchmarks.bench_privacy_filter import sequential_hash_sensitive_data
+
+
+class PrivacyFilterTestCase(unittest.TestCase):
+    SAMPLES = {
+        'credit_card': ["Card 4111 1111 1111 1111 charged", "4111-1111-1111-1111", "4111111111111111"],
+        'account_number': ["Account 123456789012 ending", "ACCT 12345678"],
+        'ssn': ["SSN 123-45-6789", "ssn 123456789 on file"],
+        'email': ["Questions? help@bank.example.com", "jane.doe+stmt@mail.co"],
+        'phone': ["Call 800-555-1234 or 800.555.1234", "tel 800555-1234"],
+    }
+
+    def test_each_pattern_matches_previous_implementation(self):
+        for name, samples in self.SAMPLES.items():
+            for sample in samples:
+                with self.subTest(pattern=name, sample=sample):
+                    self.assertEqual(PrivacyFilter().hash_sensitive_data(sample), sequential_hash_sensitive_data(sample))
+                    self.assertIn("****", PrivacyFilter().hash_sensitive_data(sample))
+
+    def test_statement_lines_match_previous_implementation(self):
+        rng = random.Random(7)
+        merchants = ["COSTCO WHSE #0123", "AMAZON MKTPLACE", "PAYROLL ACME 2024", "ZELLE TO J SMITH"]
+        for _ in range(2000):
+            digits = "".join(rng.choice("0123456789") for _ in range(rng.choice([4, 9, 10, 12, 16])))
+            line = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} {rng.choice(merchants)} {digits} {rng.randint(1, 99999) / 100:.2f}"
+            self.assertEqual(PrivacyFilter().hash_sensitive_data(line), sequential_hash_sensitive_data(line))
+
+    def test_overlapping_email_is_masked_whole(self):
+        self.assertEqual(PrivacyFilter().hash_sensitive_data("mail a.12345678@x.com"), "mail ****")
+
+    def test_hits_are_counted_per_pattern(self):
+        privacy_filter = PrivacyFilter()
+        privacy_filter.hash_sensitive_data("4111 1111 1111 1111, 123-45-6789, 800-555-1234, 800-555-4321")
+        self.assertEqual(privacy_filter.hits, {'credit_card': 1, 'ssn': 1, 'phone': 2})
+
+    def test_empty_text(self):
+        self.assertEqual(PrivacyFilter().hash_sensitive_data(""), "")
+        self.assertIsNone(PrivacyFilter().hash_sensitive_data(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
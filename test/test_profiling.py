@@ -0,0 +1,153 @@
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from app import app
+from app.profiling import CPROFILE, StageTimer, capture_profile
+from models import db
+from models.account import Account
+from models.ingest_stage import IngestStage
+from test.pdf_fixtures import make_pdf
+from test.test_extraction import FakeAnthropic
+
+app_module = importlib.import_module("app.app")
+
+
+class StageProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['JOB_WORKERS'] = 0
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        self.app = app.test_client()
+        FakeAnthropic.calls = []
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+        patchers = [
+            patch.object(app_module, "Anthropic", FakeAnthropic),
+            patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}),
+            patch.dict(app.config, {"PROFILE_DIR": self.profile_dir}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def upload(self, pdf=None, **fields):
+        pdf = pdf or make_pdf([["Statement Period 01/01/2024 - 01/31/2024", "01/05 COSTCO -80.00"]])
+        data = {"account_id": str(self.account_id), "file": (io.BytesIO(pdf), "statement.pdf"), **fields}
+        return self.app.post('/api/upload-statement', content_type='multipart/form-data', data=data)
+
+    def test_upload_reports_and_records_every_stage(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+
+        stages = [timing["stage"] for timing in body["timings"]]
+        for stage in ["save", "hash", "statement_lookup", "local_parser", "pdf_open", "pdf_extract",
+                      "redaction", "prompt_build", "llm", "json_parse", "merchant_match", "insert", "commit"]:
+            self.assertIn(stage, stages)
+        self.assertLess(stages.index("save"), stages.index("llm"))
+        self.assertLess(stages.index("llm"), stages.index("insert"))
+        self.assertTrue(all(timing["seconds"] >= 0 for timing in body["timings"]))
+        insert = next(timing for timing in body["timings"] if timing["stage"] == "insert")
+        self.assertEqual(insert["inserted"], 2)
+        self.assertEqual(next(t for t in body["timings"] if t["stage"] == "pdf_extract")["page"], 1)
+
+        job = self.app.get(body["status_url"]).get_json()
+        self.assertEqual(job["timings"], body["timings"])
+        self.assertNotIn("profile_url", job)
+
+        history = self.app.get('/api/ingest-history').get_json()
+        self.assertEqual(history["jobs"][0]["job_id"], body["job_id"])
+        self.assertIn("llm", history["jobs"][0]["stages"])
+        summary = {row["stage"]: row for row in history["summary"]}
+        self.assertEqual(summary["llm"]["count"], 1)
+
+    def test_failed_jobs_keep_their_timings(self):
+        response = self.upload(pdf=b"not a pdf")
+
+        job = self.app.get(response.get_json()["status_url"]).get_json()
+        self.assertEqual(job["state"], "failed")
+        self.assertIn("local_parser", [timing["stage"] for timing in job["timings"]])
+
+    def test_cprofile_capture(self):
+        response = self.upload(profile="cprofile")
+        job_id = response.get_json()["job_id"]
+
+        self.assertEqual(self.app.get(f'/api/jobs/{job_id}').get_json()["profile_url"], f"/api/jobs/{job_id}/profile")
+        profile = self.app.get(f'/api/jobs/{job_id}/profile')
+        self.assertEqual(profile.status_code, 200)
+        self.assertIn("cumulative", profile.get_data(as_text=True))
+        self.assertIn("ingest_statement", profile.get_data(as_text=True))
+
+    def test_job_runs_when_the_profiler_is_taken(self):
+        error = ValueError("Another profiling tool is already active")
+        with patch("cProfile.Profile.enable", side_effect=error):
+            response = self.upload(profile="cprofile")
+        job_id = response.get_json()["job_id"]
+
+        self.assertEqual(self.app.get(f'/api/jobs/{job_id}').get_json()["state"], "succeeded")
+        self.assertEqual(self.app.get(f'/api/jobs/{job_id}/profile').status_code, 404)
+
+    def test_concurrent_captures_run_one_at_a_time(self):
+        first_started, first_release = threading.Event(), threading.Event()
+        entered = []
+
+        def first():
+            with capture_profile(CPROFILE, os.path.join(self.profile_dir, "first.prof")):
+                entered.append("first")
+                first_started.set()
+                first_release.wait(5)
+                entered.append("first done")
+
+        def second():
+            with capture_profile(CPROFILE, os.path.join(self.profile_dir, "second.prof")):
+                entered.append("second")
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        threads[0].start()
+        first_started.wait(5)
+        threads[1].start()
+        threads[1].join(0.1)
+        first_release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(entered, ["first", "first done", "second"])
+        self.assertEqual(sorted(os.listdir(self.profile_dir)), ["first.prof", "second.prof"])
+
+    def test_unknown_profiler_is_rejected(self):
+        response = self.upload(profile="perf")
+
+        self.assertEqual(response.status_code, 400)
+        with app.app_context():
+            self.assertEqual(IngestStage.query.count(), 0)
+
+    def test_stage_timer_records_details(self):
+        timer = StageTimer()
+        with timer.stage("insert", rows=3) as details:
+            details["inserted"] = 2
+        timer.add("llm", 1.5, chunk=1)
+
+        self.assertEqual([stage["stage"] for stage in timer.stages], ["insert", "llm"])
+        self.assertEqual(timer.stages[0]["rows"], 3)
+        self.assertEqual(timer.stages[0]["inserted"], 2)
+        self.assertEqual(timer.stages[1], {"stage": "llm", "seconds": 1.5, "chunk": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
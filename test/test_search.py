@@ -0,0 +1,97 @@
+import unittest
+from datetime import date
+
+from app import app
+from app.ingest import ingest_statement
+from models import db
+from models.account import Account
+from models.transaction import Transaction
+
+
+class SearchTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            checking = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            card = Account(name="Card", last_4_digits="2222", type="credit/debit", institution="Test Bank")
+            db.session.add_all([checking, card])
+            db.session.commit()
+            self.checking_id = checking.account_id
+            self.card_id = card.account_id
+            ingest_statement(self.card_id, {
+                "statement_date": "2024-03-31",
+                "account_balance": 0.0,
+                "transactions": [
+                    {"transaction_date": "2024-01-10", "description": "COSTCO WHOLESALE #123", "category": "groceries", "amount": 120},
+                    {"transaction_date": "2024-02-11", "description": "Costco Gas", "category": "gas", "amount": 40},
+                    {"transaction_date": "2024-03-12", "description": "Target", "category": "shopping", "amount": 15, "comment": "returned the costco-size box"},
+                    {"transaction_date": "2024-03-13", "description": "Café Mocha", "category": "restaurant", "amount": 5},
+                ],
+            })
+            db.session.add(Transaction(account_id=self.checking_id, transaction_date=date(2024, 2, 1), description="Costco membership", category="shopping", amount=-65.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def search(self, query, status=200):
+        response = self.client.get('/api/search-transactions?' + query)
+        self.assertEqual(response.status_code, status)
+        return response.get_json()
+
+    def descriptions(self, query):
+        return [t["description"] for t in self.search(query)["transactions"]]
+
+    def test_prefix_match_ranks_descriptions_first(self):
+        results = self.descriptions('q=cost')
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[-1], "Target")
+        self.assertEqual(self.descriptions('q=costco%20whole'), ["COSTCO WHOLESALE #123"])
+        self.assertEqual(self.descriptions('q=cafe'), ["Café Mocha"])
+
+    def test_filters(self):
+        self.assertEqual(self.descriptions(f'q=costco&account_id={self.checking_id}'), ["Costco membership"])
+        self.assertEqual(self.descriptions('q=costco&category=gas'), ["Costco Gas"])
+        self.assertEqual(
+            sorted(self.descriptions('q=costco&fromDate=2024-02-01&toDate=2024-02-29')),
+            ["Costco Gas", "Costco membership"],
+        )
+        self.search('q=costco&account_id=abc', status=400)
+
+    def test_pagination(self):
+        seen = []
+        offset = 0
+        while offset is not None:
+            page = self.search(f'q=costco&limit=3&offset={offset}')
+            seen.extend(t["transaction_id"] for t in page["transactions"])
+            offset = page["next_offset"]
+
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+        self.search('q=costco&limit=0', status=400)
+
+    def test_empty_query_is_rejected(self):
+        self.search('q=%20%2A%22', status=400)
+        self.search('', status=400)
+
+    def test_index_follows_edits_and_deletes(self):
+        with app.app_context():
+            target = Transaction.query.filter_by(description="Target").one().transaction_id
+            gas = Transaction.query.filter_by(description="Costco Gas").one().transaction_id
+
+        self.client.put('/api/update-transaction', json={"transaction_id": target, "field": "comment", "value": "gift for Sam"})
+        self.client.put('/api/update-transactions', json={"updates": [{"transaction_id": gas, "field": "description", "value": "Shell fuel"}]})
+        self.client.post('/api/delete-transaction', json={"transaction_ids": [gas]})
+
+        self.assertEqual(len(self.descriptions('q=costco')), 2)
+        self.assertEqual(self.descriptions('q=gift'), ["Target"])
+        self.assertEqual(self.descriptions('q=shell'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
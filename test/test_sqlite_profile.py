@@ -0,0 +1,97 @@
+import sqlite3
+import time
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app import app
+from models import db
+from models.account import Account
+from models.session import READ_BIND
+from models.transaction import Transaction
+
+
+class SqliteProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            account = Account(name="Checking", last_4_digits="1111", type="checking/savings", institution="Test Bank")
+            db.session.add(account)
+            db.session.commit()
+            self.account_id = account.account_id
+            db.session.add(Transaction(account_id=self.account_id, transaction_date=date(2024, 1, 5), description="Pay", category="paycheck", amount=100.0))
+            db.session.commit()
+            self.db_path = db.engine.url.database
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def summary(self):
+        # Not a whole month, so the totals come straight from the transactions
+        response = self.client.get('/api/financial-summary?fromDate=2024-01-02&toDate=2024-01-31')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_pragmas_are_applied(self):
+        with app.app_context():
+            with db.engine.connect() as connection:
+                pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                self.assertEqual(pragma("journal_mode"), "wal")
+                self.assertEqual(pragma("synchronous"), 1)
+                self.assertEqual(pragma("temp_store"), 2)
+                self.assertEqual(pragma("busy_timeout"), 5000)
+                self.assertEqual(pragma("query_only"), 0)
+            with db.engines[READ_BIND].connect() as connection:
+                self.assertEqual(connection.exec_driver_sql("PRAGMA query_only").scalar(), 1)
+                with self.assertRaises(OperationalError):
+                    connection.exec_driver_sql("DELETE FROM transactions")
+
+    def test_read_endpoints_use_the_read_pool(self):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        with app.app_context():
+            read_engine = db.engines[READ_BIND]
+        event.listen(read_engine, "before_cursor_execute", listener)
+        try:
+            self.client.get('/api/get-all-accounts')
+            # Streamed, so the rows are only read as the body is consumed
+            self.client.get('/api/get-transactions?fromDate=2024-01-01&toDate=2024-01-31').get_data()
+        finally:
+            event.remove(read_engine, "before_cursor_execute", listener)
+
+        self.assertTrue(any("FROM accounts" in statement for statement in statements))
+        self.assertTrue(any("FROM transactions" in statement for statement in statements))
+
+    def test_reads_proceed_while_a_writer_holds_a_transaction(self):
+        writer = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            writer.execute("BEGIN EXCLUSIVE")
+            writer.execute(
+                "INSERT INTO transactions (account_id, transaction_date, description, category, amount, created_at) "
+                "VALUES (?, '2024-01-06', 'Bonus', 'paycheck', 50.0, '2024-01-06')",
+                (self.account_id,),
+            )
+            writer.execute("UPDATE data_version SET version = version + 1")
+
+            started = time.monotonic()
+            during = self.summary()
+            elapsed = time.monotonic() - started
+
+            writer.execute("COMMIT")
+        finally:
+            writer.close()
+
+        # Served from the last committed snapshot without waiting on the lock
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(during["total_income"], 100.0)
+        self.assertEqual(self.summary()["total_income"], 150.0)
+
+
+if __name__ == '__main__':
+    unittest.main()